@@ -4,6 +4,7 @@ from magickit.adapters.base import BaseAdapter
 from magickit.adapters.cognilens import CognilensAdapter
 from magickit.adapters.lexora import LexoraAdapter
 from magickit.adapters.mcp_base import MCPBaseAdapter
+from magickit.adapters.pool import close_adapters, get_adapter
 from magickit.adapters.prismind import PrismindAdapter
 
 __all__ = [
@@ -12,4 +13,6 @@ __all__ = [
     "CognilensAdapter",
     "LexoraAdapter",
     "PrismindAdapter",
+    "close_adapters",
+    "get_adapter",
 ]
@@ -35,9 +35,15 @@ class BaseAdapter(ABC):
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
                 timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_keepalive_connections=32),
             )
         return self._client
 
+    @property
+    def connected(self) -> bool:
+        """Whether the HTTP client has been created and is still open."""
+        return self._client is not None and not self._client.is_closed
+
     async def close(self) -> None:
         """Close the HTTP client."""
         if self._client is not None and not self._client.is_closed:
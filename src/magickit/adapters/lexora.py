@@ -1,5 +1,7 @@
 """Adapter for Lexora LLM service."""
 
+import json
+from collections.abc import AsyncGenerator
 from typing import Any
 
 import httpx
@@ -71,6 +73,109 @@ class LexoraAdapter(BaseAdapter):
             return choices[0].get("text", "")
         return ""
 
+    async def generate_batch(
+        self,
+        prompts: list[str],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        model: str = "Qwen2.5-1.5B",
+        **kwargs: Any,
+    ) -> list[str]:
+        """Generate text for several prompts in one request.
+
+        Args:
+            prompts: Input prompts for generation.
+            max_tokens: Maximum tokens to generate per prompt.
+            temperature: Sampling temperature (0.0-1.0).
+            model: Model to use (default: Qwen2.5-1.5B for fast responses).
+            **kwargs: Additional generation parameters.
+
+        Returns:
+            Generated texts, in prompt order.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+            ValueError: If the response does not have exactly one choice per
+                prompt (e.g., a server that ignores all but the first prompt).
+        """
+        # The OpenAI-compatible /v1/completions endpoint accepts a prompt list
+        payload = {
+            "model": model,
+            "prompt": prompts,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            **kwargs,
+        }
+
+        logger.info(
+            "Generating text batch", batch_size=len(prompts), max_tokens=max_tokens, model=model
+        )
+        response = await self._post("/v1/completions", json=payload)
+        result = response.json()
+
+        # OpenAI format: {"choices": [{"index": 0, "text": "..."}, ...]}
+        choices = result.get("choices", [])
+        texts: dict[int, str] = {}
+        for choice in choices:
+            index = choice.get("index")
+            if isinstance(index, int) and 0 <= index < len(prompts):
+                texts[index] = choice.get("text", "")
+        if len(choices) != len(prompts) or len(texts) != len(prompts):
+            raise ValueError(
+                f"Expected {len(prompts)} choices with distinct indices, got {len(choices)}"
+            )
+        return [texts[i] for i in range(len(prompts))]
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        model: str = "Qwen2.5-1.5B",
+        **kwargs: Any,
+    ) -> AsyncGenerator[str, None]:
+        """Generate text using the LLM, yielding chunks as they arrive.
+
+        Closing the iterator early (e.g., once enough output has been
+        received) closes the response and stops generation.
+
+        Args:
+            prompt: Input prompt for generation.
+            max_tokens: Maximum tokens to generate.
+            temperature: Sampling temperature (0.0-1.0).
+            model: Model to use (default: Qwen2.5-1.5B for fast responses).
+            **kwargs: Additional generation parameters.
+
+        Yields:
+            Generated text chunks.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        # OpenAI-compatible /v1/completions endpoint with server-sent events
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            **kwargs,
+        }
+
+        logger.info("Streaming text", prompt_length=len(prompt), max_tokens=max_tokens, model=model)
+        async with self.client.stream("POST", "/v1/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                # OpenAI format: {"choices": [{"text": "..."}]}
+                choices = json.loads(data).get("choices", [])
+                if choices and (text := choices[0].get("text")):
+                    yield text
+
     async def chat(
         self,
         messages: list[dict[str, str]],
@@ -114,6 +219,61 @@ class LexoraAdapter(BaseAdapter):
             return message.get("content", "")
         return ""
 
+    async def chat_stream(
+        self,
+        messages: list[dict[str, str]],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        model: str = "Qwen2.5-1.5B",
+        **kwargs: Any,
+    ) -> AsyncGenerator[str, None]:
+        """Chat with the LLM, yielding response chunks as they arrive.
+
+        Closing the iterator early (e.g., once enough output has been
+        received) closes the response and stops generation.
+
+        Args:
+            messages: List of chat messages with 'role' and 'content'.
+            max_tokens: Maximum tokens to generate.
+            temperature: Sampling temperature (0.0-1.0).
+            model: Model to use (default: Qwen2.5-1.5B for fast responses).
+            **kwargs: Additional chat parameters.
+
+        Yields:
+            Assistant response text chunks.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        # OpenAI-compatible /v1/chat/completions endpoint with server-sent events
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            **kwargs,
+        }
+
+        logger.info(
+            "Streaming chat request",
+            message_count=len(messages),
+            max_tokens=max_tokens,
+            model=model,
+        )
+        async with self.client.stream("POST", "/v1/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                # OpenAI format: {"choices": [{"delta": {"content": "..."}}]}
+                choices = json.loads(data).get("choices", [])
+                if choices and (text := choices[0].get("delta", {}).get("content")):
+                    yield text
+
     async def analyze_intent(
         self,
         query: str,
@@ -70,15 +70,26 @@ class MCPBaseAdapter(ABC):
         async with self._get_session() as session:
             logger.debug("Calling MCP tool", tool=name, arguments=arguments)
             result = await session.call_tool(name, arguments)
+            return self._extract_content(result)
 
-            # Extract text content from result
-            if result.content:
-                for content in result.content:
-                    if hasattr(content, "text"):
-                        return content.text
-                return result.content[0] if result.content else None
+    @staticmethod
+    def _extract_content(result: Any) -> Any:
+        """Extract the content of an MCP tool result.
 
-            return None
+        Args:
+            result: CallToolResult from the MCP session.
+
+        Returns:
+            The first text content, the first content item if none is text,
+            or None for an empty result.
+        """
+        if result.content:
+            for content in result.content:
+                if hasattr(content, "text"):
+                    return content.text
+            return result.content[0]
+
+        return None
 
     async def list_tools(self) -> list[str]:
         """List available tools.
@@ -177,6 +188,33 @@ class MCPBaseAdapter(ABC):
                 results.append(await self.call_tool(name, args))
             return results
 
+    async def batch_call_in_session(
+        self,
+        operations: list[tuple[str, dict[str, Any]]],
+    ) -> list[Any]:
+        """Execute multiple tool calls concurrently over a single MCP session.
+
+        Unlike batch_call, which opens a session per call, this pays the
+        connection and initialization cost once for the whole batch.
+
+        Args:
+            operations: List of (tool_name, arguments) tuples.
+
+        Returns:
+            List of results in the same order as operations. A failed call
+            yields its Exception in place of the result.
+        """
+        async with self._get_session() as session:
+
+            async def call(name: str, arguments: dict[str, Any]) -> Any:
+                logger.debug("Calling MCP tool", tool=name, arguments=arguments)
+                return self._extract_content(await session.call_tool(name, arguments))
+
+            return await asyncio.gather(
+                *(call(name, args) for name, args in operations),
+                return_exceptions=True,
+            )
+
     @abstractmethod
     async def health_check(self) -> bool:
         """Check if the service is healthy.
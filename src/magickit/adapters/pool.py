@@ -0,0 +1,48 @@
+"""Shared adapter instances for reuse across tool calls."""
+
+from typing import Any, TypeVar
+
+from magickit.adapters.base import BaseAdapter
+from magickit.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+AdapterT = TypeVar("AdapterT")
+
+# Adapter instances keyed by (adapter class, service URL, timeout)
+_pool: dict[tuple[type[Any], str, float], Any] = {}
+
+
+def get_adapter(adapter_cls: type[AdapterT], url: str, timeout: float) -> AdapterT:
+    """Get a pooled adapter instance, creating it on first use.
+
+    Reusing the instance keeps the underlying HTTP connection pool warm
+    instead of paying a new connection setup on every tool call.
+
+    Args:
+        adapter_cls: Adapter class (e.g., PrismindAdapter, LexoraAdapter).
+        url: Service URL (base URL or SSE URL depending on the adapter).
+        timeout: Request timeout in seconds.
+
+    Returns:
+        Shared adapter instance.
+    """
+    key = (adapter_cls, url, timeout)
+    adapter = _pool.get(key)
+    if adapter is None:
+        adapter = adapter_cls(url, timeout)  # type: ignore[call-arg]
+        _pool[key] = adapter
+        logger.debug("Adapter created", adapter=type(adapter).__name__, url=url)
+    return adapter
+
+
+async def close_adapters() -> None:
+    """Close all pooled adapters and clear the pool."""
+    adapters = list(_pool.values())
+    _pool.clear()
+    for adapter in adapters:
+        if isinstance(adapter, BaseAdapter):
+            try:
+                await adapter.close()
+            except Exception as e:
+                logger.warning("Failed to close adapter", error=str(e))
@@ -613,6 +613,67 @@ class PrismindAdapter(MCPBaseAdapter):
         Returns:
             Dict with success status and knowledge_id
         """
+        arguments = self._knowledge_arguments(content, category, project, tags, source, user)
+
+        logger.info("Adding knowledge via MCP", content_length=len(content))
+
+        success, result = await self._call_tool_safe("add_knowledge", arguments)
+        if not success:
+            raise RuntimeError(f"add_knowledge failed: {result}")
+
+        return self._parse_json_result(result)
+
+    async def add_knowledge_bulk(
+        self,
+        entries: list[dict[str, Any]],
+        project: str = "",
+        user: str = "",
+    ) -> list[dict[str, Any] | Exception]:
+        """Add several knowledge entries over a single MCP session.
+
+        Args:
+            entries: Entries with "content" and optional "category", "tags"
+                and "source" keys.
+            project: Project ID applied to every entry.
+            user: User identifier for multi-user support.
+
+        Returns:
+            Per-entry result dicts in input order. A failed entry yields its
+            Exception instead.
+        """
+        operations = [
+            (
+                "add_knowledge",
+                self._knowledge_arguments(
+                    entry["content"],
+                    entry.get("category", ""),
+                    project,
+                    entry.get("tags"),
+                    entry.get("source", ""),
+                    user,
+                ),
+            )
+            for entry in entries
+        ]
+
+        logger.info("Adding knowledge entries via MCP", count=len(entries))
+
+        results = await self.batch_call_in_session(operations)
+        return [
+            result if isinstance(result, Exception) else self._parse_json_result(result)
+            for result in results
+        ]
+
+    @staticmethod
+    def _knowledge_arguments(
+        content: str,
+        category: str,
+        project: str,
+        tags: list[str] | None,
+        source: str,
+        user: str,
+    ) -> dict[str, Any]:
+        """Build add_knowledge tool arguments, omitting empty values."""
         arguments: dict[str, Any] = {"content": content}
         if user:
             arguments["user"] = user
@@ -624,14 +685,7 @@ class PrismindAdapter(MCPBaseAdapter):
             arguments["tags"] = tags
         if source:
             arguments["source"] = source
-
-        logger.info("Adding knowledge via MCP", content_length=len(content))
-
-        success, result = await self._call_tool_safe("add_knowledge", arguments)
-        if not success:
-            raise RuntimeError(f"add_knowledge failed: {result}")
-
-        return self._parse_json_result(result)
+        return arguments
 
     # === Session management methods ===
 
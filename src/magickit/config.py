@@ -59,6 +59,13 @@ class Settings(BaseSettings):
 
     prismind_url: str = Field(default="http://localhost:8002")
     prismind_timeout: float = Field(default=30.0)
+    # Embedding model used by Prismind; cached semantic matches are keyed by it
+    embedding_model_version: str = Field(default="bge-m3")
+
+    # Max concurrent workflow steps per service
+    lexora_max_concurrent: int = Field(default=8)
+    cognilens_max_concurrent: int = Field(default=8)
+    prismind_max_concurrent: int = Field(default=8)
 
     unrealwise_url: str = Field(default="http://localhost:8005")
     unrealwise_timeout: float = Field(default=60.0)
@@ -95,6 +102,11 @@ class Settings(BaseSettings):
     # Project archive settings
     archive_path: str = Field(default="data/archives")
 
+    # Cache settings (persisted LLM/RAG results)
+    cache_dir: str = Field(default="data/cache")
+    # In-memory cache of recent RAG searches in generate_with_context
+    rag_cache_enabled: bool = Field(default=True)
+
     @classmethod
     def from_yaml(cls, config_path: str | Path) -> "Settings":
         """Load settings from a YAML config file.
@@ -127,6 +139,7 @@ class Settings(BaseSettings):
                 if cfg:
                     flat_config[f"{name}_url"] = cfg.get("url")
                     flat_config[f"{name}_timeout"] = cfg.get("timeout")
+                    flat_config[f"{name}_max_concurrent"] = cfg.get("max_concurrent")
 
         # Database settings
         if database := yaml_config.get("database"):
@@ -172,6 +185,11 @@ class Settings(BaseSettings):
         if archive := yaml_config.get("archive"):
             flat_config["archive_path"] = archive.get("path")
 
+        # Cache settings
+        if cache := yaml_config.get("cache"):
+            flat_config["cache_dir"] = cache.get("dir")
+            flat_config["rag_cache_enabled"] = cache.get("rag_enabled")
+
         # Remove None values
         flat_config = {k: v for k, v in flat_config.items() if v is not None}
 
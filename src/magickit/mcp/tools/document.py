@@ -6,15 +6,27 @@ using RAG-based semantic matching and LLM-based metadata generation.
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import copy
 import json
 import re
+import string
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from pathlib import Path
 from typing import Any
 
+import httpx
 from fastmcp import FastMCP
 
 from magickit.adapters.lexora import LexoraAdapter
+from magickit.adapters.pool import get_adapter
 from magickit.adapters.prismind import PrismindAdapter
 from magickit.config import Settings
+from magickit.utils import fastjson
+from magickit.utils.cache import PersistentAsyncCache
 from magickit.utils.logging import get_logger
 from magickit.utils.user import get_current_user
 
@@ -27,6 +39,104 @@ _settings: Settings | None = None
 # BGE-M3 embeddings typically return scores in 0.5-0.7 range for semantic matches
 DEFAULT_SIMILARITY_THRESHOLD = 0.45
 
+# Maximum concurrent Prismind calls in smart_create_documents
+BULK_CONCURRENCY = 8
+
+# Fields every smart_create_documents item must provide
+_BULK_REQUIRED_FIELDS = ("name", "doc_type", "content", "phase_task")
+
+# Byte budget for the content preview sent to the LLM (CJK text is ~3 bytes/char)
+CONTENT_PREVIEW_MAX_BYTES = 512
+
+# Generation cap for type metadata; the expected JSON object is ~60 tokens
+TYPE_METADATA_MAX_TOKENS = 120
+
+# Registered type IDs per Prismind SSE URL, as (fetched_at, type_ids)
+TYPE_LIST_TTL_SECONDS = 60.0
+_type_ids_cache: dict[str, tuple[float, set[str]]] = {}
+
+# Persistent memo of positive semantic matches, namespaced by embedding model.
+# Set up in register_tools; invalidated whenever a new type is registered.
+# Entries expire after SEMANTIC_MATCH_TTL_SECONDS and are dropped when the
+# matched type no longer exists.
+SEMANTIC_MATCH_TTL_SECONDS = 86400.0
+_semantic_match_memo: PersistentAsyncCache | None = None
+
+# In-flight unknown-type resolutions, keyed by doc_type (single-flight)
+_inflight_resolutions: dict[str, asyncio.Future[dict[str, Any]]] = {}
+
+# Characters allowed in a normalized type_id
+_TYPE_ID_KEEP = frozenset(string.ascii_lowercase + string.digits + "_")
+
+# Control characters that break JSON parsing of LLM responses
+_CTRL_CHARS_RE = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+
+# Shared decoder for extracting the first JSON object from LLM responses
+_JSON_DECODER = json.JSONDecoder()
+
+# Prompt prefixes for type metadata generation. Everything dynamic goes into
+# the JSON block appended after the INPUT sentinel.
+_TYPE_METADATA_INSTRUCTIONS = """You are a document type metadata generator.
+
+Generate metadata for the NEW document type described in the INPUT below.
+
+【CRITICAL】
+The type_id MUST be the INPUT "type_id" exactly (already normalized).
+
+【Requirements】
+- type_id: Use the INPUT "type_id" exactly
+- name: Human-readable display name for the INPUT "doc_type_name"
+- folder_name: English only, PascalCase (e.g., "MeetingNotes", "APISpecs")
+- description: Brief description (1 sentence)
+- The INPUT "content_preview" is for context only
+
+【Output Format】JSON only, no explanation.
+{
+    "type_id": "meeting_notes",
+    "name": "Meeting Notes",
+    "folder_name": "MeetingNotes",
+    "description": "Records of meeting discussions and decisions"
+}
+
+--- INPUT ---
+"""
+
+_TYPE_METADATA_INSTRUCTIONS_NON_ASCII = """You are a document type metadata generator.
+
+Generate metadata for the NEW document type described in the INPUT below
+(translate the INPUT "doc_type_name" to English).
+
+【CRITICAL】
+Generate an appropriate English type_id based on the meaning of the INPUT "doc_type_name".
+type_id MUST be lowercase ASCII English with underscores only.
+
+【Requirements】
+- type_id: Lowercase English with underscores (e.g., meeting_notes, api_spec)
+- name: Human-readable display name (can be Japanese)
+- folder_name: English only, PascalCase (e.g., "MeetingNotes", "APISpecs")
+- description: Brief description (1 sentence)
+- The INPUT "content_preview" is for context only
+
+【Examples】
+- "議事録" → type_id: "meeting_notes"
+- "設計書" → type_id: "design"
+- "仕様書" → type_id: "specification"
+
+【Output Format】JSON only, no explanation.
+{
+    "type_id": "meeting_notes",
+    "name": "議事録",
+    "folder_name": "MeetingNotes",
+    "description": "Records of meeting discussions and decisions"
+}
+
+--- INPUT ---
+"""
+
+# LRU cache of LLM-generated type metadata, keyed by casefolded type name
+METADATA_CACHE_SIZE = 256
+_metadata_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
 
 def _parse_result(result: Any) -> dict[str, Any]:
     """Parse MCP tool result to dict.
@@ -37,13 +147,13 @@ def _parse_result(result: Any) -> dict[str, Any]:
     Returns:
         Parsed dict, or empty dict if parsing fails.
     """
-    if result is None:
-        return {}
     if isinstance(result, dict):
         return result
+    if result is None:
+        return {}
     if isinstance(result, str):
         try:
-            data = json.loads(result)
+            data = fastjson.loads(result)
             if isinstance(data, dict):
                 return data
             return {"result": data}
@@ -52,9 +162,229 @@ def _parse_result(result: Any) -> dict[str, Any]:
     return {"result": result}
 
 
+def _get_prismind(settings: Settings) -> PrismindAdapter:
+    """Get the shared Prismind adapter."""
+    return get_adapter(PrismindAdapter, settings.prismind_url, settings.prismind_timeout)
+
+
+def _get_lexora(settings: Settings) -> LexoraAdapter:
+    """Get the shared Lexora adapter."""
+    return get_adapter(LexoraAdapter, settings.lexora_url, settings.lexora_timeout)
+
+
+def _normalize_type_id(doc_type_name: str) -> str:
+    """Normalize a document type name to the type_id format.
+
+    Lowercases the name, replaces hyphens and spaces with underscores, and
+    keeps only ASCII alphanumeric characters and underscores.
+
+    Args:
+        doc_type_name: The document type name to normalize.
+
+    Returns:
+        Normalized type_id (empty for non-ASCII input such as Japanese).
+    """
+    normalized = doc_type_name.lower().replace("-", "_").replace(" ", "_")
+    return "".join(c for c in normalized if c in _TYPE_ID_KEEP)
+
+
+def _metadata_cache_key(doc_type_name: str) -> str:
+    """Build the metadata cache key for a document type name."""
+    return doc_type_name.strip().casefold()
+
+
+def _get_cached_metadata(doc_type_name: str) -> dict[str, Any] | None:
+    """Get cached type metadata, marking it as recently used.
+
+    Args:
+        doc_type_name: The document type name.
+
+    Returns:
+        A copy of the cached metadata, or None if not cached.
+    """
+    key = _metadata_cache_key(doc_type_name)
+    metadata = _metadata_cache.get(key)
+    if metadata is None:
+        return None
+    _metadata_cache.move_to_end(key)
+    return copy.deepcopy(metadata)
+
+
+def _store_cached_metadata(doc_type_name: str, metadata: dict[str, Any]) -> None:
+    """Store type metadata in the LRU cache, evicting the oldest entries.
+
+    Args:
+        doc_type_name: The document type name.
+        metadata: Validated metadata generated by the LLM.
+    """
+    key = _metadata_cache_key(doc_type_name)
+    _metadata_cache[key] = copy.deepcopy(metadata)
+    _metadata_cache.move_to_end(key)
+    while len(_metadata_cache) > METADATA_CACHE_SIZE:
+        _metadata_cache.popitem(last=False)
+
+
+def _load_metadata_cache(path: Path) -> None:
+    """Load persisted type metadata into the cache.
+
+    Args:
+        path: JSON file written by _save_metadata_cache.
+    """
+    if not path.exists():
+        return
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("Failed to load type metadata cache", path=str(path), error=str(e))
+        return
+    if isinstance(data, dict):
+        for key, metadata in list(data.items())[-METADATA_CACHE_SIZE:]:
+            if isinstance(metadata, dict):
+                _metadata_cache[key] = metadata
+    logger.debug("Type metadata cache loaded", entries=len(_metadata_cache))
+
+
+def _save_metadata_cache(path: Path) -> None:
+    """Persist the type metadata cache so it survives restarts.
+
+    Args:
+        path: Destination JSON file.
+    """
+    if not _metadata_cache:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(_metadata_cache, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+    except OSError as e:
+        logger.warning("Failed to save type metadata cache", path=str(path), error=str(e))
+
+
+def _truncate_utf8(text: str, max_bytes: int = CONTENT_PREVIEW_MAX_BYTES) -> str:
+    """Truncate text to a UTF-8 byte budget at a codepoint boundary.
+
+    Args:
+        text: Text to truncate.
+        max_bytes: Maximum size of the encoded result.
+
+    Returns:
+        Truncated text.
+    """
+    return text.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def _parse_metadata_response(response: str) -> dict[str, Any]:
+    """Parse the JSON object from a complete type metadata LLM response.
+
+    Args:
+        response: Raw LLM response text.
+
+    Returns:
+        Parsed JSON object.
+
+    Raises:
+        ValueError: If no JSON object can be parsed.
+    """
+    response = response.strip()
+    try:
+        return _extract_json_object(response)
+    except ValueError:
+        fence_idx = response.find("```")
+        if fence_idx < 0:
+            raise
+        # Retry from the code fence (prose before it may contain braces)
+        return _extract_json_object(response[fence_idx + 3:])
+
+
+async def _request_type_metadata(lexora: LexoraAdapter, prompt: str) -> dict[str, Any]:
+    """Ask the LLM for type metadata and parse the JSON object it returns.
+
+    Streams the response and stops as soon as a complete JSON object has been
+    received, so trailing explanations are never generated. Falls back to a
+    regular completion if streaming fails or yields no JSON object (e.g., a
+    server that ignores "stream" and sends a plain body).
+
+    Args:
+        lexora: Lexora adapter instance.
+        prompt: Type metadata prompt.
+
+    Returns:
+        Parsed JSON object.
+
+    Raises:
+        ValueError: If no JSON object can be parsed.
+    """
+    chunks: list[str] = []
+    try:
+        async with aclosing(
+            lexora.stream(
+                prompt=prompt,
+                max_tokens=TYPE_METADATA_MAX_TOKENS,
+                temperature=0.3,
+            )
+        ) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if "}" in chunk:
+                    try:
+                        return _extract_json_object("".join(chunks))
+                    except ValueError:
+                        continue
+        return _parse_metadata_response("".join(chunks))
+    except (httpx.HTTPError, ValueError) as e:
+        logger.debug("Lexora streaming failed, using regular completion", error=str(e))
+
+    response = await lexora.generate(
+        prompt=prompt,
+        max_tokens=TYPE_METADATA_MAX_TOKENS,
+        temperature=0.3,
+    )
+    return _parse_metadata_response(response)
+
+
+def _extract_json_object(response: str) -> dict[str, Any]:
+    """Extract the first JSON object from an LLM response.
+
+    Args:
+        response: Raw LLM response text.
+
+    Returns:
+        The first JSON object found in the response.
+
+    Raises:
+        ValueError: If no JSON object is found.
+        json.JSONDecodeError: If the JSON object cannot be parsed.
+    """
+    start_idx = response.find("{")
+    if start_idx < 0:
+        raise ValueError(f"No valid JSON found in Lexora response: {response[:200]}")
+
+    # Common case: the response is exactly one JSON object
+    if response.endswith("}"):
+        try:
+            result = fastjson.loads(response[start_idx:])
+            if isinstance(result, dict):
+                return result
+        except json.JSONDecodeError:
+            pass
+
+    # Otherwise parse only the first object and ignore any trailing text
+    try:
+        result, _ = _JSON_DECODER.raw_decode(response, start_idx)
+    except json.JSONDecodeError:
+        # Try to fix common issues
+        response_clean = _CTRL_CHARS_RE.sub("", response)
+        result, _ = _JSON_DECODER.raw_decode(response_clean, response_clean.find("{"))
+
+    return result
+
+
 async def _find_matching_document_type(
     prismind: PrismindAdapter,
     doc_type_name: str,
+    existing_type_ids: set[str],
     threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
 ) -> dict[str, Any] | None:
     """Find a semantically similar document type using RAG-based search.
@@ -65,6 +395,8 @@ async def _find_matching_document_type(
     Args:
         prismind: Prismind adapter instance.
         doc_type_name: The document type name to search for.
+        existing_type_ids: IDs of registered types. A memoized match to a
+            type that is not among them is discarded.
         threshold: Minimum similarity score (0.0-1.0).
 
     Returns:
@@ -74,6 +406,32 @@ async def _find_matching_document_type(
         - matched_name: The matched type name
         - similarity: Similarity score
     """
+    memo_key = f"{threshold}:{doc_type_name.strip()}"
+    if _semantic_match_memo is not None:
+        try:
+            memoized = await _semantic_match_memo.get(memo_key)
+        except Exception as e:
+            logger.warning("Semantic match memo lookup failed", error=str(e))
+            memoized = None
+        if isinstance(memoized, dict) and isinstance(memoized.get("match"), dict):
+            match: dict[str, Any] = memoized["match"]
+            if (
+                time.time() - memoized.get("ts", 0.0) < SEMANTIC_MATCH_TTL_SECONDS
+                and match.get("matched_type_id") in existing_type_ids
+            ):
+                logger.debug(
+                    "Using memoized semantic match",
+                    doc_type_name=doc_type_name,
+                    matched_type_id=match["matched_type_id"],
+                )
+                return match
+        if memoized is not None:
+            # Expired, stale (the matched type was deleted) or in an old format
+            try:
+                await _semantic_match_memo.delete(memo_key)
+            except Exception as e:
+                logger.warning("Failed to drop stale semantic match", error=str(e))
+
     logger.info(
         "Searching for similar document type (RAG-based)",
         doc_type_name=doc_type_name,
@@ -93,12 +451,20 @@ async def _find_matching_document_type(
                 matched_type_id=result.get("type_id"),
                 similarity=result.get("similarity", 0.0),
             )
-            return {
+            match = {
                 "use_existing": True,
                 "matched_type_id": result["type_id"],
                 "matched_name": result.get("name", ""),
                 "similarity": result.get("similarity", 0.0),
             }
+            if _semantic_match_memo is not None:
+                try:
+                    await _semantic_match_memo.set(
+                        memo_key, {"ts": time.time(), "match": match}
+                    )
+                except Exception as e:
+                    logger.warning("Failed to memoize semantic match", error=str(e))
+            return match
 
         logger.debug(
             "No semantic match found for document type",
@@ -133,71 +499,30 @@ async def _generate_new_type_metadata(
     Returns:
         Dict containing type_id, name, folder_name, description.
     """
+    # The required fields are determined by the type name alone, so identical
+    # names (common in bulk imports) reuse the earlier LLM result
+    cached = _get_cached_metadata(doc_type_name)
+    if cached is not None:
+        logger.debug("Using cached document type metadata", doc_type_name=doc_type_name)
+        return cached
+
     # Normalize the doc_type_name to a valid type_id format (ASCII only)
-    normalized_type_id = doc_type_name.lower().replace("-", "_").replace(" ", "_")
-    # Keep only ASCII alphanumeric characters and underscore
-    normalized_type_id = "".join(
-        c for c in normalized_type_id if c.isascii() and (c.isalnum() or c == "_")
-    )
+    normalized_type_id = _normalize_type_id(doc_type_name)
 
     # If normalized_type_id is empty (e.g., Japanese input), let LLM generate it
     has_valid_type_id = bool(normalized_type_id)
 
+    # Static instructions first, dynamic values last, so the LLM server can
+    # reuse the cached prompt prefix across calls
+    input_data: dict[str, str] = {"doc_type_name": doc_type_name}
     if has_valid_type_id:
-        prompt = f"""You are a document type metadata generator.
-
-Generate metadata for a NEW document type named "{doc_type_name}".
-
-【CRITICAL】
-The type_id MUST be "{normalized_type_id}" exactly (already normalized).
-
-【Document Content Preview (for context only)】
-{content_preview[:300]}
-
-【Requirements】
-- type_id: Use "{normalized_type_id}" exactly
-- name: Human-readable display name for "{doc_type_name}"
-- folder_name: English only, PascalCase (e.g., "MeetingNotes", "APISpecs")
-- description: Brief description (1 sentence)
-
-【Output Format】JSON only, no explanation.
-{{
-    "type_id": "{normalized_type_id}",
-    "name": "Meeting Notes",
-    "folder_name": "MeetingNotes",
-    "description": "Records of meeting discussions and decisions"
-}}"""
+        input_data["type_id"] = normalized_type_id
+        instructions = _TYPE_METADATA_INSTRUCTIONS
     else:
         # Non-ASCII input (e.g., Japanese) - LLM must generate English type_id
-        prompt = f"""You are a document type metadata generator.
-
-Generate metadata for a NEW document type named "{doc_type_name}" (translate to English).
-
-【CRITICAL】
-Generate an appropriate English type_id based on the meaning of "{doc_type_name}".
-type_id MUST be lowercase ASCII English with underscores only.
-
-【Document Content Preview (for context only)】
-{content_preview[:300]}
-
-【Requirements】
-- type_id: Lowercase English with underscores (e.g., meeting_notes, api_spec)
-- name: Human-readable display name (can be Japanese)
-- folder_name: English only, PascalCase (e.g., "MeetingNotes", "APISpecs")
-- description: Brief description (1 sentence)
-
-【Examples】
-- "議事録" → type_id: "meeting_notes"
-- "設計書" → type_id: "design"
-- "仕様書" → type_id: "specification"
-
-【Output Format】JSON only, no explanation.
-{{
-    "type_id": "meeting_notes",
-    "name": "議事録",
-    "folder_name": "MeetingNotes",
-    "description": "Records of meeting discussions and decisions"
-}}"""
+        instructions = _TYPE_METADATA_INSTRUCTIONS_NON_ASCII
+    input_data["content_preview"] = _truncate_utf8(_CTRL_CHARS_RE.sub("", content_preview))
+    prompt = instructions + json.dumps(input_data, ensure_ascii=False, indent=2)
 
     logger.info(
         "Generating new document type metadata with Lexora",
@@ -205,60 +530,20 @@ type_id MUST be lowercase ASCII English with underscores only.
     )
 
     try:
-        response = await lexora.generate(
-            prompt=prompt,
-            max_tokens=200,
-            temperature=0.3,
-        )
-
-        # Parse JSON from response
-        response = response.strip()
-        if response.startswith("```"):
-            # Remove markdown code blocks
-            lines = response.split("\n")
-            json_lines = []
-            in_json = False
-            for line in lines:
-                if line.startswith("```"):
-                    in_json = not in_json
-                    continue
-                if in_json or (not line.startswith("```") and "{" in line):
-                    json_lines.append(line)
-            response = "\n".join(json_lines)
-
-        # Find first complete JSON object in response
-        start_idx = response.find("{")
-        if start_idx >= 0:
-            # Find matching closing brace for the first opening brace
-            depth = 0
-            end_idx = start_idx
-            for i, char in enumerate(response[start_idx:], start_idx):
-                if char == "{":
-                    depth += 1
-                elif char == "}":
-                    depth -= 1
-                    if depth == 0:
-                        end_idx = i + 1
-                        break
-
-            if end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                logger.debug("Extracted JSON string", json_str=json_str[:200])
+        result = await _request_type_metadata(lexora, prompt)
 
-                try:
-                    result = json.loads(json_str)
-                except json.JSONDecodeError:
-                    # Try to fix common issues
-                    json_str_clean = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_str)
-                    result = json.loads(json_str_clean)
+        logger.debug("Extracted JSON metadata", result=str(result)[:200])
 
-                # Validate required fields
-                if not all(k in result for k in ["type_id", "name", "folder_name"]):
-                    raise ValueError(f"Missing required fields in metadata: {result}")
+        # Validate required fields
+        if not all(k in result for k in ["type_id", "name", "folder_name"]):
+            raise ValueError(f"Missing required fields in metadata: {result}")
 
-                return result
+        if has_valid_type_id:
+            # The example in the static prompt must not leak into the result
+            result["type_id"] = normalized_type_id
 
-        raise ValueError(f"No valid JSON found in Lexora response: {response[:200]}")
+        _store_cached_metadata(doc_type_name, result)
+        return result
 
     except json.JSONDecodeError as e:
         logger.error("Failed to parse Lexora response as JSON", error=str(e))
@@ -268,146 +553,131 @@ type_id MUST be lowercase ASCII English with underscores only.
         raise
 
 
-async def smart_create_document_impl(
-    settings: Settings,
-    name: str,
-    doc_type: str,
-    content: str,
-    phase_task: str,
-    project: str = "",
-    feature: str = "",
-    keywords: list[str] | None = None,
-    auto_register_type: bool = True,
-    user: str = "",
-) -> dict[str, Any]:
-    """Smart document creation that handles unknown document types.
-
-    This is the shared implementation used by both the MCP tool and
-    orchestrate_workflow's create_document action.
+async def _list_existing_type_ids(prismind: PrismindAdapter) -> set[str]:
+    """Get the IDs of all registered document types.
 
-    When an unknown doc_type is provided, this function:
-    1. Uses RAG semantic search (BGE-M3) to find similar existing types
-    2. If a match is found (e.g., "api仕様" ≈ "api_spec"), uses existing type
-    3. If no match, uses LLM to generate metadata for a new type
+    Results are cached per Prismind server for TYPE_LIST_TTL_SECONDS, so
+    documents with a known type cost a single create_document call.
 
     Args:
-        settings: Application settings.
-        name: Document name.
-        doc_type: Document type (can be unregistered).
-        content: Document content.
-        phase_task: Phase-task ID.
-        project: Project identifier.
-        feature: Feature name.
-        keywords: Search keywords.
-        auto_register_type: Whether to auto-register unknown types.
-        user: User identifier for multi-user support.
+        prismind: Prismind adapter instance.
 
     Returns:
-        Dict containing:
-        - success: Whether creation succeeded
-        - doc_id: Document ID
-        - doc_url: Document URL
-        - doc_type: Used document type (may differ from input if matched existing)
-        - type_registered: Whether a new type was registered
-        - registered_type: Details of registered type (if any)
-        - matched_existing: Whether an existing type was matched semantically
-        - message: Status message
+        Set of existing type IDs (empty if listing fails). Types registered
+        through this module are added to the cached set.
     """
-    # Auto-detect user if not specified
-    effective_user = user or get_current_user()
-
-    prismind = PrismindAdapter(
-        sse_url=settings.prismind_url,
-        timeout=settings.prismind_timeout,
-    )
-
-    type_registered = False
-    registered_type = None
-    matched_existing = False  # True if semantic match found existing type
-
-    logger.info(
-        "Smart document creation",
-        name=name,
-        doc_type=doc_type,
-        project=project,
-    )
+    cached = _type_ids_cache.get(prismind.sse_url)
+    if cached is not None and time.monotonic() - cached[0] < TYPE_LIST_TTL_SECONDS:
+        return cached[1]
 
-    # Step 1: Get existing document types to check for exact match
     try:
         types_result_raw = await prismind.list_document_types()
         types_result = _parse_result(types_result_raw)
         existing_types = types_result.get("document_types", [])
     except Exception as e:
         logger.warning("Failed to list document types, assuming none", error=str(e))
-        existing_types = []
+        return set()
 
-    # Step 2: Check if doc_type exists (exact match)
-    existing_type_ids = [t.get("type_id", "") for t in existing_types]
-    type_exists = doc_type in existing_type_ids
+    existing_type_ids = {type_id for t in existing_types if (type_id := t.get("type_id"))}
+    _type_ids_cache[prismind.sse_url] = (time.monotonic(), existing_type_ids)
+    return existing_type_ids
 
-    logger.debug(
-        "Document type check",
-        doc_type=doc_type,
-        type_exists=type_exists,
-        existing_count=len(existing_types),
-    )
 
-    # Step 3: If type doesn't exist and auto_register is enabled, try semantic match
-    if not type_exists and auto_register_type:
-        try:
-            # Step 3a: Try RAG-based semantic matching first
-            semantic_match = await _find_matching_document_type(
-                prismind=prismind,
+async def _type_registered_concurrently(prismind: PrismindAdapter, type_id: str) -> bool:
+    """Check whether a type whose registration failed exists after all.
+
+    Registration fails when another worker registered the same type first;
+    in that case the type is usable, so registration is effectively
+    idempotent.
+
+    Args:
+        prismind: Prismind adapter instance.
+        type_id: Type ID whose registration failed.
+
+    Returns:
+        True if the type is now registered.
+    """
+    _type_ids_cache.pop(prismind.sse_url, None)
+    return type_id in await _list_existing_type_ids(prismind)
+
+
+async def _match_or_register_type(
+    settings: Settings,
+    prismind: PrismindAdapter,
+    doc_type: str,
+    content: str,
+    existing_type_ids: set[str],
+) -> dict[str, Any]:
+    """Match an unknown document type semantically, or register it as new.
+
+    Args:
+        settings: Application settings.
+        prismind: Prismind adapter instance.
+        doc_type: Unregistered document type name.
+        content: Document content (used as context for new type metadata).
+        existing_type_ids: IDs of registered types. A newly registered type
+            is added to this set.
+
+    Returns:
+        Dict in the _resolve_document_type result format.
+    """
+    type_registered = False
+    registered_type = None
+    matched_existing = False
+
+    try:
+        # Try RAG-based semantic matching first
+        semantic_match = await _find_matching_document_type(
+            prismind=prismind,
+            doc_type_name=doc_type,
+            existing_type_ids=existing_type_ids,
+            threshold=DEFAULT_SIMILARITY_THRESHOLD,
+        )
+
+        if semantic_match:
+            # Found a semantic match - use existing type
+            matched_type_id = semantic_match["matched_type_id"]
+            original_type = doc_type
+            doc_type = matched_type_id
+            matched_existing = True
+            logger.info(
+                "Using existing document type (RAG semantic match)",
+                original_type=original_type,
+                matched_type_id=matched_type_id,
+                similarity=semantic_match.get("similarity", 0.0),
+            )
+            # No registration needed, type already exists
+        else:
+            # No semantic match - generate metadata for new type
+            lexora = _get_lexora(settings)
+
+            new_type_metadata = await _generate_new_type_metadata(
+                lexora=lexora,
                 doc_type_name=doc_type,
-                threshold=DEFAULT_SIMILARITY_THRESHOLD,
+                content_preview=content,
             )
 
-            if semantic_match:
-                # Found a semantic match - use existing type
-                matched_type_id = semantic_match["matched_type_id"]
+            # Check if generated type_id already exists
+            if new_type_metadata.get("type_id") in existing_type_ids:
+                # LLM generated same ID as existing - use existing type
+                matched_type_id = new_type_metadata["type_id"]
                 original_type = doc_type
                 doc_type = matched_type_id
                 matched_existing = True
                 logger.info(
-                    "Using existing document type (RAG semantic match)",
+                    "Using existing document type (generated type_id match)",
                     original_type=original_type,
                     matched_type_id=matched_type_id,
-                    similarity=semantic_match.get("similarity", 0.0),
                 )
-                # No registration needed, type already exists
             else:
-                # Step 3b: No semantic match - generate metadata for new type
-                lexora = LexoraAdapter(
-                    base_url=settings.lexora_url,
-                    timeout=settings.lexora_timeout,
-                )
-
-                new_type_metadata = await _generate_new_type_metadata(
-                    lexora=lexora,
-                    doc_type_name=doc_type,
-                    content_preview=content,
+                # Register the new document type
+                logger.info(
+                    "Registering new document type",
+                    type_id=new_type_metadata.get("type_id"),
+                    folder_name=new_type_metadata.get("folder_name"),
                 )
 
-                # Check if generated type_id already exists
-                if new_type_metadata.get("type_id") in existing_type_ids:
-                    # LLM generated same ID as existing - use existing type
-                    matched_type_id = new_type_metadata["type_id"]
-                    original_type = doc_type
-                    doc_type = matched_type_id
-                    matched_existing = True
-                    logger.info(
-                        "Using existing document type (generated type_id match)",
-                        original_type=original_type,
-                        matched_type_id=matched_type_id,
-                    )
-                else:
-                    # Register the new document type
-                    logger.info(
-                        "Registering new document type",
-                        type_id=new_type_metadata.get("type_id"),
-                        folder_name=new_type_metadata.get("folder_name"),
-                    )
-
+                try:
                     register_result_raw = await prismind.register_document_type(
                         type_id=new_type_metadata["type_id"],
                         name=new_type_metadata["name"],
@@ -417,44 +687,224 @@ async def smart_create_document_impl(
                         create_folder=True,
                     )
                     register_result = _parse_result(register_result_raw)
+                except Exception as e:
+                    register_result = {"success": False, "message": str(e)}
+
+                if register_result.get("success"):
+                    type_registered = True
+                    registered_type = {
+                        "type_id": new_type_metadata["type_id"],
+                        "name": new_type_metadata["name"],
+                        "folder_name": new_type_metadata["folder_name"],
+                        "description": new_type_metadata.get("description", ""),
+                    }
+                    # Use the new type_id for document creation
+                    doc_type = new_type_metadata["type_id"]
+                    existing_type_ids.add(doc_type)
+
+                    # A new type can be a better match for previously memoized names
+                    if _semantic_match_memo is not None:
+                        try:
+                            await _semantic_match_memo.bump_version()
+                        except Exception as e:
+                            logger.warning("Failed to invalidate semantic match memo", error=str(e))
 
-                    if register_result.get("success"):
-                        type_registered = True
-                        registered_type = {
-                            "type_id": new_type_metadata["type_id"],
-                            "name": new_type_metadata["name"],
-                            "folder_name": new_type_metadata["folder_name"],
-                            "description": new_type_metadata.get("description", ""),
-                        }
-                        # Use the new type_id for document creation
-                        doc_type = new_type_metadata["type_id"]
-
-                        logger.info(
-                            "Document type registered",
-                            type_id=doc_type,
-                            folder_name=new_type_metadata["folder_name"],
-                        )
-                    else:
-                        logger.warning(
-                            "Document type registration returned non-success",
-                            result=register_result,
-                        )
+                    logger.info(
+                        "Document type registered",
+                        type_id=doc_type,
+                        folder_name=new_type_metadata["folder_name"],
+                    )
+                elif await _type_registered_concurrently(prismind, new_type_metadata["type_id"]):
+                    # Another worker registered the same type first - use it
+                    doc_type = new_type_metadata["type_id"]
+                    matched_existing = True
+                    existing_type_ids.add(doc_type)
+                    logger.info(
+                        "Using existing document type (registered concurrently)",
+                        type_id=doc_type,
+                    )
+                else:
+                    logger.warning(
+                        "Document type registration returned non-success",
+                        result=register_result,
+                    )
 
-        except Exception as e:
-            logger.error("Failed to match/register document type", error=str(e))
-            if not auto_register_type:
-                return {
-                    "success": False,
-                    "doc_id": "",
-                    "doc_url": "",
-                    "doc_type": doc_type,
-                    "type_registered": False,
-                    "registered_type": None,
-                    "message": f"Document type '{doc_type}' not found and auto-registration failed: {e}",
-                }
-            # Continue with original doc_type, Prismind may handle it
+    except Exception as e:
+        # Continue with original doc_type, Prismind may handle it
+        logger.error("Failed to match/register document type", error=str(e))
+
+    return {
+        "doc_type": doc_type,
+        "type_registered": type_registered,
+        "registered_type": registered_type,
+        "matched_existing": matched_existing,
+    }
+
+
+async def _match_or_register_type_once(
+    settings: Settings,
+    prismind: PrismindAdapter,
+    doc_type: str,
+    content: str,
+    existing_type_ids: set[str],
+) -> dict[str, Any]:
+    """Run _match_or_register_type at most once per doc_type at a time.
+
+    Concurrent calls for the same unknown doc_type (e.g., sibling documents
+    created in parallel) await the in-flight resolution instead of repeating
+    the RAG search, LLM call and registration.
+
+    Args:
+        settings: Application settings.
+        prismind: Prismind adapter instance.
+        doc_type: Unregistered document type name.
+        content: Document content (used as context for new type metadata).
+        existing_type_ids: IDs of registered types.
+
+    Returns:
+        Dict in the _resolve_document_type result format.
+    """
+    inflight = _inflight_resolutions.get(doc_type)
+    if inflight is not None:
+        logger.debug("Awaiting in-flight document type resolution", doc_type=doc_type)
+        try:
+            resolved = await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # The leading call was cancelled - resolve here instead
+        else:
+            if not resolved["type_registered"]:
+                return dict(resolved)
+            # Another call registered the type; for this document it already exists
+            return {
+                **resolved,
+                "type_registered": False,
+                "registered_type": None,
+                "matched_existing": True,
+            }
+
+    future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+    _inflight_resolutions[doc_type] = future
+    try:
+        resolved = await _match_or_register_type(
+            settings=settings,
+            prismind=prismind,
+            doc_type=doc_type,
+            content=content,
+            existing_type_ids=existing_type_ids,
+        )
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        if _inflight_resolutions.get(doc_type) is future:
+            del _inflight_resolutions[doc_type]
+
+    future.set_result(resolved)
+    return resolved
+
+
+async def _resolve_document_type(
+    settings: Settings,
+    prismind: PrismindAdapter,
+    doc_type: str,
+    content: str,
+    existing_type_ids: set[str],
+    auto_register_type: bool = True,
+) -> dict[str, Any]:
+    """Resolve a document type name to a registered document type.
+
+    Checks for an exact or normalized match first, then RAG semantic search,
+    and finally registers a new type with LLM-generated metadata.
+
+    Args:
+        settings: Application settings.
+        prismind: Prismind adapter instance.
+        doc_type: Document type name (can be unregistered).
+        content: Document content (used as context for new type metadata).
+        existing_type_ids: IDs of registered types. Newly registered types
+            are added to this set.
+        auto_register_type: Whether to auto-register unknown types.
+
+    Returns:
+        Dict containing:
+        - doc_type: Document type to use
+        - type_registered: Whether a new type was registered
+        - registered_type: Details of registered type (if any)
+        - matched_existing: Whether an existing type was matched
+    """
+    matched_existing = False
+
+    # Check if doc_type exists (exact match, then normalized match)
+    type_exists = doc_type in existing_type_ids
+    if not type_exists:
+        # Cheap local check before spending an RPC on RAG semantic search,
+        # e.g. "API Spec" -> "api_spec"
+        normalized_type_id = _normalize_type_id(doc_type)
+        if normalized_type_id and normalized_type_id in existing_type_ids:
+            logger.info(
+                "Using existing document type (normalized match)",
+                original_type=doc_type,
+                matched_type_id=normalized_type_id,
+            )
+            doc_type = normalized_type_id
+            type_exists = True
+            matched_existing = True
+
+    logger.debug(
+        "Document type check",
+        doc_type=doc_type,
+        type_exists=type_exists,
+        existing_count=len(existing_type_ids),
+    )
+
+    # If type doesn't exist and auto_register is enabled, try semantic match
+    if not type_exists and auto_register_type:
+        return await _match_or_register_type_once(
+            settings=settings,
+            prismind=prismind,
+            doc_type=doc_type,
+            content=content,
+            existing_type_ids=existing_type_ids,
+        )
+
+    return {
+        "doc_type": doc_type,
+        "type_registered": False,
+        "registered_type": None,
+        "matched_existing": matched_existing,
+    }
+
+
+async def _create_document(
+    prismind: PrismindAdapter,
+    resolved_type: dict[str, Any],
+    name: str,
+    content: str,
+    phase_task: str,
+    project: str = "",
+    feature: str = "",
+    keywords: list[str] | None = None,
+) -> dict[str, Any]:
+    """Create a document with an already resolved document type.
+
+    Args:
+        prismind: Prismind adapter instance.
+        resolved_type: Result of _resolve_document_type.
+        name: Document name.
+        content: Document content.
+        phase_task: Phase-task ID.
+        project: Project identifier.
+        feature: Feature name.
+        keywords: Search keywords.
+
+    Returns:
+        Dict in the smart_create_document result format.
+    """
+    doc_type = resolved_type["doc_type"]
+    type_registered = resolved_type["type_registered"]
 
-    # Step 4: Create the document
     try:
         create_kwargs: dict[str, Any] = {
             "doc_type": doc_type,
@@ -491,10 +941,7 @@ async def smart_create_document_impl(
             "success": success,
             "doc_id": doc_id,
             "doc_url": doc_url,
-            "doc_type": doc_type,
-            "type_registered": type_registered,
-            "registered_type": registered_type,
-            "matched_existing": matched_existing,
+            **resolved_type,
             "message": message,
         }
 
@@ -504,14 +951,179 @@ async def smart_create_document_impl(
             "success": False,
             "doc_id": "",
             "doc_url": "",
-            "doc_type": doc_type,
-            "type_registered": type_registered,
-            "registered_type": registered_type,
-            "matched_existing": matched_existing,
+            **resolved_type,
             "message": f"Document creation failed: {e}",
         }
 
 
+async def smart_create_document_impl(
+    settings: Settings,
+    name: str,
+    doc_type: str,
+    content: str,
+    phase_task: str,
+    project: str = "",
+    feature: str = "",
+    keywords: list[str] | None = None,
+    auto_register_type: bool = True,
+    user: str = "",
+) -> dict[str, Any]:
+    """Smart document creation that handles unknown document types.
+
+    This is the shared implementation used by both the MCP tool and
+    orchestrate_workflow's create_document action.
+
+    When an unknown doc_type is provided, this function:
+    1. Uses RAG semantic search (BGE-M3) to find similar existing types
+    2. If a match is found (e.g., "api仕様" ≈ "api_spec"), uses existing type
+    3. If no match, uses LLM to generate metadata for a new type
+
+    Args:
+        settings: Application settings.
+        name: Document name.
+        doc_type: Document type (can be unregistered).
+        content: Document content.
+        phase_task: Phase-task ID.
+        project: Project identifier.
+        feature: Feature name.
+        keywords: Search keywords.
+        auto_register_type: Whether to auto-register unknown types.
+        user: User identifier for multi-user support.
+
+    Returns:
+        Dict containing:
+        - success: Whether creation succeeded
+        - doc_id: Document ID
+        - doc_url: Document URL
+        - doc_type: Used document type (may differ from input if matched existing)
+        - type_registered: Whether a new type was registered
+        - registered_type: Details of registered type (if any)
+        - matched_existing: Whether an existing type was matched semantically
+        - message: Status message
+    """
+    # Auto-detect user if not specified
+    effective_user = user or get_current_user()
+
+    prismind = _get_prismind(settings)
+
+    # Step 1: Get existing document types to check for exact match (cached)
+    existing_type_ids = await _list_existing_type_ids(prismind)
+
+    # Step 2-3: Match an existing type or register a new one
+    resolved_type = await _resolve_document_type(
+        settings=settings,
+        prismind=prismind,
+        doc_type=doc_type,
+        content=content,
+        existing_type_ids=existing_type_ids,
+        auto_register_type=auto_register_type,
+    )
+
+    logger.info(
+        "Smart document creation",
+        name=name,
+        doc_type=doc_type,
+        resolved_type=resolved_type["doc_type"],
+        project=project,
+    )
+
+    # Step 4: Create the document
+    return await _create_document(
+        prismind=prismind,
+        resolved_type=resolved_type,
+        name=name,
+        content=content,
+        phase_task=phase_task,
+        project=project,
+        feature=feature,
+        keywords=keywords,
+    )
+
+
+async def smart_create_documents_impl(
+    settings: Settings,
+    items: list[dict[str, Any]],
+    auto_register_type: bool = True,
+    user: str = "",
+) -> list[dict[str, Any]]:
+    """Create multiple documents with shared document type handling.
+
+    Lists document types once, resolves each distinct doc_type once, and
+    creates the documents concurrently (bounded by BULK_CONCURRENCY).
+
+    Args:
+        settings: Application settings.
+        items: Documents to create. Each item takes the smart_create_document
+            arguments: name, doc_type, content, phase_task (required) and
+            project, feature, keywords (optional).
+        auto_register_type: Whether to auto-register unknown types.
+        user: User identifier for multi-user support.
+
+    Returns:
+        List of results in the same order as items, each in the
+        smart_create_document result format.
+    """
+    prismind = _get_prismind(settings)
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    logger.info("Smart bulk document creation", count=len(items))
+
+    # Validate first so invalid items never cause type registrations
+    missing_fields = [[k for k in _BULK_REQUIRED_FIELDS if k not in item] for item in items]
+
+    existing_type_ids = await _list_existing_type_ids(prismind)
+
+    # Resolve each distinct doc_type once, using its first valid item as context
+    first_content: dict[str, str] = {}
+    for item, missing in zip(items, missing_fields):
+        if not missing:
+            first_content.setdefault(item["doc_type"], item["content"])
+
+    async def resolve(doc_type: str) -> dict[str, Any]:
+        async with semaphore:
+            return await _resolve_document_type(
+                settings=settings,
+                prismind=prismind,
+                doc_type=doc_type,
+                content=first_content[doc_type],
+                existing_type_ids=existing_type_ids,
+                auto_register_type=auto_register_type,
+            )
+
+    resolved = await asyncio.gather(*(resolve(t) for t in first_content))
+    resolved_types = dict(zip(first_content, resolved))
+
+    async def create(item: dict[str, Any], missing: list[str]) -> dict[str, Any]:
+        if missing:
+            return {
+                "success": False,
+                "doc_id": "",
+                "doc_url": "",
+                "doc_type": item.get("doc_type", ""),
+                "type_registered": False,
+                "registered_type": None,
+                "matched_existing": False,
+                "message": f"Missing required fields: {', '.join(missing)}",
+            }
+        async with semaphore:
+            return await _create_document(
+                prismind=prismind,
+                resolved_type=resolved_types[item["doc_type"]],
+                name=item["name"],
+                content=item["content"],
+                phase_task=item["phase_task"],
+                project=item.get("project", ""),
+                feature=item.get("feature", ""),
+                keywords=item.get("keywords"),
+            )
+
+    return list(
+        await asyncio.gather(
+            *(create(item, missing) for item, missing in zip(items, missing_fields))
+        )
+    )
+
+
 def register_tools(mcp: FastMCP, settings: Settings) -> None:
     """Register document management tools with the MCP server.
 
@@ -519,9 +1131,20 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         mcp: FastMCP server instance.
         settings: Application settings.
     """
-    global _settings
+    global _settings, _semantic_match_memo
     _settings = settings
 
+    # Restore LLM-generated type metadata and persist it again on shutdown
+    cache_dir = Path(settings.cache_dir)
+    cache_path = cache_dir / "type_metadata.json"
+    _load_metadata_cache(cache_path)
+    atexit.register(_save_metadata_cache, cache_path)
+
+    _semantic_match_memo = PersistentAsyncCache(
+        cache_dir / "semantic_match.db",
+        namespace=f"document_type_match:{settings.embedding_model_version}",
+    )
+
     @mcp.tool()
     async def smart_create_document(
         name: str,
@@ -586,3 +1209,40 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
             auto_register_type=auto_register_type,
             user=user,
         )
+
+    @mcp.tool()
+    async def smart_create_documents(
+        items: list[dict[str, Any]],
+        auto_register_type: bool = True,
+        user: str = "",
+    ) -> list[dict[str, Any]]:
+        """Create multiple documents with automatic document type handling.
+
+        USE THIS WHEN: Creating several documents at once (e.g., all outputs of
+        a phase-task). Document types are listed once and each distinct
+        doc_type is matched/registered once, then documents are created
+        concurrently.
+
+        DO NOT USE WHEN:
+        - Creating a single document -> use smart_create_document
+
+        Args:
+            items: Documents to create. Each item is a dict with
+                name, doc_type, content, phase_task (required) and
+                project, feature, keywords (optional).
+            auto_register_type: If True, auto-register unknown types (default: True).
+            user: User identifier for multi-user support (auto-detected if empty).
+
+        Returns:
+            List of results in the same order as items, each in the
+            smart_create_document result format.
+        """
+        if _settings is None:
+            raise RuntimeError("Settings not initialized")
+
+        return await smart_create_documents_impl(
+            settings=_settings,
+            items=items,
+            auto_register_type=auto_register_type,
+            user=user,
+        )
@@ -6,16 +6,25 @@ managing task queues, and tracking execution progress.
 
 from __future__ import annotations
 
+import copy
+import hashlib
+import heapq
 import json
+import time
 import uuid
+from collections import OrderedDict
+from contextlib import aclosing
 from datetime import datetime
 from typing import Any
 
+import httpx
 from fastmcp import FastMCP
 
 from magickit.adapters.lexora import LexoraAdapter
+from magickit.adapters.pool import get_adapter
 from magickit.adapters.prismind import PrismindAdapter
 from magickit.config import Settings
+from magickit.utils import fastjson
 from magickit.utils.logging import get_logger
 from magickit.utils.user import get_current_user
 
@@ -24,8 +33,101 @@ logger = get_logger(__name__)
 # Module-level settings reference
 _settings: Settings | None = None
 
-# In-memory execution session storage
-_execution_sessions: dict[str, dict[str, Any]] = {}
+# In-memory execution session storage: user -> execution_id -> session,
+# oldest first
+_execution_sessions: dict[str, dict[str, dict[str, Any]]] = {}
+
+# Finalized sessions beyond this count per user are evicted, oldest first
+MAX_EXECUTION_SESSIONS = 256
+
+# Sessions left untouched for this long are evicted, whatever their status
+EXECUTION_SESSION_TTL_SECONDS = 3600.0
+
+# Static part of the decomposition system prompt. Kept free of per-call
+# values so repeated decompositions share a byte-identical prefix; the
+# granularity hint is appended after it.
+_DECOMPOSE_SYSTEM_PROMPT = """あなたは実装計画のスペシャリストです。
+仕様書を分析し、実行可能なタスクリストに分解します。
+
+ルール:
+1. 各タスクは独立して実行可能であること
+2. 依存関係がある場合は明示すること
+3. タスクの順序は依存関係を考慮すること
+4. タスクの粒度は末尾の「粒度」の指示に従うこと
+
+出力形式（JSON）:
+{
+  "tasks": [
+    {
+      "id": "task-1",
+      "name": "タスク名（簡潔に）",
+      "description": "何をするか（具体的に）",
+      "target_files": ["file1.py"],
+      "action_type": "create|modify|delete|test",
+      "dependencies": [],
+      "priority": 1
+    },
+    {
+      "id": "task-2",
+      "name": "次のタスク",
+      "description": "詳細",
+      "target_files": ["file2.py"],
+      "action_type": "modify",
+      "dependencies": ["task-1"],
+      "priority": 2
+    }
+  ]
+}
+
+action_type:
+- create: 新規ファイル/関数の作成
+- modify: 既存コードの変更
+- delete: 不要コードの削除
+- test: テストの実行/追加"""
+
+# LRU cache of LLM decompositions keyed by specification + granularity hash
+DECOMPOSE_CACHE_SIZE = 128
+_decompose_cache: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+
+# Prompts for generating a specification directly in spec_executor_run
+_AUTO_APPROVE_SYSTEM_PROMPT = """仕様書を生成してください。JSON形式で出力。
+{
+  "specification": {
+    "title": "機能名",
+    "purpose": "目的",
+    "target_files": ["file.py"],
+    "requirements": ["要件"],
+    "constraints": [],
+    "test_points": ["テスト"]
+  },
+  "required_permissions": {"edit": [], "bash": []}
+}"""
+
+_AUTO_APPROVE_USER_PROMPT = "対象: {target}\n要望: {request}"
+
+# Next steps returned by spec_executor_run once a workflow is ready
+_WORKFLOW_INSTRUCTION = (
+    "1. Use ExitPlanMode with allowedPrompts to get permission approval\n"
+    "2. Use spec_executor_next_task to start executing tasks\n"
+    "3. After each task, use spec_executor_complete_task to record results\n"
+    "4. When done, use spec_executor_finalize to save results"
+)
+
+# CHANGELOG report sections by task action_type, in output order
+_CHANGELOG_SECTIONS = (
+    ("create", "### Added"),
+    ("modify", "### Changed"),
+    ("delete", "### Removed"),
+)
+
+# Decoder for extracting the task object from surrounding text
+_JSON_DECODER = json.JSONDecoder()
+
+_GRANULARITY_HINTS = {
+    "fine": "各ファイルの各関数レベルで細かくタスクを分割してください。",
+    "medium": "論理的なまとまりでタスクを分割してください。1タスク = 1つの明確な変更。",
+    "coarse": "大きなまとまりでタスクを分割してください。1タスク = 1つの機能追加/変更。",
+}
 
 
 async def spec_executor_decompose(
@@ -75,65 +177,41 @@ async def spec_executor_decompose(
 
     # Extract specification data
     spec_data = specification.get("specification", specification)
-    title = spec_data.get("title", "Untitled")
-    purpose = spec_data.get("purpose", "")
-    target_files = spec_data.get("target_files", [])
-    requirements = spec_data.get("requirements", [])
-    constraints = spec_data.get("constraints", [])
-    test_points = spec_data.get("test_points", [])
 
-    # Generate tasks using LLM
-    lexora = LexoraAdapter(
-        base_url=_settings.lexora_url,
-        timeout=_settings.lexora_timeout,
+    # Canonicalize so equivalent specifications render byte-identical prompts
+    title = str(spec_data.get("title", "Untitled")).strip()
+    purpose = str(spec_data.get("purpose", "")).strip()
+    target_files = _canonical_items(spec_data.get("target_files", []))
+    requirements = _canonical_items(spec_data.get("requirements", []))
+    constraints = _canonical_items(spec_data.get("constraints", []))
+    test_points = _canonical_items(spec_data.get("test_points", []))
+
+    # Reuse the decomposition of an identical specification if available
+    cache_key = _decompose_cache_key(
+        {
+            "title": title,
+            "purpose": purpose,
+            "target_files": target_files,
+            "requirements": requirements,
+            "constraints": constraints,
+            "test_points": test_points,
+        },
+        granularity,
     )
+    tasks = _get_cached_tasks(cache_key)
+    if tasks is not None:
+        logger.debug("Decomposition cache hit", execution_id=execution_id)
+    else:
+        # Generate tasks using LLM
+        lexora = _get_lexora(_settings)
 
-    granularity_hints = {
-        "fine": "各ファイルの各関数レベルで細かくタスクを分割してください。",
-        "medium": "論理的なまとまりでタスクを分割してください。1タスク = 1つの明確な変更。",
-        "coarse": "大きなまとまりでタスクを分割してください。1タスク = 1つの機能追加/変更。",
-    }
-
-    system_prompt = f"""あなたは実装計画のスペシャリストです。
-仕様書を分析し、実行可能なタスクリストに分解します。
-
-ルール:
-1. 各タスクは独立して実行可能であること
-2. 依存関係がある場合は明示すること
-3. タスクの順序は依存関係を考慮すること
-4. {granularity_hints.get(granularity, granularity_hints["medium"])}
-
-出力形式（JSON）:
-{{
-  "tasks": [
-    {{
-      "id": "task-1",
-      "name": "タスク名（簡潔に）",
-      "description": "何をするか（具体的に）",
-      "target_files": ["file1.py"],
-      "action_type": "create|modify|delete|test",
-      "dependencies": [],
-      "priority": 1
-    }},
-    {{
-      "id": "task-2",
-      "name": "次のタスク",
-      "description": "詳細",
-      "target_files": ["file2.py"],
-      "action_type": "modify",
-      "dependencies": ["task-1"],
-      "priority": 2
-    }}
-  ]
-}}
-
-action_type:
-- create: 新規ファイル/関数の作成
-- modify: 既存コードの変更
-- delete: 不要コードの削除
-- test: テストの実行/追加"""
+        system_prompt = (
+            _DECOMPOSE_SYSTEM_PROMPT
+            + "\n\n粒度: "
+            + _GRANULARITY_HINTS.get(granularity, _GRANULARITY_HINTS["medium"])
+        )
 
-    user_prompt = f"""以下の仕様書をタスクに分解してください。
+        user_prompt = f"""以下の仕様書をタスクに分解してください。
 
 【仕様書】
 タイトル: {title}
@@ -153,46 +231,47 @@ action_type:
 
 JSON形式で出力してください。"""
 
-    try:
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-        response = await lexora.chat(
-            messages=messages,
-            max_tokens=2000,
-            temperature=0.2,
-        )
+        try:
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+            tasks = await _request_tasks(lexora, messages)
 
-        # Parse LLM response
-        tasks = _parse_tasks_response(response)
+            if tasks:
+                _store_cached_tasks(cache_key, tasks)
+            else:
+                # Fallback: Generate basic tasks from specification
+                tasks = _generate_fallback_tasks(spec_data)
 
-        if not tasks:
-            # Fallback: Generate basic tasks from specification
+        except Exception as e:
+            logger.error("Task decomposition failed", error=str(e))
+            # Fallback to basic task generation
             tasks = _generate_fallback_tasks(spec_data)
 
-    except Exception as e:
-        logger.error("Task decomposition failed", error=str(e))
-        # Fallback to basic task generation
-        tasks = _generate_fallback_tasks(spec_data)
-
     # Add execution metadata to each task
+    now = datetime.utcnow().isoformat()
     for i, task in enumerate(tasks):
         task["status"] = "pending"
-        task["created_at"] = datetime.utcnow().isoformat()
+        task["created_at"] = now
         if "priority" not in task:
             task["priority"] = i + 1
 
     # Store execution session
-    _execution_sessions[execution_id] = {
-        "specification": specification,
+    _store_session(effective_user, execution_id, {
+        "spec_data": copy.deepcopy(spec_data),
         "tasks": tasks,
         "current_task_index": 0,
         "completed_tasks": [],
         "failed_tasks": [],
+        "completed_ids": set(),
+        "failed_ids": set(),
+        "by_id": {task["id"]: task for task in tasks},
+        **_build_schedule(tasks),
+        "counts": {"pending": len(tasks), "in_progress": 0, "completed": 0, "failed": 0},
         "status": "ready",
-        "created_at": datetime.utcnow().isoformat(),
-    }
+        "created_at": now,
+    })
 
     return {
         "success": True,
@@ -233,7 +312,8 @@ async def spec_executor_next_task(
     """
     effective_user = user or get_current_user()
 
-    if execution_id not in _execution_sessions:
+    session = _get_session(effective_user, execution_id)
+    if session is None:
         return {
             "has_task": False,
             "error": f"Execution session not found: {execution_id}",
@@ -242,52 +322,25 @@ async def spec_executor_next_task(
             "remaining": 0,
         }
 
-    session = _execution_sessions[execution_id]
     tasks = session["tasks"]
     completed = session["completed_tasks"]
     failed = session["failed_tasks"]
 
-    # Find next pending task whose dependencies are met
-    for task in tasks:
-        if task["status"] != "pending":
-            continue
-
-        # Check dependencies
-        deps = task.get("dependencies", [])
-        deps_met = all(
-            any(ct["id"] == dep for ct in completed)
-            for dep in deps
-        )
-
-        if deps_met:
-            # Mark as in_progress
-            task["status"] = "in_progress"
-            task["started_at"] = datetime.utcnow().isoformat()
-
-            logger.info(
-                "Task retrieved",
-                execution_id=execution_id,
-                task_id=task["id"],
-                task_name=task["name"],
-            )
-
-            return {
-                "has_task": True,
-                "task": task,
-                "progress": f"{len(completed)}/{len(tasks)}",
-                "remaining": len(tasks) - len(completed) - len(failed),
-            }
-
-    # No tasks available
-    all_done = len(completed) + len(failed) >= len(tasks)
-    session["status"] = "completed" if all_done else "blocked"
+    task = _pick_next_task(session, execution_id)
+    if task is not None:
+        return {
+            "has_task": True,
+            "task": task,
+            "progress": f"{len(completed)}/{len(tasks)}",
+            "remaining": len(tasks) - len(completed) - len(failed),
+        }
 
     return {
         "has_task": False,
         "task": None,
         "progress": f"{len(completed)}/{len(tasks)}",
         "remaining": len(tasks) - len(completed) - len(failed),
-        "status": "completed" if all_done else "waiting_for_dependencies",
+        "status": "completed" if session["status"] == "completed" else "waiting_for_dependencies",
     }
 
 
@@ -324,7 +377,8 @@ async def spec_executor_complete_task(
     """
     effective_user = user or get_current_user()
 
-    if execution_id not in _execution_sessions:
+    session = _get_session(effective_user, execution_id)
+    if session is None:
         return {
             "success": False,
             "error": f"Execution session not found: {execution_id}",
@@ -333,16 +387,9 @@ async def spec_executor_complete_task(
             "is_complete": False,
         }
 
-    session = _execution_sessions[execution_id]
     tasks = session["tasks"]
 
-    # Find the task
-    task = None
-    for t in tasks:
-        if t["id"] == task_id:
-            task = t
-            break
-
+    task = session["by_id"].get(task_id)
     if not task:
         return {
             "success": False,
@@ -353,7 +400,7 @@ async def spec_executor_complete_task(
         }
 
     # Update task status
-    task["status"] = "completed" if success else "failed"
+    _set_task_status(session, task, "completed" if success else "failed")
     task["completed_at"] = datetime.utcnow().isoformat()
     task["result"] = result
     if error:
@@ -362,8 +409,12 @@ async def spec_executor_complete_task(
     # Add to appropriate list
     if success:
         session["completed_tasks"].append(task)
+        if task_id not in session["completed_ids"]:
+            session["completed_ids"].add(task_id)
+            _release_dependents(session, task_id)
     else:
         session["failed_tasks"].append(task)
+        session["failed_ids"].add(task_id)
 
     logger.info(
         "Task completed",
@@ -373,7 +424,7 @@ async def spec_executor_complete_task(
     )
 
     # Get next task
-    next_task_result = await spec_executor_next_task(execution_id)
+    next_task = _pick_next_task(session, execution_id)
 
     completed_count = len(session["completed_tasks"])
     failed_count = len(session["failed_tasks"])
@@ -386,8 +437,8 @@ async def spec_executor_complete_task(
     return {
         "success": True,
         "task_completed": task_id,
-        "next_task": next_task_result.get("task"),
-        "has_next_task": next_task_result.get("has_task", False),
+        "next_task": next_task,
+        "has_next_task": next_task is not None,
         "progress": f"{completed_count}/{total_count}",
         "is_complete": is_complete,
         "summary": {
@@ -420,21 +471,20 @@ async def spec_executor_status(
     """
     effective_user = user or get_current_user()
 
-    if execution_id not in _execution_sessions:
+    session = _get_session(effective_user, execution_id)
+    if session is None:
         return {
             "found": False,
             "error": f"Execution session not found: {execution_id}",
         }
 
-    session = _execution_sessions[execution_id]
     tasks = session["tasks"]
     completed = len(session["completed_tasks"])
     failed = len(session["failed_tasks"])
     total = len(tasks)
 
-    # Count in-progress tasks
-    in_progress = sum(1 for t in tasks if t["status"] == "in_progress")
-    pending = sum(1 for t in tasks if t["status"] == "pending")
+    in_progress = session["counts"]["in_progress"]
+    pending = session["counts"]["pending"]
 
     return {
         "found": True,
@@ -446,7 +496,7 @@ async def spec_executor_status(
             "in_progress": in_progress,
             "pending": pending,
             "total": total,
-            "percent": round(completed / total * 100, 1) if total > 0 else 0,
+            "percent": _percent(completed, total),
         },
         "tasks": [
             {
@@ -461,47 +511,378 @@ async def spec_executor_status(
     }
 
 
-def _parse_tasks_response(response: str) -> list[dict[str, Any]]:
-    """Parse LLM response to extract tasks."""
+def _get_user_sessions(user: str) -> dict[str, dict[str, Any]]:
+    """Get a user's execution sessions.
+
+    Args:
+        user: User identifier.
+
+    Returns:
+        Mapping of execution ID to session, oldest first.
+    """
+    return _execution_sessions.setdefault(user, {})
+
+
+def _get_session(user: str, execution_id: str) -> dict[str, Any] | None:
+    """Get an execution session and mark it as recently used.
+
+    Args:
+        user: User identifier.
+        execution_id: Execution session ID.
+
+    Returns:
+        Session data, or None if the session does not exist or has expired.
+    """
+    sessions = _execution_sessions.get(user, {})
+    session = sessions.get(execution_id)
+    if session is None:
+        return None
+
+    now = time.monotonic()
+    if now - session.get("last_active", now) > EXECUTION_SESSION_TTL_SECONDS:
+        del sessions[execution_id]
+        logger.debug("Execution session expired", execution_id=execution_id, user=user)
+        return None
+    session["last_active"] = now
+    return session
+
+
+def _evict_idle_sessions(now: float) -> None:
+    """Evict every user's sessions idle for longer than the session TTL.
+
+    Args:
+        now: Current time.monotonic() value.
+    """
+    for user, sessions in list(_execution_sessions.items()):
+        expired = [
+            sid
+            for sid, s in sessions.items()
+            if now - s.get("last_active", now) > EXECUTION_SESSION_TTL_SECONDS
+        ]
+        for sid in expired:
+            del sessions[sid]
+            logger.debug("Execution session expired", execution_id=sid, user=user)
+        if not sessions:
+            del _execution_sessions[user]
+
+
+def _store_session(user: str, execution_id: str, session: dict[str, Any]) -> None:
+    """Store an execution session and evict old sessions.
+
+    Idle sessions of every user are evicted after
+    EXECUTION_SESSION_TTL_SECONDS. Beyond that, only finalized sessions
+    are evicted, so a user can exceed MAX_EXECUTION_SESSIONS while many
+    executions are active.
+
+    Args:
+        user: User identifier.
+        execution_id: Execution session ID.
+        session: Session data.
+    """
+    now = time.monotonic()
+    _evict_idle_sessions(now)
+
+    session["last_active"] = now
+    sessions = _get_user_sessions(user)
+    sessions.pop(execution_id, None)
+    sessions[execution_id] = session
+
+    excess = len(sessions) - MAX_EXECUTION_SESSIONS
+    if excess <= 0:
+        return
+    finalized = [sid for sid, s in sessions.items() if s.get("status") == "finalized"]
+    for sid in finalized[:excess]:
+        del sessions[sid]
+        logger.debug("Execution session evicted", execution_id=sid, user=user)
+
+
+def _build_schedule(tasks: list[dict[str, Any]]) -> dict[str, Any]:
+    """Build the dependency bookkeeping for an execution session.
+
+    Tasks are referred to by their position in the plan. Each task keeps a
+    count of unmet dependencies, and each task id maps to the tasks that
+    depend on it. Tasks with no unmet dependencies sit in the "ready" heap,
+    so they are handed out in plan order.
+
+    Args:
+        tasks: Tasks in plan order.
+
+    Returns:
+        Dict with "ready", "unmet_deps" and "dependents" session entries.
+    """
+    unmet_deps: list[int] = []
+    dependents: dict[str, list[int]] = {}
+    ready: list[int] = []
+    for index, task in enumerate(tasks):
+        deps = set(task.get("dependencies", []))
+        unmet_deps.append(len(deps))
+        for dep in deps:
+            dependents.setdefault(dep, []).append(index)
+        if not deps:
+            ready.append(index)
+
+    return {"ready": ready, "unmet_deps": unmet_deps, "dependents": dependents}
+
+
+def _release_dependents(session: dict[str, Any], task_id: str) -> None:
+    """Mark a task's dependency as met for every task that depends on it.
+
+    Args:
+        session: Execution session.
+        task_id: ID of the task that just completed.
+    """
+    unmet_deps = session["unmet_deps"]
+    for index in session["dependents"].get(task_id, ()):
+        unmet_deps[index] -= 1
+        if unmet_deps[index] == 0:
+            heapq.heappush(session["ready"], index)
+
+
+def _pick_next_task(session: dict[str, Any], execution_id: str) -> dict[str, Any] | None:
+    """Start the first ready task in plan order.
+
+    Ready entries whose task already left the pending state (e.g., it was
+    completed without being started) are discarded. When no task is ready,
+    the session status becomes "completed" or "blocked".
+
+    Args:
+        session: Execution session.
+        execution_id: Execution session ID (for logging).
+
+    Returns:
+        The task, now in_progress, or None if no task is ready.
+    """
+    tasks = session["tasks"]
+    ready = session["ready"]
+    while ready:
+        task: dict[str, Any] = tasks[heapq.heappop(ready)]
+        if task["status"] != "pending":
+            continue
+
+        _set_task_status(session, task, "in_progress")
+        task["started_at"] = datetime.utcnow().isoformat()
+
+        logger.info(
+            "Task retrieved",
+            execution_id=execution_id,
+            task_id=task["id"],
+            task_name=task["name"],
+        )
+        return task
+
+    # No tasks available
+    finished = len(session["completed_tasks"]) + len(session["failed_tasks"])
+    session["status"] = "completed" if finished >= len(tasks) else "blocked"
+    return None
+
+
+def _set_task_status(session: dict[str, Any], task: dict[str, Any], status: str) -> None:
+    """Change a task's status and keep the session's status counts in sync.
+
+    Args:
+        session: Execution session owning the task.
+        task: Task to update.
+        status: New status.
+    """
+    counts = session["counts"]
+    counts[task["status"]] -= 1
+    counts[status] += 1
+    task["status"] = status
+
+
+def _get_prismind(settings: Settings) -> PrismindAdapter:
+    """Get the shared Prismind adapter."""
+    return get_adapter(PrismindAdapter, settings.prismind_url, settings.prismind_timeout)
+
+
+def _get_lexora(settings: Settings) -> LexoraAdapter:
+    """Get the shared Lexora adapter."""
+    return get_adapter(LexoraAdapter, settings.lexora_url, settings.lexora_timeout)
+
+
+def _canonical_items(items: list[Any] | None) -> list[str]:
+    """Normalize a specification list for prompt rendering.
+
+    Args:
+        items: List entries from the specification (None if the field is null).
+
+    Returns:
+        Sorted, de-duplicated entries with surrounding whitespace removed.
+    """
+    return sorted({str(item).strip() for item in items or [] if str(item).strip()})
+
+
+def _decompose_cache_key(spec_data: dict[str, Any], granularity: str) -> str:
+    """Build the decomposition cache key for a specification.
+
+    Args:
+        spec_data: Canonicalized specification fields.
+        granularity: Requested task granularity.
+
+    Returns:
+        SHA256 hex digest of the canonical JSON of both values.
+    """
+    payload = json.dumps(
+        {"g": granularity, "s": spec_data},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _get_cached_tasks(key: str) -> list[dict[str, Any]] | None:
+    """Get a cached decomposition, marking it as recently used.
+
+    Args:
+        key: Key from _decompose_cache_key.
+
+    Returns:
+        A copy of the cached tasks, or None if not cached.
+    """
+    tasks = _decompose_cache.get(key)
+    if tasks is None:
+        return None
+    _decompose_cache.move_to_end(key)
+    return copy.deepcopy(tasks)
+
+
+def _store_cached_tasks(key: str, tasks: list[dict[str, Any]]) -> None:
+    """Store a decomposition in the LRU cache, evicting the oldest entries.
+
+    Args:
+        key: Key from _decompose_cache_key.
+        tasks: Tasks parsed from the LLM response.
+    """
+    _decompose_cache[key] = copy.deepcopy(tasks)
+    _decompose_cache.move_to_end(key)
+    while len(_decompose_cache) > DECOMPOSE_CACHE_SIZE:
+        _decompose_cache.popitem(last=False)
+
+
+async def _request_tasks(
+    lexora: LexoraAdapter, messages: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    """Ask the LLM for a decomposition and parse the tasks it returns.
+
+    Streams the response while tracking JSON brace depth, and stops as soon
+    as a complete object with a "tasks" key has been received. Falls back
+    to a regular chat request if streaming fails or yields no task object
+    (e.g., a server that ignores "stream" and sends a plain body).
+
+    Args:
+        lexora: Lexora adapter instance.
+        messages: Decomposition chat messages.
+
+    Returns:
+        Parsed tasks, or an empty list if none could be parsed.
+    """
+    chunks: list[str] = []
+    depth = 0
+    in_string = False
+    escaped = False
+    try:
+        async with aclosing(
+            lexora.chat_stream(messages=messages, max_tokens=2000, temperature=0.2)
+        ) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                closed = False
+                for char in chunk:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == "\\":
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"' and depth:
+                        in_string = True
+                    elif char == "{":
+                        depth += 1
+                    elif char == "}" and depth:
+                        depth -= 1
+                        closed = closed or depth == 0
+                if closed and (tasks := _extract_tasks("".join(chunks))) is not None:
+                    return tasks
+        if (tasks := _extract_tasks("".join(chunks))) is not None:
+            return tasks
+        logger.debug("Lexora stream had no tasks, using regular chat", chunks=len(chunks))
+    except (httpx.HTTPError, ValueError) as e:
+        logger.debug("Lexora streaming failed, using regular chat", error=str(e))
+
+    response = await lexora.chat(messages=messages, max_tokens=2000, temperature=0.2)
+    return _parse_tasks_response(response)
+
+
+def _extract_tasks(response: str) -> list[dict[str, Any]] | None:
+    """Extract the task list from an LLM response.
+
+    Args:
+        response: Raw LLM response text.
+
+    Returns:
+        The "tasks" list of the first JSON object that has one, or None.
+    """
+    start = response.find("{")
+    end = response.rfind("}") + 1
+    if start < 0 or end <= start:
+        return None
+
+    # Common case: the response is one JSON object, possibly wrapped in text
     try:
-        # Try to find JSON in response
-        start = response.find("{")
-        end = response.rfind("}") + 1
-        if start >= 0 and end > start:
-            data = json.loads(response[start:end])
-            if "tasks" in data:
-                return data["tasks"]
+        data = fastjson.loads(response[start:end])
+        if isinstance(data, dict) and isinstance(tasks := data.get("tasks"), list):
+            return tasks
     except json.JSONDecodeError:
         pass
 
-    logger.warning("Failed to parse tasks response, using fallback")
-    return []
+    # Otherwise decode from each "{" in turn so braces in surrounding
+    # prose do not hide the task object
+    while start >= 0:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(response, start)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict) and isinstance(tasks := data.get("tasks"), list):
+            return tasks
+        start = response.find("{", start + 1)
+
+    return None
+
+
+def _parse_tasks_response(response: str) -> list[dict[str, Any]]:
+    """Parse LLM response to extract tasks."""
+    tasks = _extract_tasks(response)
+    if tasks is None:
+        logger.warning("Failed to parse tasks response, using fallback")
+        return []
+    return tasks
 
 
 def _generate_fallback_tasks(spec_data: dict[str, Any]) -> list[dict[str, Any]]:
     """Generate basic tasks from specification when LLM fails."""
-    tasks = []
     target_files = spec_data.get("target_files", [])
     requirements = spec_data.get("requirements", [])
     test_points = spec_data.get("test_points", [])
 
-    task_id = 1
-
-    # Create tasks for each file
-    for file_path in target_files:
-        tasks.append({
-            "id": f"task-{task_id}",
+    # Create a chain of tasks, one per file
+    tasks = [
+        {
+            "id": f"task-{i}",
             "name": f"Modify {file_path}",
             "description": f"Implement changes in {file_path}",
             "target_files": [file_path],
             "action_type": "modify",
-            "dependencies": [f"task-{task_id - 1}"] if task_id > 1 else [],
-            "priority": task_id,
-        })
-        task_id += 1
+            "dependencies": [f"task-{i - 1}"] if i > 1 else [],
+            "priority": i,
+        }
+        for i, file_path in enumerate(target_files, start=1)
+    ]
 
     # Add test task if test points exist
     if test_points:
+        task_id = len(tasks) + 1
         tasks.append({
             "id": f"task-{task_id}",
             "name": "Run tests",
@@ -561,36 +942,38 @@ async def spec_executor_finalize(
 
     effective_user = user or get_current_user()
 
-    if execution_id not in _execution_sessions:
+    session = _get_session(effective_user, execution_id)
+    if session is None:
         return {
             "success": False,
             "error": f"Execution session not found: {execution_id}",
         }
 
-    session = _execution_sessions[execution_id]
     tasks = session["tasks"]
     completed_tasks = session["completed_tasks"]
     failed_tasks = session["failed_tasks"]
-    specification = session.get("specification", {})
+    n_total = len(tasks)
+    n_done = len(completed_tasks)
+    n_failed = len(failed_tasks)
 
     logger.info(
         "Finalizing execution",
         execution_id=execution_id,
-        completed=len(completed_tasks),
-        failed=len(failed_tasks),
+        completed=n_done,
+        failed=n_failed,
         user=effective_user,
     )
 
     # Generate summary
-    spec_data = specification.get("specification", specification)
+    spec_data = session["spec_data"]
     title = spec_data.get("title", "Untitled Implementation")
 
     summary_parts = [
         f"# {title} - 実行結果",
         "",
         f"## 概要",
-        f"- 完了タスク: {len(completed_tasks)}/{len(tasks)}",
-        f"- 失敗タスク: {len(failed_tasks)}",
+        f"- 完了タスク: {n_done}/{n_total}",
+        f"- 失敗タスク: {n_failed}",
         "",
     ]
 
@@ -625,33 +1008,33 @@ async def spec_executor_finalize(
     knowledge_saved = 0
     if save_to_knowledge and project:
         try:
-            prismind = PrismindAdapter(
-                sse_url=_settings.prismind_url,
-                timeout=_settings.prismind_timeout,
-            )
-
-            # Save execution summary
-            await prismind.add_knowledge(
-                content=summary,
-                category="実装記録",
-                project=project,
-                tags=["execution", "implementation", title[:30]],
-                source=f"execution:{execution_id}",
-                user=effective_user,
-            )
-            knowledge_saved += 1
-
-            # Save individual task results as knowledge (for significant tasks)
+            prismind = _get_prismind(_settings)
+
+            # Save execution summary and significant task results in one batch
+            entries = [
+                {
+                    "content": summary,
+                    "category": "実装記録",
+                    "tags": ["execution", "implementation", title[:30]],
+                    "source": f"execution:{execution_id}",
+                }
+            ]
             for task in completed_tasks:
                 if task.get("result") and len(task.get("result", "")) > 50:
-                    await prismind.add_knowledge(
-                        content=f"# {task['name']}\n\n{task.get('result', '')}",
-                        category="実装詳細",
-                        project=project,
-                        tags=["task-result", task.get("action_type", "modify")],
-                        source=f"task:{task['id']}",
-                        user=effective_user,
-                    )
+                    entries.append({
+                        "content": f"# {task['name']}\n\n{task.get('result', '')}",
+                        "category": "実装詳細",
+                        "tags": ["task-result", task.get("action_type", "modify")],
+                        "source": f"task:{task['id']}",
+                    })
+
+            results = await prismind.add_knowledge_bulk(
+                entries, project=project, user=effective_user
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning("Failed to save knowledge", error=str(result))
+                else:
                     knowledge_saved += 1
 
             logger.info("Knowledge saved", count=knowledge_saved)
@@ -669,8 +1052,8 @@ async def spec_executor_finalize(
         "execution_id": execution_id,
         "title": title,
         "status": "success" if not failed_tasks else "partial",
-        "completed_count": len(completed_tasks),
-        "failed_count": len(failed_tasks),
+        "completed_count": n_done,
+        "failed_count": n_failed,
         "next_steps": [],
     }
 
@@ -689,10 +1072,10 @@ async def spec_executor_finalize(
         "knowledge_saved": knowledge_saved,
         "handoff": handoff,
         "statistics": {
-            "total_tasks": len(tasks),
-            "completed": len(completed_tasks),
-            "failed": len(failed_tasks),
-            "success_rate": round(len(completed_tasks) / len(tasks) * 100, 1) if tasks else 0,
+            "total_tasks": n_total,
+            "completed": n_done,
+            "failed": n_failed,
+            "success_rate": _percent(n_done, n_total),
         },
     }
 
@@ -722,56 +1105,45 @@ async def spec_executor_report(
     """
     effective_user = user or get_current_user()
 
-    if execution_id not in _execution_sessions:
+    session = _get_session(effective_user, execution_id)
+    if session is None:
         return {
             "success": False,
             "error": f"Execution session not found: {execution_id}",
         }
 
-    session = _execution_sessions[execution_id]
     tasks = session["tasks"]
     completed_tasks = session["completed_tasks"]
     failed_tasks = session["failed_tasks"]
-    specification = session.get("specification", {})
-    spec_data = specification.get("specification", specification)
+    n_total = len(tasks)
+    n_done = len(completed_tasks)
+    n_failed = len(failed_tasks)
+    spec_data = session["spec_data"]
     title = spec_data.get("title", "Implementation")
 
-    if format == "changelog":
-        # CHANGELOG format
-        lines = [
-            f"## [{title}] - {datetime.utcnow().strftime('%Y-%m-%d')}",
-            "",
-        ]
+    now = datetime.utcnow()
 
-        # Group by action type
-        added = [t for t in completed_tasks if t.get("action_type") == "create"]
-        changed = [t for t in completed_tasks if t.get("action_type") == "modify"]
-        removed = [t for t in completed_tasks if t.get("action_type") == "delete"]
-
-        if added:
-            lines.append("### Added")
-            for t in added:
-                lines.append(f"- {t['name']}")
-            lines.append("")
-
-        if changed:
-            lines.append("### Changed")
-            for t in changed:
-                lines.append(f"- {t['name']}")
-            lines.append("")
-
-        if removed:
-            lines.append("### Removed")
-            for t in removed:
-                lines.append(f"- {t['name']}")
-            lines.append("")
+    if format == "changelog":
+        # CHANGELOG format, grouped by action type
+        names_by_action: dict[str, list[str]] = {action: [] for action, _ in _CHANGELOG_SECTIONS}
+        for t in completed_tasks:
+            names = names_by_action.get(t.get("action_type"))
+            if names is not None:
+                names.append(t["name"])
+
+        lines = [f"## [{title}] - {now.strftime('%Y-%m-%d')}", ""]
+        for action, heading in _CHANGELOG_SECTIONS:
+            if names := names_by_action[action]:
+                lines.append(heading)
+                lines.extend(f"- {name}" for name in names)
+                lines.append("")
 
         report = "\n".join(lines)
 
     elif format == "brief":
         # Brief summary
-        status = "✅ Success" if not failed_tasks else f"⚠️ Partial ({len(failed_tasks)} failed)"
-        report = f"{title}: {status} - {len(completed_tasks)}/{len(tasks)} tasks completed"
+        status = "✅ Success" if not failed_tasks else f"⚠️ Partial ({n_failed} failed)"
+        report = f"{title}: {status} - {n_done}/{n_total} tasks completed"
 
     else:
         # Markdown format (default)
@@ -779,17 +1151,17 @@ async def spec_executor_report(
             f"# Execution Report: {title}",
             "",
             f"**Execution ID:** `{execution_id}`",
-            f"**Date:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC",
+            f"**Date:** {now.strftime('%Y-%m-%d %H:%M')} UTC",
             f"**Status:** {'Completed' if not failed_tasks else 'Partial'}",
             "",
             "## Summary",
             "",
-            f"| Metric | Value |",
-            f"|--------|-------|",
-            f"| Total Tasks | {len(tasks)} |",
-            f"| Completed | {len(completed_tasks)} |",
-            f"| Failed | {len(failed_tasks)} |",
-            f"| Success Rate | {round(len(completed_tasks) / len(tasks) * 100, 1) if tasks else 0}% |",
+            "| Metric | Value |",
+            "|--------|-------|",
+            f"| Total Tasks | {n_total} |",
+            f"| Completed | {n_done} |",
+            f"| Failed | {n_failed} |",
+            f"| Success Rate | {_percent(n_done, n_total)}% |",
             "",
         ]
 
@@ -797,24 +1169,12 @@ async def spec_executor_report(
             if completed_tasks:
                 lines.append("## Completed Tasks")
                 lines.append("")
-                for task in completed_tasks:
-                    lines.append(f"### {task['name']}")
-                    if task.get("description"):
-                        lines.append(f"> {task['description']}")
-                    if task.get("target_files"):
-                        lines.append(f"**Files:** {', '.join(task['target_files'])}")
-                    if task.get("result"):
-                        lines.append(f"**Result:** {task['result']}")
-                    lines.append("")
+                lines.extend(_format_completed_task_md(task) for task in completed_tasks)
 
             if failed_tasks:
                 lines.append("## Failed Tasks")
                 lines.append("")
-                for task in failed_tasks:
-                    lines.append(f"### ❌ {task['name']}")
-                    if task.get("error"):
-                        lines.append(f"**Error:** {task['error']}")
-                    lines.append("")
+                lines.extend(_format_failed_task_md(task) for task in failed_tasks)
 
         report = "\n".join(lines)
 
@@ -826,6 +1186,44 @@ async def spec_executor_report(
     }
 
 
+def _percent(part: int, total: int) -> float:
+    """Calculate a percentage rounded to one decimal place.
+
+    Uses integer arithmetic (rounding halves up) instead of float division
+    and round().
+
+    Args:
+        part: Part count.
+        total: Total count.
+
+    Returns:
+        Percentage, or 0 if total is 0.
+    """
+    if total <= 0:
+        return 0
+    return (part * 2000 // total + 1) // 2 / 10
+
+
+def _format_completed_task_md(task: dict[str, Any]) -> str:
+    """Format a completed task section of the markdown report."""
+    parts = [f"### {task['name']}"]
+    if task.get("description"):
+        parts.append(f"> {task['description']}")
+    if task.get("target_files"):
+        parts.append(f"**Files:** {', '.join(task['target_files'])}")
+    if task.get("result"):
+        parts.append(f"**Result:** {task['result']}")
+    parts.append("")
+    return "\n".join(parts)
+
+
+def _format_failed_task_md(task: dict[str, Any]) -> str:
+    """Format a failed task section of the markdown report."""
+    if task.get("error"):
+        return f"### ❌ {task['name']}\n**Error:** {task['error']}\n"
+    return f"### ❌ {task['name']}\n"
+
+
 async def spec_executor_run(
     target: str,
     request: str,
@@ -882,27 +1280,14 @@ async def spec_executor_run(
         # Step 1: Generate specification (skip questions if auto_approve)
         if auto_approve:
             # Generate basic specification directly
-            lexora = LexoraAdapter(
-                base_url=_settings.lexora_url,
-                timeout=_settings.lexora_timeout,
-            )
-
-            system_prompt = """仕様書を生成してください。JSON形式で出力。
-{
-  "specification": {
-    "title": "機能名",
-    "purpose": "目的",
-    "target_files": ["file.py"],
-    "requirements": ["要件"],
-    "constraints": [],
-    "test_points": ["テスト"]
-  },
-  "required_permissions": {"edit": [], "bash": []}
-}"""
+            lexora = _get_lexora(_settings)
 
             messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"対象: {target}\n要望: {request}"},
+                {"role": "system", "content": _AUTO_APPROVE_SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": _AUTO_APPROVE_USER_PROMPT.format(target=target, request=request),
+                },
             ]
             response = await lexora.chat(messages=messages, max_tokens=1500, temperature=0.2)
             spec_result = specification._parse_specification_response(response)
@@ -943,9 +1328,10 @@ async def spec_executor_run(
         )
 
         # Store workflow info
-        if decompose_result["execution_id"] in _execution_sessions:
-            _execution_sessions[decompose_result["execution_id"]]["workflow_id"] = workflow_id
-            _execution_sessions[decompose_result["execution_id"]]["project"] = project
+        session = _get_session(effective_user, decompose_result["execution_id"])
+        if session is not None:
+            session["workflow_id"] = workflow_id
+            session["project"] = project
 
         return {
             "success": True,
@@ -959,12 +1345,7 @@ async def spec_executor_run(
             },
             "permissions": exec_prep["allowed_prompts"],
             "next_action": {
-                "instruction": (
-                    "1. Use ExitPlanMode with allowedPrompts to get permission approval\n"
-                    "2. Use spec_executor_next_task to start executing tasks\n"
-                    "3. After each task, use spec_executor_complete_task to record results\n"
-                    "4. When done, use spec_executor_finalize to save results"
-                ),
+                "instruction": _WORKFLOW_INSTRUCTION,
                 "first_task": decompose_result["tasks"][0] if decompose_result["tasks"] else None,
                 "allowed_prompts": exec_prep["allowed_prompts"],
             },
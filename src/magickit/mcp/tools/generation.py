@@ -5,15 +5,23 @@ Provides RAG-enhanced content generation combining all services.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
 from typing import Any
 
+import httpx
 from fastmcp import FastMCP
 
 from magickit.adapters.cognilens import CognilensAdapter
 from magickit.adapters.prismind import PrismindAdapter
 from magickit.adapters.lexora import LexoraAdapter
+from magickit.adapters.pool import get_adapter
 from magickit.config import Settings
 from magickit.utils.logging import get_logger
+from magickit.utils.tokens import count_chunk_tokens, count_tokens
 from magickit.utils.user import get_current_user
 
 logger = get_logger(__name__)
@@ -21,6 +29,333 @@ logger = get_logger(__name__)
 # Module-level settings reference
 _settings: Settings | None = None
 
+# LRU cache of recent knowledge searches, keyed by the normalized search
+# arguments; entries expire so new knowledge shows up within a minute
+RAG_CACHE_SIZE = 512
+RAG_CACHE_TTL_SECONDS = 60.0
+_rag_cache: OrderedDict[tuple[Any, ...], tuple[float, tuple[dict[str, Any], ...]]] = OrderedDict()
+
+# LRU cache of Cognilens compressions, keyed by a digest of the context, the
+# task description and the target size
+COMPRESSION_CACHE_SIZE = 1024
+COMPRESSION_CACHE_TTL_SECONDS = 1800.0
+_compression_cache: OrderedDict[tuple[str, int], tuple[float, str]] = OrderedDict()
+
+# Concurrent prompts without a system prompt are sent to Lexora together,
+# up to this many per request, after waiting this long for company
+GENERATE_BATCH_SIZE = 8
+GENERATE_BATCH_DELAY_SECONDS = 0.005
+
+# Search results at least this similar to a more relevant result are dropped
+NEAR_DUPLICATE_SIMILARITY = 0.9
+
+
+def _get_prismind(settings: Settings) -> PrismindAdapter:
+    """Get the shared Prismind adapter."""
+    return get_adapter(PrismindAdapter, settings.prismind_url, settings.prismind_timeout)
+
+
+def _get_cognilens(settings: Settings) -> CognilensAdapter:
+    """Get the shared Cognilens adapter."""
+    return get_adapter(CognilensAdapter, settings.cognilens_url, settings.cognilens_timeout)
+
+
+def _get_lexora(settings: Settings) -> LexoraAdapter:
+    """Get the shared Lexora adapter."""
+    return get_adapter(LexoraAdapter, settings.lexora_url, settings.lexora_timeout)
+
+
+async def _cached_search(
+    prismind: PrismindAdapter,
+    query: str,
+    category: str,
+    project: str,
+    limit: int,
+    user: str,
+) -> tuple[dict[str, Any], ...]:
+    """Search knowledge, serving repeated searches from the LRU cache.
+
+    Args:
+        prismind: Prismind adapter.
+        query: Search query.
+        category: Category filter.
+        project: Project filter.
+        limit: Maximum number of results.
+        user: User identifier.
+
+    Returns:
+        Search results. The entries are shared with the cache and must not
+        be modified.
+    """
+    key = (query.strip().lower(), category, project, limit, user)
+    cached = _rag_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < RAG_CACHE_TTL_SECONDS:
+        _rag_cache.move_to_end(key)
+        logger.debug("RAG search served from cache", cache_hit=True)
+        return cached[1]
+
+    results = tuple(
+        await prismind.search_knowledge(
+            query=query,
+            category=category,
+            project=project,
+            limit=limit,
+            user=user,
+        )
+    )
+    logger.debug("RAG search fetched", cache_hit=False, results=len(results))
+
+    _rag_cache[key] = (time.monotonic(), results)
+    _rag_cache.move_to_end(key)
+    while len(_rag_cache) > RAG_CACHE_SIZE:
+        _rag_cache.popitem(last=False)
+    return results
+
+
+async def _cached_compress(
+    cognilens: CognilensAdapter,
+    context: str,
+    task_description: str,
+    target_tokens: int,
+) -> str:
+    """Compress a context, serving repeated compressions from the LRU cache.
+
+    Args:
+        cognilens: Cognilens adapter.
+        context: Context to compress.
+        task_description: Description of the task the context is for.
+        target_tokens: Target token count.
+
+    Returns:
+        Compressed context.
+    """
+    digest = hashlib.sha256(f"{task_description}\0{context}".encode()).hexdigest()
+    key = (digest, target_tokens)
+    cached = _compression_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < COMPRESSION_CACHE_TTL_SECONDS:
+        _compression_cache.move_to_end(key)
+        logger.debug("Compression served from cache", cache_hit=True)
+        return cached[1]
+
+    compressed = await cognilens.optimize_context(
+        context=context,
+        task_description=task_description,
+        target_tokens=target_tokens,
+    )
+
+    _compression_cache[key] = (time.monotonic(), compressed)
+    _compression_cache.move_to_end(key)
+    while len(_compression_cache) > COMPRESSION_CACHE_SIZE:
+        _compression_cache.popitem(last=False)
+    return compressed
+
+
+class _GenerationBatcher:
+    """Coalesces concurrent Lexora generate calls into batched requests.
+
+    Prompts for the same adapter, max_tokens and temperature that arrive
+    within GENERATE_BATCH_DELAY_SECONDS of the first one are sent as one
+    /v1/completions request.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the batcher."""
+        self._pending: dict[tuple[Any, ...], list[tuple[str, asyncio.Future[str]]]] = {}
+        self._timers: dict[tuple[Any, ...], asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def generate(
+        self,
+        lexora: LexoraAdapter,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> str:
+        """Generate text, batched with other concurrent calls.
+
+        Args:
+            lexora: Lexora adapter.
+            prompt: Input prompt for generation.
+            max_tokens: Maximum tokens to generate.
+            temperature: Sampling temperature.
+
+        Returns:
+            Generated text.
+        """
+        loop = asyncio.get_running_loop()
+        key = (lexora, max_tokens, temperature)
+        future: asyncio.Future[str] = loop.create_future()
+
+        batch = self._pending.setdefault(key, [])
+        batch.append((prompt, future))
+        if len(batch) >= GENERATE_BATCH_SIZE:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(GENERATE_BATCH_DELAY_SECONDS, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: tuple[Any, ...]) -> None:
+        """Send the pending batch for a key."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.create_task(self._send(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self, key: tuple[Any, ...], batch: list[tuple[str, asyncio.Future[str]]]
+    ) -> None:
+        """Generate a batch and resolve its callers' futures."""
+        lexora, max_tokens, temperature = key
+        prompts = [prompt for prompt, _ in batch]
+        results: Sequence[str | BaseException]
+        try:
+            if len(prompts) == 1:
+                results = [await lexora.generate(prompts[0], max_tokens, temperature)]
+            else:
+                try:
+                    results = await lexora.generate_batch(prompts, max_tokens, temperature)
+                except (httpx.HTTPStatusError, ValueError) as e:
+                    # Servers without prompt-list support get one request each;
+                    # a failing prompt only fails its own caller
+                    logger.warning("Batched generation rejected", error=str(e))
+                    results = await asyncio.gather(
+                        *(lexora.generate(prompt, max_tokens, temperature) for prompt in prompts),
+                        return_exceptions=True,
+                    )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_generation_batcher = _GenerationBatcher()
+
+
+async def generate_batched(
+    lexora: LexoraAdapter,
+    prompt: str,
+    max_tokens: int,
+    temperature: float,
+) -> str:
+    """Generate text, coalescing concurrent calls into batched Lexora requests.
+
+    Args:
+        lexora: Lexora adapter.
+        prompt: Input prompt for generation.
+        max_tokens: Maximum tokens to generate.
+        temperature: Sampling temperature.
+
+    Returns:
+        Generated text.
+    """
+    return await _generation_batcher.generate(lexora, prompt, max_tokens, temperature)
+
+
+def _shingles(text: str) -> set[str]:
+    """Get the set of lowercased character trigrams of a text."""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(max(len(text) - 2, 1))}
+
+
+def _drop_near_duplicates(
+    chunks: list[tuple[float, int, str, dict[str, Any]]],
+) -> list[tuple[float, int, str, dict[str, Any]]]:
+    """Drop chunks that nearly duplicate an earlier chunk.
+
+    Similarity is the Jaccard index of character trigrams, which works
+    for text without word separators such as Japanese.
+
+    Args:
+        chunks: (score, tokens, content, source) tuples, most relevant first.
+
+    Returns:
+        The chunks to keep, in the same order.
+    """
+    kept = []
+    kept_shingles: list[set[str]] = []
+
+    for chunk in chunks:
+        shingles = _shingles(chunk[2])
+        if any(
+            len(shingles & other) >= NEAR_DUPLICATE_SIMILARITY * len(shingles | other)
+            for other in kept_shingles
+        ):
+            continue
+        kept.append(chunk)
+        kept_shingles.append(shingles)
+
+    return kept
+
+
+def _assemble_context(
+    results: Sequence[dict[str, Any]], budget: int
+) -> tuple[str, list[dict[str, Any]], int]:
+    """Build the generation context from knowledge search results.
+
+    Dedupes the results on their content, drops near-duplicates of more
+    relevant results and packs the most relevant ones that fit in the
+    token budget. If even the most relevant entry exceeds
+    the budget, it is returned alone so the caller can compress it.
+
+    Args:
+        results: Knowledge search results.
+        budget: Maximum context tokens.
+
+    Returns:
+        Tuple of (context, sources of the packed entries, total tokens of
+        all deduped entries).
+    """
+    # Dedupe on the full content; str caches its own hash, so set
+    # membership costs one pass over each entry
+    seen_content: set[str] = set()
+    chunks: list[tuple[float, int, str, dict[str, Any]]] = []
+
+    for entry in results:
+        content = entry.get("content", "")
+
+        if content and content not in seen_content:
+            seen_content.add(content)
+            source = {
+                "id": entry.get("id", entry.get("knowledge_id", "")),
+                "score": entry.get("score", entry.get("similarity", 0.0)),
+            }
+            chunks.append((source["score"] or 0.0, count_chunk_tokens(content), content, source))
+
+    chunks.sort(key=lambda chunk: chunk[0], reverse=True)
+    chunks = _drop_near_duplicates(chunks)
+    total_tokens = sum(tokens for _, tokens, _, _ in chunks)
+
+    context_parts = []
+    sources = []
+    packed_tokens = 0
+
+    for _, tokens, content, source in chunks:
+        if packed_tokens + tokens > budget:
+            break
+        packed_tokens += tokens
+        context_parts.append(content)
+        sources.append(source)
+
+    if chunks and not context_parts:
+        _, _, content, source = chunks[0]
+        return content, [source], total_tokens
+
+    return "\n\n---\n\n".join(context_parts), sources, total_tokens
+
 
 def register_tools(mcp: FastMCP, settings: Settings) -> None:
     """Register generation tools with the MCP server.
@@ -44,13 +379,15 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         system_prompt: str = "",
         compress_context: bool = True,
         user: str = "",
+        bypass_cache: bool = False,
     ) -> dict[str, Any]:
         """Generate content using RAG-enhanced context from the knowledge base.
 
         USE THIS WHEN: you need to generate content (text, code, explanations)
         that should be grounded in existing knowledge. This tool:
         - Searches relevant knowledge from Prismind
-        - Optionally compresses context via Cognilens to fit token budgets
+        - Packs the most relevant entries into the context token budget
+        - Optionally compresses an entry via Cognilens if none fits
         - Generates output via Lexora with the enriched context
 
         DO NOT USE WHEN:
@@ -68,13 +405,16 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
             category: Optional category filter for knowledge search.
             project: Optional project filter for knowledge search.
             system_prompt: Optional system prompt for generation.
-            compress_context: Whether to compress context if too large.
+            compress_context: Whether to compress the most relevant entry when
+                it alone exceeds max_context_tokens.
             user: User identifier for multi-user support (auto-detected if empty).
+            bypass_cache: Skip the knowledge search and compression caches.
 
         Returns:
             Dict containing:
             - generated: The generated content
             - context_used: Summary of context that was used
+            - strategy: "packed" or "compressed"
             - sources: List of knowledge sources referenced
             - tokens: Token usage breakdown
         """
@@ -89,76 +429,91 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
             context_query = task
 
         # Step 1: Search for relevant context via Prismind
-        prismind = PrismindAdapter(
-            sse_url=_settings.prismind_url,
-            timeout=_settings.prismind_timeout,
-        )
+        prismind = _get_prismind(_settings)
 
-        logger.info(
-            "Searching for context",
-            query=context_query[:50],
-            category=category,
-            user=effective_user,
-        )
-
-        search_results = await prismind.search_knowledge(
-            query=context_query,
-            category=category,
-            project=project,
-            limit=10,
-            user=effective_user,
-        )
-
-        # Collect and dedupe context
-        seen_content = set()
-        context_parts = []
-        sources = []
-
-        for entry in search_results:
-            content = entry.get("content", "")
-            content_hash = hash(content[:200])
-
-            if content_hash not in seen_content and content:
-                seen_content.add(content_hash)
-                context_parts.append(content)
-                sources.append({
-                    "id": entry.get("id", entry.get("knowledge_id", "")),
-                    "score": entry.get("score", entry.get("similarity", 0.0)),
-                })
-
-        combined_context = "\n\n---\n\n".join(context_parts)
-        original_context_tokens = len(combined_context) // 4
-
-        # Step 2: Compress context if needed
-        final_context = combined_context
-        context_compressed = False
-
-        if compress_context and original_context_tokens > max_context_tokens:
-            cognilens = CognilensAdapter(
-                sse_url=_settings.cognilens_url,
-                timeout=_settings.cognilens_timeout,
-            )
-
-            logger.info(
-                "Compressing context",
-                original_tokens=original_context_tokens,
-                target_tokens=max_context_tokens,
-            )
-
-            final_context = await cognilens.optimize_context(
-                context=combined_context,
-                task_description=f"Compress context relevant to: {task}",
-                target_tokens=max_context_tokens,
+        # Stage metrics, logged once when generation completes
+        metrics: dict[str, Any] = {
+            "query": context_query[:50],
+            "category": category,
+            "user": effective_user,
+        }
+        start = time.monotonic()
+
+        # Open the pooled Lexora keep-alive connection while the search runs
+        # if it is not open yet, so generation does not pay the connection setup
+        lexora = _get_lexora(_settings)
+        warm_up = None
+        if not lexora.connected:
+            warm_up = asyncio.create_task(lexora.health_check())
+
+        search_results: Sequence[dict[str, Any]]
+        try:
+            if _settings.rag_cache_enabled and not bypass_cache:
+                search_results = await _cached_search(
+                    prismind,
+                    query=context_query,
+                    category=category,
+                    project=project,
+                    limit=10,
+                    user=effective_user,
+                )
+            else:
+                search_results = await prismind.search_knowledge(
+                    query=context_query,
+                    category=category,
+                    project=project,
+                    limit=10,
+                    user=effective_user,
+                )
+            metrics["search_ms"] = round((time.monotonic() - start) * 1000, 2)
+
+            # Step 2: Assemble the context off the event loop, compressing it
+            # only if the most relevant entry alone exceeds the budget
+            final_context, sources, original_context_tokens = await asyncio.to_thread(
+                _assemble_context, search_results, max_context_tokens
             )
-            context_compressed = True
-
-        final_context_tokens = len(final_context) // 4
-
-        # Step 3: Build prompt and generate via Lexora
-        lexora = LexoraAdapter(
-            base_url=_settings.lexora_url,
-            timeout=_settings.lexora_timeout,
-        )
+            context_compressed = False
+            strategy = "packed"
+
+            # Packed context never exceeds the budget except for separators, so
+            # only a single oversized entry needs compressing
+            oversized = len(sources) == 1 and count_tokens(final_context) > max_context_tokens
+
+            if compress_context and oversized:
+                cognilens = _get_cognilens(_settings)
+                start = time.monotonic()
+
+                task_description = f"Compress context relevant to: {task}"
+                if bypass_cache:
+                    final_context = await cognilens.optimize_context(
+                        context=final_context,
+                        task_description=task_description,
+                        target_tokens=max_context_tokens,
+                    )
+                else:
+                    final_context = await _cached_compress(
+                        cognilens,
+                        context=final_context,
+                        task_description=task_description,
+                        target_tokens=max_context_tokens,
+                    )
+                context_compressed = True
+                strategy = "compressed"
+                metrics["compress_ms"] = round((time.monotonic() - start) * 1000, 2)
+
+            final_context_tokens = count_tokens(final_context)
+
+            # Short contexts are returned as is; only long ones are copied
+            context_used = final_context
+            if len(final_context) > 500:
+                context_used = final_context[:500] + "..."
+
+            # Step 3: Build prompt and generate via Lexora
+            if warm_up is not None:
+                await asyncio.gather(warm_up, return_exceptions=True)
+        finally:
+            if warm_up is not None:
+                warm_up.cancel()
 
         # Build the full prompt
         if final_context:
@@ -173,39 +528,45 @@ Task: {task}"""
             prompt = task
 
         # Add system prompt if provided
+        start = time.monotonic()
         if system_prompt:
             messages = [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ]
-            logger.info(
-                "Generating with chat",
-                prompt_length=len(prompt),
-                max_tokens=max_output_tokens,
-            )
             generated = await lexora.chat(
                 messages=messages,
                 max_tokens=max_output_tokens,
                 temperature=temperature,
             )
         else:
-            logger.info(
-                "Generating content",
-                prompt_length=len(prompt),
-                max_tokens=max_output_tokens,
-            )
-            generated = await lexora.generate(
+            generated = await _generation_batcher.generate(
+                lexora,
                 prompt=prompt,
                 max_tokens=max_output_tokens,
                 temperature=temperature,
             )
 
-        output_tokens = len(generated) // 4
+        metrics["generate_ms"] = round((time.monotonic() - start) * 1000, 2)
+
+        output_tokens = count_tokens(generated)
+
+        logger.info(
+            "Generation completed",
+            **metrics,
+            sources=len(sources),
+            strategy=strategy,
+            prompt_length=len(prompt),
+            max_tokens=max_output_tokens,
+            context_tokens=final_context_tokens,
+            output_tokens=output_tokens,
+        )
 
         return {
             "generated": generated,
-            "context_used": final_context[:500] + "..." if len(final_context) > 500 else final_context,
+            "context_used": context_used,
             "context_compressed": context_compressed,
+            "strategy": strategy,
             "sources": sources,
             "tokens": {
                 "context_original": original_context_tokens,
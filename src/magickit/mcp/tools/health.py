@@ -6,7 +6,9 @@ Provides unified health status for all Spirrow Platform services.
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
+import copy
+import time
+from datetime import UTC, datetime
 from typing import Any
 
 from fastmcp import FastMCP
@@ -14,6 +16,8 @@ from fastmcp import FastMCP
 from magickit.adapters.cognilens import CognilensAdapter
 from magickit.adapters.prismind import PrismindAdapter
 from magickit.adapters.lexora import LexoraAdapter
+from magickit.adapters.mcp_base import MCPBaseAdapter
+from magickit.adapters.pool import get_adapter
 from magickit.config import Settings
 from magickit.utils.logging import get_logger
 
@@ -22,6 +26,24 @@ logger = get_logger(__name__)
 # Module-level settings reference
 _settings: Settings | None = None
 
+# Last service_health result and when it was taken (time.monotonic()), so
+# bursts of polling callers share one round of checks
+HEALTH_CACHE_TTL_SECONDS = 2.0
+_health_cache: tuple[float, dict[str, Any]] | None = None
+
+# ISO timestamp of the current second, reused by checks within that second
+_ts_cache: tuple[int, str] = (0, "")
+
+HealthAdapterClass = type[CognilensAdapter] | type[PrismindAdapter] | type[LexoraAdapter]
+
+# Services checked by service_health: (name, adapter class, URL setting,
+# timeout setting). Tools are listed for MCP services.
+_HEALTH_TARGETS: list[tuple[str, HealthAdapterClass, str, str]] = [
+    ("cognilens", CognilensAdapter, "cognilens_url", "cognilens_timeout"),
+    ("prismind", PrismindAdapter, "prismind_url", "prismind_timeout"),
+    ("lexora", LexoraAdapter, "lexora_url", "lexora_timeout"),
+]
+
 
 def register_tools(mcp: FastMCP, settings: Settings) -> None:
     """Register health tools with the MCP server.
@@ -34,7 +56,7 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
     _settings = settings
 
     @mcp.tool()
-    async def service_health() -> dict[str, Any]:
+    async def service_health(force: bool = False) -> dict[str, Any]:
         """Check health status of all Spirrow Platform services in a single call.
 
         USE THIS WHEN: you need to verify service availability before operations,
@@ -44,34 +66,44 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         - You only need to check one specific service → just call that service directly
         - You're in the middle of an operation that already confirmed connectivity
 
+        Args:
+            force: Check the services even if a result from the last two
+                seconds is available.
+
         Returns:
             Health status for each service including:
             - status: "healthy", "degraded", or "unhealthy"
             - services: Individual service statuses with response times
+              (tools_error is set if a service is up but listing its tools failed)
             - timestamp: When the check was performed
         """
         if _settings is None:
             raise RuntimeError("Settings not initialized")
 
+        global _health_cache
+        if (
+            not force
+            and _health_cache is not None
+            and time.monotonic() - _health_cache[0] < HEALTH_CACHE_TTL_SECONDS
+        ):
+            return copy.deepcopy(_health_cache[1])
+
         results: dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _utc_timestamp(),
             "services": {},
             "status": "healthy",
         }
 
         # Check all services concurrently
         checks = await asyncio.gather(
-            _check_cognilens(_settings),
-            _check_prismind(_settings),
-            _check_lexora(_settings),
+            *(_check_one(_settings, target) for target in _HEALTH_TARGETS),
             return_exceptions=True,
         )
 
-        service_names = ["cognilens", "prismind", "lexora"]
         healthy_count = 0
 
-        for name, result in zip(service_names, checks):
-            if isinstance(result, Exception):
+        for (name, *_), result in zip(_HEALTH_TARGETS, checks):
+            if isinstance(result, BaseException):
                 results["services"][name] = {
                     "status": "error",
                     "error": str(result),
@@ -82,7 +114,7 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
                     healthy_count += 1
 
         # Determine overall status
-        if healthy_count == len(service_names):
+        if healthy_count == len(_HEALTH_TARGETS):
             results["status"] = "healthy"
         elif healthy_count > 0:
             results["status"] = "degraded"
@@ -95,102 +127,74 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
             healthy_count=healthy_count,
         )
 
+        # Callers get their own copies so none can change what the others see
+        _health_cache = (time.monotonic(), copy.deepcopy(results))
         return results
 
 
-async def _check_cognilens(settings: Settings) -> dict[str, Any]:
-    """Check Cognilens service health."""
-    start = asyncio.get_event_loop().time()
-    try:
-        adapter = CognilensAdapter(
-            sse_url=settings.cognilens_url,
-            timeout=settings.cognilens_timeout,
-        )
-        healthy = await adapter.health_check()
-        elapsed = asyncio.get_event_loop().time() - start
-
-        if healthy:
-            tools = await adapter.list_tools()
-            return {
-                "status": "healthy",
-                "response_time_ms": round(elapsed * 1000, 2),
-                "url": settings.cognilens_url,
-                "available_tools": tools,
-            }
-        else:
-            return {
-                "status": "unhealthy",
-                "response_time_ms": round(elapsed * 1000, 2),
-                "url": settings.cognilens_url,
-                "error": "Health check returned false",
-            }
-    except Exception as e:
-        elapsed = asyncio.get_event_loop().time() - start
-        return {
-            "status": "error",
-            "response_time_ms": round(elapsed * 1000, 2),
-            "url": settings.cognilens_url,
-            "error": str(e),
-        }
-
+def _utc_timestamp() -> str:
+    """Get the current UTC time as an ISO 8601 string, at second resolution."""
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, datetime.fromtimestamp(now, tz=UTC).isoformat())
+    return _ts_cache[1]
 
-async def _check_prismind(settings: Settings) -> dict[str, Any]:
-    """Check Prismind service health."""
-    start = asyncio.get_event_loop().time()
-    try:
-        adapter = PrismindAdapter(
-            sse_url=settings.prismind_url,
-            timeout=settings.prismind_timeout,
-        )
-        healthy = await adapter.health_check()
-        elapsed = asyncio.get_event_loop().time() - start
 
-        if healthy:
-            tools = await adapter.list_tools()
-            return {
-                "status": "healthy",
-                "response_time_ms": round(elapsed * 1000, 2),
-                "url": settings.prismind_url,
-                "available_tools": tools,
-            }
-        else:
-            return {
-                "status": "unhealthy",
-                "response_time_ms": round(elapsed * 1000, 2),
-                "url": settings.prismind_url,
-                "error": "Health check returned false",
-            }
-    except Exception as e:
-        elapsed = asyncio.get_event_loop().time() - start
-        return {
-            "status": "error",
-            "response_time_ms": round(elapsed * 1000, 2),
-            "url": settings.prismind_url,
-            "error": str(e),
-        }
+async def _check_one(
+    settings: Settings, target: tuple[str, HealthAdapterClass, str, str]
+) -> dict[str, Any]:
+    """Check one service's health.
 
+    Args:
+        settings: Application settings.
+        target: Entry of _HEALTH_TARGETS describing the service.
 
-async def _check_lexora(settings: Settings) -> dict[str, Any]:
-    """Check Lexora service health."""
+    Returns:
+        Status, response time and URL of the service, plus its tools for
+        services that list them.
+    """
+    _, adapter_cls, url_attr, timeout_attr = target
+    url = getattr(settings, url_attr)
     start = asyncio.get_event_loop().time()
     try:
-        adapter = LexoraAdapter(
-            base_url=settings.lexora_url,
-            timeout=settings.lexora_timeout,
+        adapter: CognilensAdapter | PrismindAdapter | LexoraAdapter = get_adapter(
+            adapter_cls, url, getattr(settings, timeout_attr)
         )
-        healthy = await adapter.health_check()
+        healthy: bool | BaseException
+        tools: list[str] | BaseException = []
+        if isinstance(adapter, MCPBaseAdapter):
+            # List tools alongside the health check rather than after it
+            healthy, tools = await asyncio.gather(
+                adapter.health_check(), adapter.list_tools(), return_exceptions=True
+            )
+            if isinstance(healthy, BaseException):
+                raise healthy
+        else:
+            healthy = await adapter.health_check()
         elapsed = asyncio.get_event_loop().time() - start
 
-        return {
+        result: dict[str, Any] = {
             "status": "healthy" if healthy else "unhealthy",
             "response_time_ms": round(elapsed * 1000, 2),
-            "url": settings.lexora_url,
+            "url": url,
         }
+        if isinstance(adapter, MCPBaseAdapter):
+            if healthy:
+                if isinstance(tools, BaseException):
+                    # A broken tool listing is not a service with zero tools
+                    result["available_tools"] = []
+                    result["tools_error"] = str(tools)
+                else:
+                    result["available_tools"] = tools
+            else:
+                result["error"] = "Health check returned false"
+        return result
     except Exception as e:
         elapsed = asyncio.get_event_loop().time() - start
         return {
             "status": "error",
             "response_time_ms": round(elapsed * 1000, 2),
-            "url": settings.lexora_url,
+            "url": url,
             "error": str(e),
         }
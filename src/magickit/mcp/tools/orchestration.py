@@ -6,7 +6,18 @@ Provides intelligent routing and multi-step workflow execution across services.
 from __future__ import annotations
 
 import asyncio
+import copy
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from contextlib import nullcontext
 from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
 from fastmcp import FastMCP
@@ -14,16 +25,71 @@ from fastmcp import FastMCP
 from magickit.adapters.cognilens import CognilensAdapter
 from magickit.adapters.prismind import PrismindAdapter
 from magickit.adapters.lexora import LexoraAdapter
+from magickit.adapters.pool import get_adapter
 from magickit.config import Settings
 from magickit.mcp.tools.document import smart_create_document_impl
+from magickit.mcp.tools.generation import generate_batched
+from magickit.utils import fastjson
+from magickit.utils.cache import PersistentAsyncCache
 from magickit.utils.logging import get_logger
 from magickit.utils.user import get_current_user
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - pyahocorasick is an optional accelerator
+    ahocorasick = None
+
 logger = get_logger(__name__)
 
+# Stdlib logger behind `logger`, used to skip building disabled debug events
+_stdlib_logger = logging.getLogger(__name__)
+
 # Module-level settings reference
 _settings: Settings | None = None
 
+# Per-service limits on concurrently executing workflow steps
+_service_semaphores: dict[str, asyncio.Semaphore] = {}
+
+# LRU cache of step outputs, keyed by a digest of the call. Entries are
+# deep-copied in and out so callers cannot mutate cached outputs.
+STEP_CACHE_SIZE = 256
+STEP_CACHE_TTL_SECONDS = 60.0
+_step_cache: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+
+# Cognilens text transformations, whose outputs depend only on their params.
+# Prismind reads are excluded: they depend on the knowledge base, which
+# earlier steps may have just changed.
+_CACHEABLE_ACTIONS = frozenset({
+    ("cognilens", "compress"),
+    ("cognilens", "summarize"),
+    ("cognilens", "extract_essence"),
+    ("cognilens", "optimize"),
+})
+
+# LRU cache of Lexora task classifications, keyed by a digest of the request
+CLASSIFICATION_CACHE_SIZE = 1024
+CLASSIFICATION_CACHE_TTL_SECONDS = 300.0
+_classification_cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+_classification_cache_stats = {"hits": 0, "similar_hits": 0, "persisted_hits": 0, "misses": 0}
+
+# Persistent tier of the classification cache, so routing stays warm across
+# restarts. Set up in register_tools.
+CLASSIFICATION_PERSISTED_TTL_SECONDS = 86400.0
+_classification_memo: PersistentAsyncCache | None = None
+
+# Recent classifications reused for near-identical rewordings of a request,
+# as (cached_at, trigrams, routing keywords, classification). Only requests
+# with the same routing keywords match, since a single changed verb can
+# change the task type without moving the trigram similarity much.
+SIMILAR_CLASSIFICATION_CACHE_SIZE = 512
+SIMILAR_CLASSIFICATION_THRESHOLD = 0.92
+_similar_classifications: deque[
+    tuple[float, frozenset[str], frozenset[str], dict[str, Any]]
+] = deque(maxlen=SIMILAR_CLASSIFICATION_CACHE_SIZE)
+
+# Classifications below this confidence are not cached
+MIN_CACHED_CONFIDENCE = 0.5
+
 
 class ServiceType(str, Enum):
     """Available service types."""
@@ -53,9 +119,20 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         mcp: FastMCP server instance.
         settings: Application settings.
     """
-    global _settings
+    global _settings, _classification_memo
     _settings = settings
 
+    _classification_memo = PersistentAsyncCache(
+        Path(settings.cache_dir) / "classification.db",
+        namespace="task_classification",
+    )
+
+    _service_semaphores.clear()
+    for service in ("prismind", "cognilens", "lexora"):
+        limit = getattr(settings, f"{service}_max_concurrent", None)
+        if isinstance(limit, int) and limit > 0:
+            _service_semaphores[service] = asyncio.Semaphore(limit)
+
     @mcp.tool()
     async def intelligent_route(
         request: str,
@@ -99,13 +176,11 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
 
         # Try Lexora's LLM-based task classification
         try:
-            adapter = LexoraAdapter(_settings.lexora_url, _settings.lexora_timeout)
-            async with adapter:
-                classification = await adapter.classify_task(request)
+            classification = await _classify_request(request, _settings)
 
             recommended_service = _map_classification_to_service(
                 classification["task_type"],
-                available_services,
+                tuple(available_services),
             )
 
             recommendations = {
@@ -122,6 +197,7 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
                 request_preview=request[:50],
                 recommended=recommended_service,
                 task_type=classification["task_type"],
+                cache_stats=_classification_cache_stats,
             )
 
         except Exception as e:
@@ -183,7 +259,8 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         Returns:
             Dict containing:
             - status: "completed", "partial", or "failed"
-            - results: Results from each step
+            - results: Results from each step ("cancelled" for steps aborted
+              by stop_on_error)
             - outputs: Named outputs (from output_key) for use in subsequent processing
             - errors: Any errors encountered
             - execution_time_ms: Total execution time
@@ -206,7 +283,7 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         # Auto-detect user if not specified
         effective_user = user or get_current_user()
 
-        start_time = asyncio.get_event_loop().time()
+        start_ns = time.perf_counter_ns()
 
         # Initialize tracking
         results: list[dict[str, Any]] = [{"status": "pending"} for _ in steps]
@@ -223,47 +300,51 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
             user=effective_user,
         )
 
-        # Execute steps
-        for batch in execution_order:
-            if len(batch) == 1:
-                # Single step
-                idx = batch[0]
+        # Run each step as soon as the steps it waits for have finished,
+        # rather than waiting for the whole previous batch
+        waits_for = _build_step_waits(steps, execution_order, bool(parallel_groups))
+        stop = asyncio.Event()
+        step_tasks: dict[int, asyncio.Task[None]] = {}
+
+        async def run_step(idx: int) -> None:
+            try:
+                await asyncio.gather(*(step_tasks[d] for d in waits_for[idx]))
+                if stop.is_set():
+                    results[idx] = {"status": "cancelled"}
+                    return
                 result = await _execute_step(
                     steps[idx], idx, outputs, _settings, effective_user
                 )
-                results[idx] = result
-
-                if result["status"] == "error":
-                    errors.append({"step": idx, "error": result.get("error", "Unknown error")})
-                    if stop_on_error:
-                        break
-                elif result.get("output_key"):
-                    outputs[result["output_key"]] = result.get("output")
-            else:
-                # Parallel batch
-                tasks = [
-                    _execute_step(steps[idx], idx, outputs, _settings, effective_user)
-                    for idx in batch
-                ]
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                for idx, result in zip(batch, batch_results):
-                    if isinstance(result, Exception):
-                        results[idx] = {"status": "error", "error": str(result)}
-                        errors.append({"step": idx, "error": str(result)})
-                        if stop_on_error:
-                            break
-                    else:
-                        results[idx] = result
-                        if result["status"] == "error":
-                            errors.append({"step": idx, "error": result.get("error")})
-                            if stop_on_error:
-                                break
-                        elif result.get("output_key"):
-                            outputs[result["output_key"]] = result.get("output")
-
-                if stop_on_error and errors:
-                    break
+            except asyncio.CancelledError:
+                results[idx] = {"status": "cancelled"}
+                raise
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            results[idx] = result
+
+            if result["status"] == "error":
+                errors.append({"step": idx, "error": result.get("error", "Unknown error")})
+                if stop_on_error:
+                    # Abort steps still in flight instead of paying for them
+                    stop.set()
+                    current = asyncio.current_task()
+                    for task in step_tasks.values():
+                        if task is not current:
+                            task.cancel()
+            elif result.get("output_key"):
+                outputs[result["output_key"]] = result.get("output")
+
+        for batch in execution_order:
+            for idx in batch:
+                if idx not in step_tasks:
+                    step_tasks[idx] = asyncio.create_task(run_step(idx))
+
+        await asyncio.gather(*step_tasks.values(), return_exceptions=True)
+        # Tasks cancelled before they started never reached their handler
+        for idx, task in step_tasks.items():
+            if task.cancelled() and results[idx]["status"] == "pending":
+                results[idx] = {"status": "cancelled"}
+        errors.sort(key=lambda error: error["step"])
 
         # Determine overall status
         completed_count = sum(1 for r in results if r["status"] == "completed")
@@ -274,42 +355,171 @@ def register_tools(mcp: FastMCP, settings: Settings) -> None:
         else:
             status = "failed"
 
-        elapsed = asyncio.get_event_loop().time() - start_time
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
         return {
             "status": status,
             "results": results,
             "outputs": outputs,
             "errors": errors,
-            "execution_time_ms": round(elapsed * 1000, 2),
+            "execution_time_ms": round(elapsed_ms, 2),
         }
 
 
+def _get_prismind(settings: Settings) -> PrismindAdapter:
+    """Get the shared Prismind adapter."""
+    return get_adapter(PrismindAdapter, settings.prismind_url, settings.prismind_timeout)
+
+
+def _get_cognilens(settings: Settings) -> CognilensAdapter:
+    """Get the shared Cognilens adapter."""
+    return get_adapter(CognilensAdapter, settings.cognilens_url, settings.cognilens_timeout)
+
+
+def _get_lexora(settings: Settings) -> LexoraAdapter:
+    """Get the shared Lexora adapter."""
+    return get_adapter(LexoraAdapter, settings.lexora_url, settings.lexora_timeout)
+
+
+async def _classify_request(request: str, settings: Settings) -> dict[str, Any]:
+    """Classify a request with Lexora, serving repeats from the LRU cache.
+
+    On an exact miss, the persistent memo is checked next. Failing that, a
+    recent classification of a near-identical request (same routing keywords
+    and trigram Jaccard similarity above SIMILAR_CLASSIFICATION_THRESHOLD) is
+    reused before asking Lexora.
+
+    Args:
+        request: The user's request.
+        settings: Application settings.
+
+    Returns:
+        Lexora task classification.
+    """
+    key = hashlib.blake2b(request.encode(), digest_size=16).hexdigest()
+    cached = _classification_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < CLASSIFICATION_CACHE_TTL_SECONDS:
+        _classification_cache.move_to_end(key)
+        _classification_cache_stats["hits"] += 1
+        return cached[1]
+
+    shingles = _request_shingles(request)
+    keywords = frozenset(_match_keywords(request.lower()))
+
+    if _classification_memo is not None:
+        try:
+            memoized = await _classification_memo.get(key)
+        except Exception as e:
+            logger.warning("Classification memo lookup failed", error=str(e))
+            memoized = None
+        if (
+            memoized is not None
+            and time.time() - memoized["ts"] < CLASSIFICATION_PERSISTED_TTL_SECONDS
+        ):
+            classification: dict[str, Any] = memoized["classification"]
+            _classification_cache_stats["persisted_hits"] += 1
+            _remember_classification(key, shingles, keywords, classification)
+            return classification
+
+    similar = _find_similar_classification(shingles, keywords)
+    if similar is not None:
+        _classification_cache_stats["similar_hits"] += 1
+        return similar
+
+    _classification_cache_stats["misses"] += 1
+
+    classification = await _get_lexora(settings).classify_task(request)
+
+    if classification.get("confidence", 0.0) >= MIN_CACHED_CONFIDENCE:
+        _remember_classification(key, shingles, keywords, classification)
+        if _classification_memo is not None:
+            try:
+                await _classification_memo.set(
+                    key, {"ts": time.time(), "classification": classification}
+                )
+            except Exception as e:
+                logger.warning("Failed to memoize classification", error=str(e))
+    return classification
+
+
+def _remember_classification(
+    key: str,
+    shingles: frozenset[str],
+    keywords: frozenset[str],
+    classification: dict[str, Any],
+) -> None:
+    """Store a classification in the in-memory caches."""
+    now = time.monotonic()
+    _classification_cache[key] = (now, classification)
+    _classification_cache.move_to_end(key)
+    while len(_classification_cache) > CLASSIFICATION_CACHE_SIZE:
+        _classification_cache.popitem(last=False)
+    _similar_classifications.append((now, shingles, keywords, classification))
+
+
+def _request_shingles(request: str) -> frozenset[str]:
+    """Get the character trigrams of a request with case and spacing normalized."""
+    text = " ".join(request.lower().split())
+    return frozenset(text[i : i + 3] for i in range(max(len(text) - 2, 1)))
+
+
+def _find_similar_classification(
+    shingles: frozenset[str], keywords: frozenset[str]
+) -> dict[str, Any] | None:
+    """Find the most similar recent classification above the threshold.
+
+    Args:
+        shingles: Trigrams of the request being classified.
+        keywords: Routing keywords of the request; candidates must match them.
+
+    Returns:
+        The cached classification, or None if no recent request is similar enough.
+    """
+    cutoff = time.monotonic() - CLASSIFICATION_CACHE_TTL_SECONDS
+    best_score = SIMILAR_CLASSIFICATION_THRESHOLD
+    best = None
+    for cached_at, other, other_keywords, classification in reversed(_similar_classifications):
+        if cached_at < cutoff:
+            break
+        if other_keywords != keywords:
+            continue
+        union = len(shingles | other)
+        score = len(shingles & other) / union if union else 0.0
+        if score >= best_score:
+            best_score = score
+            best = classification
+    return best
+
+
+# Service for each Lexora task_type
+_TASK_TYPE_TO_SERVICE = MappingProxyType({
+    "code": "lexora",
+    "reasoning": "lexora",
+    "analysis": "lexora",
+    "summarization": "cognilens",
+    "translation": "lexora",
+    "simple_qa": "lexora",
+    "general": "lexora",
+    "search": "prismind",
+    "retrieval": "prismind",
+})
+
+
+@lru_cache(maxsize=64)
 def _map_classification_to_service(
     task_type: str,
-    available_services: list[str],
+    available_services: tuple[str, ...],
 ) -> str:
     """Map Lexora task_type to service name.
 
     Args:
         task_type: Task type from Lexora classification.
-        available_services: List of available services.
+        available_services: Available services.
 
     Returns:
         Recommended service name.
     """
-    mapping = {
-        "code": "lexora",
-        "reasoning": "lexora",
-        "analysis": "lexora",
-        "summarization": "cognilens",
-        "translation": "lexora",
-        "simple_qa": "lexora",
-        "general": "lexora",
-        "search": "prismind",
-        "retrieval": "prismind",
-    }
-    service = mapping.get(task_type, "lexora")
+    service = _TASK_TYPE_TO_SERVICE.get(task_type, "lexora")
 
     # Ensure the service is available
     if service not in available_services:
@@ -321,6 +531,51 @@ def _map_classification_to_service(
     return service
 
 
+# ${output_key} references to previous step outputs in step params
+_OUTPUT_REF_RE = re.compile(r"\$\{([^}]+)\}")
+
+# Keyword patterns for each action, in priority order
+_SEARCH_KEYWORDS = frozenset({"search", "find", "look for", "query", "retrieve", "knowledge"})
+_COMPRESS_KEYWORDS = frozenset({"compress", "shorten", "reduce", "condense", "fit", "token"})
+_SUMMARIZE_KEYWORDS = frozenset({"summarize", "summary", "tldr", "brief", "overview"})
+_GENERATE_KEYWORDS = frozenset({"generate", "create", "write", "compose", "draft"})
+_ANALYZE_KEYWORDS = frozenset({"analyze", "extract", "understand", "parse", "essence"})
+_STORE_KEYWORDS = frozenset({"store", "save", "add", "index", "remember"})
+
+# Action values in priority order; plain strings so routing avoids enum lookups
+_ACTION_KEYWORDS = (
+    (ActionType.COMPRESS.value, _COMPRESS_KEYWORDS),
+    (ActionType.SUMMARIZE.value, _SUMMARIZE_KEYWORDS),
+    (ActionType.GENERATE.value, _GENERATE_KEYWORDS),
+    (ActionType.ANALYZE.value, _ANALYZE_KEYWORDS),
+    (ActionType.STORE.value, _STORE_KEYWORDS),
+)
+
+# Keywords scored for each service
+_SERVICE_KEYWORDS = {
+    "prismind": _SEARCH_KEYWORDS | _STORE_KEYWORDS,
+    "cognilens": _COMPRESS_KEYWORDS | _SUMMARIZE_KEYWORDS | _ANALYZE_KEYWORDS,
+    "lexora": _GENERATE_KEYWORDS,
+}
+
+_ALL_KEYWORDS = frozenset().union(*_SERVICE_KEYWORDS.values())
+
+# With pyahocorasick, all keywords are found in one scan of the request
+_KEYWORD_AUTOMATON: Any = None
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _ALL_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_keyword, _keyword)
+    _KEYWORD_AUTOMATON.make_automaton()
+
+
+def _match_keywords(request: str) -> set[str]:
+    """Find the routing keywords that occur in a request as substrings."""
+    if _KEYWORD_AUTOMATON is not None:
+        return {keyword for _, keyword in _KEYWORD_AUTOMATON.iter(request)}
+    return {k for k in _ALL_KEYWORDS if k in request}
+
+
 def _analyze_request(
     request: str,
     context: str,
@@ -328,40 +583,29 @@ def _analyze_request(
 ) -> dict[str, Any]:
     """Analyze a request and determine routing recommendations (heuristic fallback)."""
 
-    # Keyword patterns for each service/action
-    search_keywords = ["search", "find", "look for", "query", "retrieve", "knowledge"]
-    compress_keywords = ["compress", "shorten", "reduce", "condense", "fit", "token"]
-    summarize_keywords = ["summarize", "summary", "tldr", "brief", "overview"]
-    generate_keywords = ["generate", "create", "write", "compose", "draft"]
-    analyze_keywords = ["analyze", "extract", "understand", "parse", "essence"]
-    store_keywords = ["store", "save", "add", "index", "remember"]
+    # Find every keyword in one pass; keywords match as substrings
+    matched = _match_keywords(request)
 
     # Calculate keyword matches
     scores = {
-        "prismind": sum(1 for k in search_keywords + store_keywords if k in request),
-        "cognilens": sum(1 for k in compress_keywords + summarize_keywords + analyze_keywords if k in request),
-        "lexora": sum(1 for k in generate_keywords if k in request),
+        service: len(matched & keywords)
+        for service, keywords in _SERVICE_KEYWORDS.items()
+        if service in available_services
     }
 
-    # Filter by available services
-    scores = {k: v for k, v in scores.items() if k in available_services}
-
     # Determine action type
-    action = ActionType.SEARCH
-    if any(k in request for k in compress_keywords):
-        action = ActionType.COMPRESS
-    elif any(k in request for k in summarize_keywords):
-        action = ActionType.SUMMARIZE
-    elif any(k in request for k in generate_keywords):
-        action = ActionType.GENERATE
-    elif any(k in request for k in analyze_keywords):
-        action = ActionType.ANALYZE
-    elif any(k in request for k in store_keywords):
-        action = ActionType.STORE
+    action: str = next(
+        (action for action, keywords in _ACTION_KEYWORDS if matched & keywords),
+        ActionType.SEARCH.value,
+    )
+
+    # Rank services once; the stable sort keeps the first service on ties
+    ranked = sorted(scores.items(), key=lambda x: -x[1])
+    top_score = ranked[0][1] if ranked else 0
 
     # Determine recommended service
-    if scores:
-        recommended = max(scores, key=scores.get)
+    if ranked:
+        recommended = ranked[0][0]
     else:
         recommended = "prismind"  # Default to knowledge search
 
@@ -374,7 +618,7 @@ def _analyze_request(
             {"service": "cognilens", "action": "compress", "description": "Compress results"},
         ]
         recommended = "magickit"
-        action = ActionType.ROUTE
+        action = ActionType.ROUTE.value
 
     if scores.get("prismind", 0) > 0 and scores.get("lexora", 0) > 0:
         # RAG pattern
@@ -383,28 +627,24 @@ def _analyze_request(
             {"service": "lexora", "action": "generate", "description": "Generate with context"},
         ]
         recommended = "magickit"
-        action = ActionType.ROUTE
+        action = ActionType.ROUTE.value
 
     # Build alternatives
-    alternatives = [
-        {"service": s, "score": score}
-        for s, score in sorted(scores.items(), key=lambda x: -x[1])
-        if s != recommended
-    ][:2]
+    alternatives = [{"service": s, "score": score} for s, score in ranked if s != recommended][:2]
 
     # Build rationale
     if workflow:
         rationale = f"Complex request requiring multiple services. Recommended workflow: {' → '.join(s['service'] for s in workflow)}"
     else:
-        rationale = f"Request matches {recommended} capabilities with action '{action.value}'"
+        rationale = f"Request matches {recommended} capabilities with action '{action}'"
 
     return {
         "recommended_service": recommended,
-        "recommended_action": action.value,
+        "recommended_action": action,
         "workflow": workflow,
         "rationale": rationale,
         "alternatives": alternatives,
-        "confidence": min(max(scores.values()) / 3, 1.0) if scores else 0.5,
+        "confidence": min(top_score / 3, 1.0) if ranked else 0.5,
     }
 
 
@@ -417,34 +657,111 @@ def _build_execution_order(
     if parallel_groups:
         return parallel_groups
 
-    # Build from dependencies
     n = len(steps)
+    if n == 0:
+        return []
+
+    # Fast paths: fully independent steps, or a strict sequential chain
+    if not any(step.get("depends_on") for step in steps):
+        return [list(range(n))]
+    if not steps[0].get("depends_on") and all(
+        steps[i].get("depends_on") == [i - 1] for i in range(1, n)
+    ):
+        return [[i] for i in range(n)]
+
+    # Build from dependencies, one batch per level (Kahn's algorithm)
+    in_degree = [0] * n
+    successors: list[list[int]] = [[] for _ in steps]
+    for i, step in enumerate(steps):
+        for d in step.get("depends_on", []):
+            successors[d].append(i)
+            in_degree[i] += 1
+
     executed = [False] * n
     order = []
+    batch = [i for i in range(n) if in_degree[i] == 0]
+    scheduled = 0
 
-    while not all(executed):
-        batch = []
-        for i, step in enumerate(steps):
-            if executed[i]:
-                continue
-
-            deps = step.get("depends_on", [])
-            if all(executed[d] for d in deps):
-                batch.append(i)
-
-        if not batch:
-            # Remaining steps have unresolved dependencies
-            remaining = [i for i in range(n) if not executed[i]]
-            order.append(remaining)
-            break
-
+    while batch:
         order.append(batch)
+        scheduled += len(batch)
+        next_batch = []
         for i in batch:
             executed[i] = True
+            for j in successors[i]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    next_batch.append(j)
+        batch = sorted(next_batch)
+
+    if scheduled < n:
+        # Remaining steps have unresolved dependencies
+        order.append([i for i in range(n) if not executed[i]])
 
     return order
 
 
+def _build_step_waits(
+    steps: list[dict[str, Any]],
+    execution_order: list[list[int]],
+    grouped: bool,
+) -> dict[int, list[int]]:
+    """Determine which steps each step must wait for.
+
+    With explicit parallel groups, each step waits for the previous group.
+    Otherwise a step waits for its dependencies in earlier batches;
+    dependencies within the same batch (a cycle) are not waited for.
+
+    Args:
+        steps: Workflow steps.
+        execution_order: Batches from _build_execution_order.
+        grouped: Whether the batches are explicit parallel groups.
+
+    Returns:
+        Mapping of step index to the indices of the steps it waits for.
+    """
+    batch_of: dict[int, int] = {}
+    for b, batch in enumerate(execution_order):
+        for idx in batch:
+            batch_of.setdefault(idx, b)
+
+    waits_for: dict[int, list[int]] = {}
+    for b, batch in enumerate(execution_order):
+        for idx in batch:
+            if idx in waits_for:
+                continue
+            if grouped:
+                waits_for[idx] = [d for d in execution_order[b - 1] if d != idx] if b else []
+            else:
+                waits_for[idx] = [
+                    d for d in steps[idx].get("depends_on", []) if batch_of.get(d, b) < b
+                ]
+    return waits_for
+
+
+def _substitute_outputs(value: Any, outputs: dict[str, Any]) -> Any:
+    """Replace ${output_key} references in a param value.
+
+    A value that is a single reference is replaced by the referenced output
+    itself, keeping its type; references embedded in a longer string are
+    replaced by the output's string form. Unknown references are kept.
+
+    Args:
+        value: Param value.
+        outputs: Outputs of previous steps.
+
+    Returns:
+        The value with references substituted.
+    """
+    if not isinstance(value, str) or "${" not in value:
+        return value
+    if (match := _OUTPUT_REF_RE.fullmatch(value)) and match.group(1) in outputs:
+        return outputs[match.group(1)]
+    return _OUTPUT_REF_RE.sub(
+        lambda m: str(outputs[m.group(1)]) if m.group(1) in outputs else m.group(0), value
+    )
+
+
 async def _execute_step(
     step: dict[str, Any],
     step_idx: int,
@@ -456,25 +773,48 @@ async def _execute_step(
 
     service = step.get("service", "")
     action = step.get("action", "")
-    params = step.get("params", {}).copy()
+    params = step.get("params", {})
     output_key = step.get("output_key")
 
-    # Substitute output references in params
-    for key, value in params.items():
-        if isinstance(value, str) and value.startswith("${") and value.endswith("}"):
-            ref_key = value[2:-1]
-            if ref_key in outputs:
-                params[key] = outputs[ref_key]
-
-    logger.debug(
-        "Executing step",
-        step=step_idx,
-        service=service,
-        action=action,
-    )
+    # Substitute output references in params, copying them only if needed
+    if any(isinstance(value, str) and "${" in value for value in params.values()):
+        params = {key: _substitute_outputs(value, outputs) for key, value in params.items()}
+
+    if _stdlib_logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Executing step",
+            step=step_idx,
+            service=service,
+            action=action,
+        )
 
     try:
-        result = await _call_service(service, action, params, settings, user)
+        cache_key = None
+        if (service, action) in _CACHEABLE_ACTIONS:
+            cache_key = _step_cache_key(service, action, params, user)
+            cached = _step_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < STEP_CACHE_TTL_SECONDS:
+                _step_cache.move_to_end(cache_key)
+                logger.debug("Using cached step output", step=step_idx)
+                return {
+                    "status": "completed",
+                    "output": copy.deepcopy(cached[1]),
+                    "output_key": output_key,
+                }
+
+        semaphore = _service_semaphores.get(service)
+        wait_start_ns = time.perf_counter_ns()
+        async with semaphore if semaphore is not None else nullcontext():
+            wait_ms = (time.perf_counter_ns() - wait_start_ns) / 1_000_000
+            if wait_ms >= 1:
+                logger.debug("Step waited for service slot", step=step_idx, wait_ms=wait_ms)
+            result = await _call_service(service, action, params, settings, user)
+
+        if cache_key is not None:
+            _step_cache[cache_key] = (time.monotonic(), copy.deepcopy(result))
+            _step_cache.move_to_end(cache_key)
+            while len(_step_cache) > STEP_CACHE_SIZE:
+                _step_cache.popitem(last=False)
         return {
             "status": "completed",
             "output": result,
@@ -489,339 +829,485 @@ async def _execute_step(
         }
 
 
-async def _call_service(
-    service: str,
-    action: str,
-    params: dict[str, Any],
-    settings: Settings,
-    user: str = "",
+def _step_cache_key(service: str, action: str, params: dict[str, Any], user: str) -> bytes:
+    """Build the step cache key from the call's canonical JSON form."""
+    canonical = fastjson.dumps_canonical([service, action, user, params])
+    return hashlib.blake2b(canonical, digest_size=16).digest()
+
+
+def _non_none_params(params: dict[str, Any], names: tuple[str, ...]) -> dict[str, Any]:
+    """Pick the named params that are present and not None.
+
+    Args:
+        params: Step params.
+        names: Optional param names to pass through.
+
+    Returns:
+        Kwargs for the optional params that were given.
+    """
+    return {name: params[name] for name in names if params.get(name) is not None}
+
+
+async def _prismind_search(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
 ) -> Any:
-    """Call a specific service action."""
+    """Search knowledge and join the matching contents.
 
-    if service == "prismind":
-        adapter = PrismindAdapter(
-            sse_url=settings.prismind_url,
-            timeout=settings.prismind_timeout,
-        )
+    With join_results=False the result entries are returned as a list, so
+    later steps can pick out contents without re-splitting a joined string.
+    """
+    kwargs: dict[str, Any] = {
+        "query": params.get("query", ""),
+        "category": params.get("category", ""),
+        "project": params.get("project", ""),
+        "limit": params.get("limit", 10),
+    }
+    kwargs.update(_non_none_params(params, ("tags",)))
+    if user:
+        kwargs["user"] = user
+    results = await adapter.search_knowledge(**kwargs)
+    if not params.get("join_results", True):
+        return results
+    return "\n\n".join([r.get("content", "") for r in results])
 
-        if action == "search":
-            kwargs: dict[str, Any] = {
-                "query": params.get("query", ""),
-                "category": params.get("category", ""),
-                "project": params.get("project", ""),
-                "limit": params.get("limit", 10),
-            }
-            if params.get("tags") is not None:
-                kwargs["tags"] = params["tags"]
-            if user:
-                kwargs["user"] = user
-            results = await adapter.search_knowledge(**kwargs)
-            return "\n\n".join(r.get("content", "") for r in results)
-
-        elif action == "add" or action == "store":
-            kwargs: dict[str, Any] = {
-                "content": params.get("content", ""),
-                "category": params.get("category", ""),
-                "project": params.get("project", ""),
-                "source": params.get("source", ""),
-            }
-            if params.get("tags") is not None:
-                kwargs["tags"] = params["tags"]
-            if user:
-                kwargs["user"] = user
-            return await adapter.add_knowledge(**kwargs)
-
-        elif action == "get_document":
-            return await adapter.get_document(
-                query=params.get("query", ""),
-                doc_id=params.get("doc_id", ""),
-                doc_type=params.get("doc_type", ""),
-            )
 
-        # Task management actions
-        elif action == "get_progress":
-            return await adapter.get_progress(
-                project=params.get("project", ""),
-                phase=params.get("phase", ""),
-                user=user,
-            )
+async def _prismind_add(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Add a knowledge entry."""
+    kwargs: dict[str, Any] = {
+        "content": params.get("content", ""),
+        "category": params.get("category", ""),
+        "project": params.get("project", ""),
+        "source": params.get("source", ""),
+    }
+    kwargs.update(_non_none_params(params, ("tags",)))
+    if user:
+        kwargs["user"] = user
+    return await adapter.add_knowledge(**kwargs)
 
-        elif action == "add_task":
-            return await adapter.add_task(
-                phase=params.get("phase", ""),
-                task_id=params.get("task_id", ""),
-                name=params.get("name", ""),
-                description=params.get("description", ""),
-                project=params.get("project", ""),
-                priority=params.get("priority", "medium"),
-                category=params.get("category", ""),
-                blocked_by=params.get("blocked_by"),
-                user=user,
-            )
 
-        elif action == "complete_task":
-            return await adapter.complete_task(
-                task_id=params.get("task_id", ""),
-                phase=params.get("phase", ""),
-                project=params.get("project", ""),
-                notes=params.get("notes", ""),
-                user=user,
-            )
+async def _prismind_get_document(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Get a document."""
+    return await adapter.get_document(
+        query=params.get("query", ""),
+        doc_id=params.get("doc_id", ""),
+        doc_type=params.get("doc_type", ""),
+    )
 
-        elif action == "update_task_status":
-            return await adapter.update_task_status(
-                task_id=params.get("task_id", ""),
-                status=params.get("status", ""),
-                phase=params.get("phase", ""),
-                project=params.get("project", ""),
-                notes=params.get("notes", ""),
-                user=user,
-            )
 
-        elif action == "start_task":
-            return await adapter.start_task(
-                task_id=params.get("task_id", ""),
-                phase=params.get("phase", ""),
-                project=params.get("project", ""),
-                notes=params.get("notes", ""),
-                user=user,
-            )
+# Task management actions
+async def _prismind_get_progress(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Get task progress."""
+    return await adapter.get_progress(
+        project=params.get("project", ""),
+        phase=params.get("phase", ""),
+        user=user,
+    )
 
-        elif action == "block_task":
-            return await adapter.block_task(
-                task_id=params.get("task_id", ""),
-                reason=params.get("reason", ""),
-                phase=params.get("phase", ""),
-                project=params.get("project", ""),
-                user=user,
-            )
 
-        # Project management actions
-        elif action == "setup_project":
-            kwargs: dict[str, Any] = {
-                "project": params.get("project", ""),
-                "name": params.get("name", ""),
-                "description": params.get("description", ""),
-            }
-            if params.get("phases") is not None:
-                kwargs["phases"] = params["phases"]
-            if params.get("categories") is not None:
-                kwargs["categories"] = params["categories"]
-            return await adapter.setup_project(**kwargs)
-
-        elif action == "list_projects":
-            return await adapter.list_projects(
-                include_archived=params.get("include_archived", False),
-            )
+async def _prismind_add_task(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Add a task."""
+    return await adapter.add_task(
+        phase=params.get("phase", ""),
+        task_id=params.get("task_id", ""),
+        name=params.get("name", ""),
+        description=params.get("description", ""),
+        project=params.get("project", ""),
+        priority=params.get("priority", "medium"),
+        category=params.get("category", ""),
+        blocked_by=params.get("blocked_by"),
+        user=user,
+    )
 
-        elif action == "update_project":
-            # Extract project and pass remaining params, excluding None values
-            project = params.get("project", "")
-            update_params = {k: v for k, v in params.items() if k != "project" and v is not None}
-            return await adapter.update_project(
-                project=project,
-                **update_params,
-            )
 
-        elif action == "delete_project":
-            return await adapter.delete_project(
-                project=params.get("project", ""),
-                confirm=params.get("confirm", False),
-            )
+async def _prismind_complete_task(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Mark a task as completed."""
+    return await adapter.complete_task(
+        task_id=params.get("task_id", ""),
+        phase=params.get("phase", ""),
+        project=params.get("project", ""),
+        notes=params.get("notes", ""),
+        user=user,
+    )
 
-        elif action == "get_project_config":
-            return await adapter.get_project_config(
-                project=params.get("project", ""),
-            )
 
-        # Session/Summary actions
-        elif action == "update_summary":
-            # Prismind uses: project, description, current_phase, completed_tasks, total_tasks, custom_fields
-            # Build kwargs, excluding None values to avoid validation errors
-            kwargs: dict[str, Any] = {
-                "description": params.get("description", params.get("summary", "")),
-                "current_phase": params.get("current_phase", ""),
-            }
-            # IMPORTANT: project must be passed to update the correct project's summary
-            if params.get("project"):
-                kwargs["project"] = params["project"]
-            if params.get("completed_tasks") is not None:
-                kwargs["completed_tasks"] = params["completed_tasks"]
-            if params.get("total_tasks") is not None:
-                kwargs["total_tasks"] = params["total_tasks"]
-            if params.get("custom_fields") is not None:
-                kwargs["custom_fields"] = params["custom_fields"]
-            return await adapter.update_summary(**kwargs)
-
-        # Document actions
-        elif action == "create_document":
-            # Use smart_create_document_impl for automatic type handling
-            # This handles unknown doc_types by classifying with Lexora and registering
-            metadata = params.get("metadata") or {}
-            return await smart_create_document_impl(
-                settings=settings,
-                name=params.get("name", params.get("title", "")),
-                doc_type=params.get("doc_type", ""),
-                content=params.get("content", ""),
-                phase_task=params.get("phase_task", ""),
-                project=params.get("project", ""),
-                feature=params.get("feature", metadata.get("feature", "")),
-                keywords=params.get("keywords", metadata.get("keywords")),
-                auto_register_type=params.get("auto_register_type", True),
-                user=user,
-            )
+async def _prismind_update_task_status(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Update a task's status."""
+    return await adapter.update_task_status(
+        task_id=params.get("task_id", ""),
+        status=params.get("status", ""),
+        phase=params.get("phase", ""),
+        project=params.get("project", ""),
+        notes=params.get("notes", ""),
+        user=user,
+    )
 
-        elif action == "update_document":
-            # Prismind uses: doc_id, content, name, feature, keywords
-            # Build kwargs, excluding None values to avoid validation errors
-            metadata = params.get("metadata") or {}
-            kwargs: dict[str, Any] = {
-                "doc_id": params.get("doc_id", ""),
-            }
-            if params.get("content") is not None:
-                kwargs["content"] = params["content"]
-            name = params.get("name", params.get("title"))
-            if name is not None:
-                kwargs["name"] = name
-            feature = params.get("feature", metadata.get("feature"))
-            if feature:
-                kwargs["feature"] = feature
-            keywords = params.get("keywords", metadata.get("keywords"))
-            if keywords is not None:
-                kwargs["keywords"] = keywords
-            return await adapter.update_document(**kwargs)
-
-        elif action == "delete_document":
-            # Prismind uses: doc_id, project, delete_drive_file, permanent
-            # - project: verify document belongs to this project before deletion
-            # - delete_drive_file: also delete from Google Drive (default: True)
-            # - permanent: if False, move to trash; if True, permanent delete (default: False)
-            kwargs: dict[str, Any] = {
-                "doc_id": params.get("doc_id", ""),
-            }
-            if params.get("project"):
-                kwargs["project"] = params["project"]
-            if params.get("delete_drive_file") is not None:
-                kwargs["delete_drive_file"] = params["delete_drive_file"]
-            else:
-                kwargs["delete_drive_file"] = True  # default: delete from Drive
-            if params.get("permanent") is not None:
-                kwargs["permanent"] = params["permanent"]
-            return await adapter.delete_document(**kwargs)
-
-        elif action == "list_document_types":
-            return await adapter.list_document_types()
-
-        elif action == "register_document_type":
-            kwargs: dict[str, Any] = {
-                "type_id": params.get("type_id", ""),
-                "name": params.get("name", ""),
-                "folder_name": params.get("folder_name", ""),
-            }
-            # Default to global scope
-            kwargs["scope"] = params.get("scope", "global")
-            if params.get("template_doc_id"):
-                kwargs["template_doc_id"] = params["template_doc_id"]
-            if params.get("description"):
-                kwargs["description"] = params["description"]
-            if params.get("fields") is not None:
-                kwargs["fields"] = params["fields"]
-            if params.get("create_folder") is not None:
-                kwargs["create_folder"] = params["create_folder"]
-            return await adapter.register_document_type(**kwargs)
-
-        elif action == "delete_document_type":
-            kwargs: dict[str, Any] = {
-                "type_id": params.get("type_id", ""),
-            }
-            # Default to global scope
-            kwargs["scope"] = params.get("scope", "global")
-            return await adapter.delete_document_type(**kwargs)
-
-        elif action == "list_documents":
-            kwargs: dict[str, Any] = {}
-            if params.get("project"):
-                kwargs["project"] = params["project"]
-            if params.get("doc_type"):
-                kwargs["doc_type"] = params["doc_type"]
-            if params.get("limit") is not None:
-                kwargs["limit"] = params["limit"]
-            return await adapter.list_documents(**kwargs)
 
-        else:
-            raise ValueError(
-                f"Unknown prismind action: {action}. "
-                "Add explicit mapping to _call_service."
-            )
+async def _prismind_start_task(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Mark a task as in progress."""
+    return await adapter.start_task(
+        task_id=params.get("task_id", ""),
+        phase=params.get("phase", ""),
+        project=params.get("project", ""),
+        notes=params.get("notes", ""),
+        user=user,
+    )
 
-    elif service == "cognilens":
-        adapter = CognilensAdapter(
-            sse_url=settings.cognilens_url,
-            timeout=settings.cognilens_timeout,
-        )
 
-        if action == "compress":
-            kwargs: dict[str, Any] = {
-                "text": params.get("text", ""),
-                "ratio": params.get("ratio", 0.5),
-            }
-            if params.get("preserve") is not None:
-                kwargs["preserve"] = params["preserve"]
-            return await adapter.compress(**kwargs)
-
-        elif action == "summarize":
-            return await adapter.summarize(
-                text=params.get("text", ""),
-                style=params.get("style", "concise"),
-                max_tokens=params.get("max_tokens", 500),
-            )
+async def _prismind_block_task(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Mark a task as blocked."""
+    return await adapter.block_task(
+        task_id=params.get("task_id", ""),
+        reason=params.get("reason", ""),
+        phase=params.get("phase", ""),
+        project=params.get("project", ""),
+        user=user,
+    )
 
-        elif action == "extract_essence":
-            kwargs: dict[str, Any] = {
-                "document": params.get("document", ""),
-            }
-            if params.get("focus_areas") is not None:
-                kwargs["focus_areas"] = params["focus_areas"]
-            return await adapter.extract_essence(**kwargs)
-
-        elif action == "optimize":
-            return await adapter.optimize_context(
-                context=params.get("context", ""),
-                task_description=params.get("task_description", ""),
-                target_tokens=params.get("target_tokens", 500),
-            )
 
-        else:
-            raise ValueError(
-                f"Unknown cognilens action: {action}. "
-                "Add explicit mapping to _call_service."
-            )
+# Project management actions
+async def _prismind_setup_project(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Set up a project."""
+    kwargs: dict[str, Any] = {
+        "project": params.get("project", ""),
+        "name": params.get("name", ""),
+        "description": params.get("description", ""),
+    }
+    kwargs.update(_non_none_params(params, ("phases", "categories")))
+    return await adapter.setup_project(**kwargs)
 
-    elif service == "lexora":
-        adapter = LexoraAdapter(
-            base_url=settings.lexora_url,
-            timeout=settings.lexora_timeout,
-        )
 
-        if action == "generate":
-            return await adapter.generate(
-                prompt=params.get("prompt", ""),
-                max_tokens=params.get("max_tokens", 1000),
-                temperature=params.get("temperature", 0.7),
-            )
+async def _prismind_list_projects(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """List projects."""
+    return await adapter.list_projects(
+        include_archived=params.get("include_archived", False),
+    )
 
-        elif action == "chat":
-            return await adapter.chat(
-                messages=params.get("messages", []),
-                max_tokens=params.get("max_tokens", 1000),
-                temperature=params.get("temperature", 0.7),
-            )
 
-        else:
-            raise ValueError(
-                f"Unknown lexora action: {action}. "
-                "Add explicit mapping to _call_service."
-            )
+async def _prismind_update_project(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Update a project's settings."""
+    # Extract project and pass remaining params, excluding None values
+    project = params.get("project", "")
+    update_params = {k: v for k, v in params.items() if k != "project" and v is not None}
+    return await adapter.update_project(
+        project=project,
+        **update_params,
+    )
+
+
+async def _prismind_delete_project(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Delete a project."""
+    return await adapter.delete_project(
+        project=params.get("project", ""),
+        confirm=params.get("confirm", False),
+    )
+
+
+async def _prismind_get_project_config(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Get a project's configuration."""
+    return await adapter.get_project_config(
+        project=params.get("project", ""),
+    )
+
+
+# Session/Summary actions
+async def _prismind_update_summary(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Update a project's summary."""
+    # Prismind uses: project, description, current_phase, completed_tasks, total_tasks,
+    # custom_fields. Build kwargs, excluding None values to avoid validation errors
+    kwargs: dict[str, Any] = {
+        "description": params.get("description", params.get("summary", "")),
+        "current_phase": params.get("current_phase", ""),
+    }
+    # IMPORTANT: project must be passed to update the correct project's summary
+    if params.get("project"):
+        kwargs["project"] = params["project"]
+    kwargs.update(
+        _non_none_params(params, ("completed_tasks", "total_tasks", "custom_fields"))
+    )
+    return await adapter.update_summary(**kwargs)
+
 
+# Document actions
+async def _prismind_create_document(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Create a document, registering unknown document types."""
+    # Use smart_create_document_impl for automatic type handling
+    # This handles unknown doc_types by classifying with Lexora and registering
+    metadata = params.get("metadata") or {}
+    return await smart_create_document_impl(
+        settings=settings,
+        name=params.get("name", params.get("title", "")),
+        doc_type=params.get("doc_type", ""),
+        content=params.get("content", ""),
+        phase_task=params.get("phase_task", ""),
+        project=params.get("project", ""),
+        feature=params.get("feature", metadata.get("feature", "")),
+        keywords=params.get("keywords", metadata.get("keywords")),
+        auto_register_type=params.get("auto_register_type", True),
+        user=user,
+    )
+
+
+async def _prismind_update_document(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Update a document."""
+    # Prismind uses: doc_id, content, name, feature, keywords
+    # Build kwargs, excluding None values to avoid validation errors
+    metadata = params.get("metadata") or {}
+    kwargs: dict[str, Any] = {
+        "doc_id": params.get("doc_id", ""),
+    }
+    kwargs.update(_non_none_params(params, ("content",)))
+    name = params.get("name", params.get("title"))
+    if name is not None:
+        kwargs["name"] = name
+    feature = params.get("feature", metadata.get("feature"))
+    if feature:
+        kwargs["feature"] = feature
+    keywords = params.get("keywords", metadata.get("keywords"))
+    if keywords is not None:
+        kwargs["keywords"] = keywords
+    return await adapter.update_document(**kwargs)
+
+
+async def _prismind_delete_document(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Delete a document."""
+    # Prismind uses: doc_id, project, delete_drive_file, permanent
+    # - project: verify document belongs to this project before deletion
+    # - delete_drive_file: also delete from Google Drive (default: True)
+    # - permanent: if False, move to trash; if True, permanent delete (default: False)
+    kwargs: dict[str, Any] = {
+        "doc_id": params.get("doc_id", ""),
+    }
+    if params.get("project"):
+        kwargs["project"] = params["project"]
+    if params.get("delete_drive_file") is not None:
+        kwargs["delete_drive_file"] = params["delete_drive_file"]
     else:
+        kwargs["delete_drive_file"] = True  # default: delete from Drive
+    kwargs.update(_non_none_params(params, ("permanent",)))
+    return await adapter.delete_document(**kwargs)
+
+
+async def _prismind_list_document_types(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """List document types."""
+    return await adapter.list_document_types()
+
+
+async def _prismind_register_document_type(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Register a document type."""
+    kwargs: dict[str, Any] = {
+        "type_id": params.get("type_id", ""),
+        "name": params.get("name", ""),
+        "folder_name": params.get("folder_name", ""),
+    }
+    # Default to global scope
+    kwargs["scope"] = params.get("scope", "global")
+    if params.get("template_doc_id"):
+        kwargs["template_doc_id"] = params["template_doc_id"]
+    if params.get("description"):
+        kwargs["description"] = params["description"]
+    kwargs.update(_non_none_params(params, ("fields", "create_folder")))
+    return await adapter.register_document_type(**kwargs)
+
+
+async def _prismind_delete_document_type(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Delete a document type."""
+    kwargs: dict[str, Any] = {
+        "type_id": params.get("type_id", ""),
+    }
+    # Default to global scope
+    kwargs["scope"] = params.get("scope", "global")
+    return await adapter.delete_document_type(**kwargs)
+
+
+async def _prismind_list_documents(
+    adapter: PrismindAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """List documents."""
+    kwargs: dict[str, Any] = {}
+    if params.get("project"):
+        kwargs["project"] = params["project"]
+    if params.get("doc_type"):
+        kwargs["doc_type"] = params["doc_type"]
+    kwargs.update(_non_none_params(params, ("limit",)))
+    return await adapter.list_documents(**kwargs)
+
+
+async def _cognilens_compress(
+    adapter: CognilensAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Compress text."""
+    kwargs: dict[str, Any] = {
+        "text": params.get("text", ""),
+        "ratio": params.get("ratio", 0.5),
+    }
+    kwargs.update(_non_none_params(params, ("preserve",)))
+    return await adapter.compress(**kwargs)
+
+
+async def _cognilens_summarize(
+    adapter: CognilensAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Summarize text."""
+    return await adapter.summarize(
+        text=params.get("text", ""),
+        style=params.get("style", "concise"),
+        max_tokens=params.get("max_tokens", 500),
+    )
+
+
+async def _cognilens_extract_essence(
+    adapter: CognilensAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Extract the essence of a document."""
+    kwargs: dict[str, Any] = {
+        "document": params.get("document", ""),
+    }
+    kwargs.update(_non_none_params(params, ("focus_areas",)))
+    return await adapter.extract_essence(**kwargs)
+
+
+async def _cognilens_optimize(
+    adapter: CognilensAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Optimize context for a task."""
+    return await adapter.optimize_context(
+        context=params.get("context", ""),
+        task_description=params.get("task_description", ""),
+        target_tokens=params.get("target_tokens", 500),
+    )
+
+
+async def _lexora_generate(
+    adapter: LexoraAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Generate text, batched with concurrent generate steps."""
+    return await generate_batched(
+        adapter,
+        prompt=params.get("prompt", ""),
+        max_tokens=params.get("max_tokens", 1000),
+        temperature=params.get("temperature", 0.7),
+    )
+
+
+async def _lexora_chat(
+    adapter: LexoraAdapter, params: dict[str, Any], user: str, settings: Settings
+) -> Any:
+    """Chat with the LLM."""
+    return await adapter.chat(
+        messages=params.get("messages", []),
+        max_tokens=params.get("max_tokens", 1000),
+        temperature=params.get("temperature", 0.7),
+    )
+
+
+# Action handlers take (adapter, params, user, settings) and return the
+# step output
+ActionHandler = Callable[[Any, dict[str, Any], str, Settings], Awaitable[Any]]
+
+_PRISMIND_ACTIONS: dict[str, ActionHandler] = {
+    "search": _prismind_search,
+    "add": _prismind_add,
+    "store": _prismind_add,
+    "get_document": _prismind_get_document,
+    "get_progress": _prismind_get_progress,
+    "add_task": _prismind_add_task,
+    "complete_task": _prismind_complete_task,
+    "update_task_status": _prismind_update_task_status,
+    "start_task": _prismind_start_task,
+    "block_task": _prismind_block_task,
+    "setup_project": _prismind_setup_project,
+    "list_projects": _prismind_list_projects,
+    "update_project": _prismind_update_project,
+    "delete_project": _prismind_delete_project,
+    "get_project_config": _prismind_get_project_config,
+    "update_summary": _prismind_update_summary,
+    "create_document": _prismind_create_document,
+    "update_document": _prismind_update_document,
+    "delete_document": _prismind_delete_document,
+    "list_document_types": _prismind_list_document_types,
+    "register_document_type": _prismind_register_document_type,
+    "delete_document_type": _prismind_delete_document_type,
+    "list_documents": _prismind_list_documents,
+}
+
+_COGNILENS_ACTIONS: dict[str, ActionHandler] = {
+    "compress": _cognilens_compress,
+    "summarize": _cognilens_summarize,
+    "extract_essence": _cognilens_extract_essence,
+    "optimize": _cognilens_optimize,
+}
+
+_LEXORA_ACTIONS: dict[str, ActionHandler] = {
+    "generate": _lexora_generate,
+    "chat": _lexora_chat,
+}
+
+# Service name -> (adapter getter, action handlers)
+_SERVICE_ACTIONS: dict[str, tuple[Callable[[Settings], Any], dict[str, ActionHandler]]] = {
+    "prismind": (_get_prismind, _PRISMIND_ACTIONS),
+    "cognilens": (_get_cognilens, _COGNILENS_ACTIONS),
+    "lexora": (_get_lexora, _LEXORA_ACTIONS),
+}
+
+
+async def _call_service(
+    service: str,
+    action: str,
+    params: dict[str, Any],
+    settings: Settings,
+    user: str = "",
+) -> Any:
+    """Call a specific service action."""
+
+    if service not in _SERVICE_ACTIONS:
         raise ValueError(f"Unknown service: {service}")
+
+    get_service_adapter, actions = _SERVICE_ACTIONS[service]
+    handler = actions.get(action)
+    if handler is None:
+        raise ValueError(
+            f"Unknown {service} action: {action}. "
+            f"Add explicit mapping to _{service.upper()}_ACTIONS."
+        )
+
+    return await handler(get_service_adapter(settings), params, user, settings)
@@ -7,11 +7,15 @@ allowing Claude Code and other MCP clients to use multi-service workflows.
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastmcp import FastMCP
 
+from magickit.adapters.pool import close_adapters
 from magickit.config import get_settings
+from magickit.utils.cache import close_caches
 from magickit.utils.logging import configure_logging, get_logger
 
 # Import tool modules (will be registered via decorators)
@@ -20,6 +24,16 @@ from magickit.mcp.tools import health, research, orchestration, generation, sess
 logger = get_logger(__name__)
 
 
+@asynccontextmanager
+async def _lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Close pooled service adapters and caches when the server shuts down."""
+    try:
+        yield
+    finally:
+        await close_adapters()
+        await close_caches()
+
+
 def create_mcp_server() -> FastMCP:
     """Create and configure the FastMCP server.
 
@@ -41,6 +55,7 @@ def create_mcp_server() -> FastMCP:
 It provides tools that combine multiple services (Cognilens, Prismind, Lexora)
 into optimized workflows. Use these tools when you need multi-service operations
 rather than calling individual services separately.""",
+        lifespan=_lifespan,
     )
 
     # Register tools from modules
@@ -0,0 +1,166 @@
+"""Persistent key-value caches backed by SQLite."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+
+from magickit.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Open caches, closed together on shutdown
+_open_caches: set[PersistentAsyncCache] = set()
+
+
+class PersistentAsyncCache:
+    """JSON value cache persisted in SQLite so it survives restarts.
+
+    Entries are partitioned by namespace. Each namespace has a version;
+    bump_version() invalidates every entry of the namespace without
+    deleting rows (stale rows are overwritten on the next set()).
+
+    The connection is opened on first use.
+    """
+
+    def __init__(self, db_path: str | Path, namespace: str) -> None:
+        """Initialize the cache.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            namespace: Namespace of this cache's entries. Include anything
+                that makes cached values stale (e.g., a model version).
+        """
+        self.db_path = Path(db_path)
+        self.namespace = namespace
+        self._connection: aiosqlite.Connection | None = None
+        self._init_lock = asyncio.Lock()
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open the database and create tables on first use."""
+        if self._connection is not None:
+            return self._connection
+
+        async with self._init_lock:
+            if self._connection is None:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                connection = await aiosqlite.connect(self.db_path)
+                await connection.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_namespaces (
+                        name TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                await connection.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        version INTEGER NOT NULL,
+                        value TEXT NOT NULL,
+                        ts REAL NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                """)
+                await connection.execute(
+                    "INSERT OR IGNORE INTO cache_namespaces (name, version) VALUES (?, 0)",
+                    (self.namespace,),
+                )
+                await connection.commit()
+                self._connection = connection
+                _open_caches.add(self)
+                logger.debug(
+                    "Persistent cache opened",
+                    db_path=str(self.db_path),
+                    namespace=self.namespace,
+                )
+
+        return self._connection
+
+    async def get(self, key: str) -> Any | None:
+        """Get a cached value.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            Cached value, or None if missing or invalidated.
+        """
+        connection = await self._connect()
+        async with connection.execute(
+            """
+            SELECT e.value FROM cache_entries e
+            JOIN cache_namespaces n ON n.name = e.namespace AND n.version = e.version
+            WHERE e.namespace = ? AND e.key = ?
+            """,
+            (self.namespace, key),
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a value under the current namespace version.
+
+        Args:
+            key: Cache key.
+            value: JSON-serializable value.
+        """
+        connection = await self._connect()
+        await connection.execute(
+            """
+            INSERT OR REPLACE INTO cache_entries (namespace, key, version, value, ts)
+            SELECT ?, ?, version, ?, ? FROM cache_namespaces WHERE name = ?
+            """,
+            (
+                self.namespace,
+                key,
+                json.dumps(value, ensure_ascii=False),
+                time.time(),
+                self.namespace,
+            ),
+        )
+        await connection.commit()
+
+    async def delete(self, key: str) -> None:
+        """Remove a cached value.
+
+        Args:
+            key: Cache key.
+        """
+        connection = await self._connect()
+        await connection.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        )
+        await connection.commit()
+
+    async def bump_version(self) -> None:
+        """Invalidate all entries of this namespace."""
+        connection = await self._connect()
+        await connection.execute(
+            "UPDATE cache_namespaces SET version = version + 1 WHERE name = ?",
+            (self.namespace,),
+        )
+        await connection.commit()
+        logger.debug("Persistent cache invalidated", namespace=self.namespace)
+
+    async def close(self) -> None:
+        """Close the database connection."""
+        _open_caches.discard(self)
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+async def close_caches() -> None:
+    """Close all open persistent caches."""
+    for cache in list(_open_caches):
+        try:
+            await cache.close()
+        except Exception as e:
+            logger.warning("Failed to close cache", namespace=cache.namespace, error=str(e))
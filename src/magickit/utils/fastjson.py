@@ -0,0 +1,79 @@
+"""Fast JSON parsing and serialization for hot paths.
+
+Uses orjson when it is installed and falls back to the standard library
+json module otherwise. orjson.JSONDecodeError subclasses json.JSONDecodeError,
+so callers can keep catching json.JSONDecodeError either way.
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional accelerator
+    orjson = None  # type: ignore[assignment]
+
+
+def loads(data: str | bytes) -> Any:
+    """Deserialize a JSON document.
+
+    Args:
+        data: JSON text.
+
+    Returns:
+        Deserialized Python object.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] | None = None, **kwargs: Any) -> str:
+    """Serialize an object to JSON text.
+
+    Objects orjson cannot serialize (e.g., integers over 64 bits) fall back
+    to the json module. Extra keyword arguments are only honored by it.
+
+    Args:
+        obj: Object to serialize.
+        default: Called for objects that are not natively serializable.
+        **kwargs: Extra json.dumps arguments.
+
+    Returns:
+        JSON text.
+    """
+    if orjson is not None and not kwargs:
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, default=default, **kwargs)
+
+
+def dumps_canonical(obj: Any) -> bytes:
+    """Serialize an object to canonical JSON bytes for hashing.
+
+    Keys are sorted and unserializable objects are replaced by their string
+    form. The output is only stable within one process, as orjson and the
+    json module format some values differently.
+
+    Args:
+        obj: Object to serialize.
+
+    Returns:
+        UTF-8 JSON bytes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj,
+                default=str,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            pass
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode()
@@ -6,6 +6,8 @@ from typing import Any
 
 import structlog
 
+from magickit.utils import fastjson
+
 
 def configure_logging(level: str = "INFO", format_type: str = "json") -> None:
     """Configure structured logging for the application.
@@ -32,12 +34,14 @@ def configure_logging(level: str = "INFO", format_type: str = "json") -> None:
     ]
 
     if format_type == "json":
-        renderer: Any = structlog.processors.JSONRenderer()
+        renderer: Any = structlog.processors.JSONRenderer(serializer=fastjson.dumps)
     else:
         renderer = structlog.dev.ConsoleRenderer(colors=True)
 
     structlog.configure(
         processors=[
+            # Drop disabled levels before any other processor runs
+            structlog.stdlib.filter_by_level,
             *shared_processors,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
@@ -0,0 +1,56 @@
+"""Token counting for context budgets.
+
+Uses tiktoken's cl100k_base encoding when it is installed and falls back to
+the ~4 characters per token estimate otherwise. Knowledge chunks, which
+recur across searches, are counted through a memoized variant so each is
+tokenized once; one-off texts are counted without filling the cache.
+"""
+
+from functools import lru_cache
+from typing import Any
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is an optional accelerator
+    tiktoken = None
+
+TOKEN_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> Any | None:
+    """Load the cl100k_base encoding, or None if it is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # pragma: no cover - BPE file could not be loaded
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a text.
+
+    Args:
+        text: Text to count.
+
+    Returns:
+        Number of tokens.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def count_chunk_tokens(text: str) -> int:
+    """Count the tokens in a knowledge chunk, memoized on its text.
+
+    Args:
+        text: Chunk text.
+
+    Returns:
+        Number of tokens.
+    """
+    return count_tokens(text)
@@ -3,7 +3,8 @@
 import asyncio
 import os
 import tempfile
-from typing import AsyncGenerator, Generator
+from typing import Any, AsyncGenerator, Callable, Generator
+from unittest.mock import MagicMock
 
 import pytest
 import pytest_asyncio
@@ -56,3 +57,26 @@ async def task_queue(state_manager: StateManager) -> AsyncGenerator[TaskQueue, N
     await queue.initialize()
 
     yield queue
+
+
+@pytest.fixture
+def mock_stream() -> Callable[..., MagicMock]:
+    """Return a factory for mocks of streaming LLM calls.
+
+    The mock yields the given chunks and records the ones consumed in its
+    ``consumed`` attribute.
+    """
+
+    def factory(*chunks: str) -> MagicMock:
+        consumed: list[str] = []
+
+        async def stream(**kwargs: Any) -> AsyncGenerator[str, None]:
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        mock = MagicMock(side_effect=stream)
+        mock.consumed = consumed
+        return mock
+
+    return factory
@@ -0,0 +1,64 @@
+"""Tests for persistent caches."""
+
+import pytest
+
+from magickit.utils.cache import PersistentAsyncCache, close_caches
+
+
+class TestPersistentAsyncCache:
+    """Tests for PersistentAsyncCache."""
+
+    @pytest.fixture
+    async def cache(self, tmp_path):
+        """Create a cache in a temporary directory."""
+        cache = PersistentAsyncCache(tmp_path / "cache.db", namespace="test:v1")
+        yield cache
+        await close_caches()
+
+    @pytest.mark.asyncio
+    async def test_get_missing_returns_none(self, cache):
+        """Test that unknown keys miss."""
+        assert await cache.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_set_and_get(self, cache):
+        """Test storing and reading a value."""
+        await cache.set("api仕様", {"matched_type_id": "api_spec"})
+
+        assert await cache.get("api仕様") == {"matched_type_id": "api_spec"}
+
+    @pytest.mark.asyncio
+    async def test_survives_reopen(self, cache, tmp_path):
+        """Test that values persist across connections."""
+        await cache.set("key", [1, 2])
+        await cache.close()
+
+        reopened = PersistentAsyncCache(tmp_path / "cache.db", namespace="test:v1")
+        assert await reopened.get("key") == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_namespaces_are_isolated(self, cache, tmp_path):
+        """Test that another namespace does not see the entries."""
+        await cache.set("key", "value")
+
+        other = PersistentAsyncCache(tmp_path / "cache.db", namespace="test:v2")
+        assert await other.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_delete_removes_entry(self, cache):
+        """Test that a deleted key misses."""
+        await cache.set("key", "value")
+        await cache.delete("key")
+
+        assert await cache.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_bump_version_invalidates_entries(self, cache):
+        """Test that bumping the version invalidates existing entries."""
+        await cache.set("key", "old")
+        await cache.bump_version()
+
+        assert await cache.get("key") is None
+
+        await cache.set("key", "new")
+        assert await cache.get("key") == "new"
@@ -0,0 +1,540 @@
+"""Tests for document management tools."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from magickit.mcp.tools import document
+from magickit.utils.cache import PersistentAsyncCache
+
+
+class TestHelperFunctions:
+    """Tests for helper functions."""
+
+    def test_normalize_type_id(self):
+        """Test type_id normalization."""
+        assert document._normalize_type_id("API Spec") == "api_spec"
+        assert document._normalize_type_id("meeting-notes") == "meeting_notes"
+        assert document._normalize_type_id("api仕様") == "api"
+
+    def test_normalize_type_id_non_ascii(self):
+        """Test normalization of purely non-ASCII names."""
+        assert document._normalize_type_id("議事録") == ""
+
+    def test_truncate_utf8(self):
+        """Test truncation by bytes at a codepoint boundary."""
+        assert document._truncate_utf8("abc", 2) == "ab"
+        # Each character is 3 bytes in UTF-8; a partial character is dropped
+        assert document._truncate_utf8("議事録", 7) == "議事"
+
+    def test_extract_json_object(self):
+        """Test extracting the first JSON object from an LLM response."""
+        response = 'Here you go: {"type_id": "api_spec", "meta": {"a": 1}} trailing {"x": 2}'
+
+        result = document._extract_json_object(response)
+
+        assert result == {"type_id": "api_spec", "meta": {"a": 1}}
+
+    def test_extract_json_object_with_control_chars(self):
+        """Test that control characters are stripped on parse failure."""
+        response = '{"type_id": "api\x01_spec"}'
+
+        result = document._extract_json_object(response)
+
+        assert result == {"type_id": "api_spec"}
+
+    def test_parse_metadata_response_skips_prose_before_fence(self):
+        """Test that braces in prose before a code fence are skipped."""
+        response = 'Use {type_id} format:\n```json\n{"type_id": "design"}\n```'
+
+        assert document._parse_metadata_response(response) == {"type_id": "design"}
+
+    def test_extract_json_object_not_found(self):
+        """Test error when no JSON object is present."""
+        with pytest.raises(ValueError):
+            document._extract_json_object("no json here")
+
+
+    @pytest.mark.asyncio
+    async def test_list_existing_type_ids_skips_empty_ids(self):
+        """Test that entries without a type_id are ignored."""
+        document._type_ids_cache.clear()
+        prismind = AsyncMock()
+        prismind.list_document_types = AsyncMock(return_value={
+            "document_types": [{"type_id": "design"}, {"type_id": ""}, {"name": "x"}],
+        })
+
+        assert await document._list_existing_type_ids(prismind) == {"design"}
+
+    @pytest.mark.asyncio
+    async def test_list_existing_type_ids_is_cached(self):
+        """Test that the type list is fetched once within the TTL."""
+        document._type_ids_cache.clear()
+        prismind = AsyncMock()
+        prismind.sse_url = "http://localhost:8112/sse"
+        prismind.list_document_types = AsyncMock(return_value={
+            "document_types": [{"type_id": "design"}],
+        })
+
+        await document._list_existing_type_ids(prismind)
+        await document._list_existing_type_ids(prismind)
+        prismind.list_document_types.assert_called_once()
+
+        with patch.object(document, "TYPE_LIST_TTL_SECONDS", 0.0):
+            await document._list_existing_type_ids(prismind)
+        assert prismind.list_document_types.call_count == 2
+
+
+class TestFindMatchingDocumentType:
+    """Tests for RAG-based document type matching."""
+
+    @pytest.mark.asyncio
+    async def test_memoizes_positive_matches(self, tmp_path):
+        """Test that a memoized match skips the semantic search RPC."""
+        memo = PersistentAsyncCache(tmp_path / "semantic_match.db", namespace="test")
+        prismind = AsyncMock()
+        prismind.find_similar_document_type = AsyncMock(return_value={
+            "found": True,
+            "type_id": "api_spec",
+            "similarity": 0.6,
+        })
+
+        existing = {"api_spec"}
+
+        try:
+            with patch.object(document, "_semantic_match_memo", memo):
+                first = await document._find_matching_document_type(
+                    prismind, "api仕様", existing
+                )
+                second = await document._find_matching_document_type(
+                    prismind, "api仕様", existing
+                )
+        finally:
+            await memo.close()
+
+        assert first == second
+        assert second["matched_type_id"] == "api_spec"
+        prismind.find_similar_document_type.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_memoized_match_to_deleted_type_is_dropped(self, tmp_path):
+        """Test that a memoized match is ignored once its type is gone."""
+        memo = PersistentAsyncCache(tmp_path / "semantic_match.db", namespace="test")
+        prismind = AsyncMock()
+        prismind.find_similar_document_type = AsyncMock(return_value={
+            "found": True,
+            "type_id": "api_spec",
+            "similarity": 0.6,
+        })
+
+        try:
+            with patch.object(document, "_semantic_match_memo", memo):
+                await document._find_matching_document_type(prismind, "api仕様", {"api_spec"})
+                prismind.find_similar_document_type.return_value = {"found": False}
+                result = await document._find_matching_document_type(prismind, "api仕様", set())
+                stored = await memo.get("0.45:api仕様")
+        finally:
+            await memo.close()
+
+        assert result is None
+        assert stored is None
+        assert prismind.find_similar_document_type.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_memoized_match_expires(self, tmp_path):
+        """Test that memoized matches older than the TTL are searched again."""
+        memo = PersistentAsyncCache(tmp_path / "semantic_match.db", namespace="test")
+        prismind = AsyncMock()
+        prismind.find_similar_document_type = AsyncMock(return_value={
+            "found": True,
+            "type_id": "api_spec",
+            "similarity": 0.6,
+        })
+        existing = {"api_spec"}
+
+        try:
+            with patch.object(document, "_semantic_match_memo", memo):
+                with patch.object(document.time, "time", return_value=1000.0):
+                    await document._find_matching_document_type(prismind, "api仕様", existing)
+                expired = 1000.0 + document.SEMANTIC_MATCH_TTL_SECONDS + 1
+                with patch.object(document.time, "time", return_value=expired):
+                    await document._find_matching_document_type(prismind, "api仕様", existing)
+        finally:
+            await memo.close()
+
+        assert prismind.find_similar_document_type.call_count == 2
+
+
+class TestGenerateNewTypeMetadata:
+    """Tests for LLM-based type metadata generation."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        document._metadata_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_caches_metadata_by_type_name(self, mock_stream):
+        """Test that identical type names reuse the cached LLM result."""
+        lexora = AsyncMock()
+        lexora.stream = mock_stream(json.dumps({
+            "type_id": "meeting_notes",
+            "name": "Meeting Notes",
+            "folder_name": "MeetingNotes",
+        }))
+
+        first = await document._generate_new_type_metadata(lexora, "Meeting Notes", "a")
+        first["name"] = "mutated"
+        second = await document._generate_new_type_metadata(lexora, " meeting notes", "b")
+
+        assert second["type_id"] == "meeting_notes"
+        assert second["name"] == "Meeting Notes"
+        lexora.stream.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_prompt_has_static_prefix(self, mock_stream):
+        """Test that dynamic values are appended after the static instructions."""
+        lexora = AsyncMock()
+        lexora.stream = mock_stream(json.dumps({
+            "type_id": "meeting_notes",
+            "name": "API Spec",
+            "folder_name": "APISpecs",
+        }))
+
+        result = await document._generate_new_type_metadata(lexora, "API Spec", "content")
+
+        prompt = lexora.stream.call_args.kwargs["prompt"]
+        assert prompt.startswith(document._TYPE_METADATA_INSTRUCTIONS)
+        assert json.loads(prompt[len(document._TYPE_METADATA_INSTRUCTIONS):]) == {
+            "doc_type_name": "API Spec",
+            "type_id": "api_spec",
+            "content_preview": "content",
+        }
+        # The normalized type_id wins over whatever the LLM echoed back
+        assert result["type_id"] == "api_spec"
+
+    @pytest.mark.asyncio
+    async def test_stream_stops_after_json_object(self, mock_stream):
+        """Test that streaming stops once a complete JSON object arrives."""
+        lexora = AsyncMock()
+        lexora.stream = mock_stream(
+            '{"type_id": "design", ',
+            '"name": "Design", "folder_name": "Design"}',
+            "\n\nThis metadata describes...",
+        )
+
+        result = await document._generate_new_type_metadata(lexora, "design", "")
+
+        assert result["folder_name"] == "Design"
+        assert len(lexora.stream.consumed) == 2
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_generate_when_streaming_fails(self):
+        """Test the non-streaming fallback."""
+        lexora = AsyncMock()
+        lexora.stream = MagicMock(side_effect=httpx.ConnectError("refused"))
+        lexora.generate = AsyncMock(return_value=(
+            '```json\n{"type_id": "design", "name": "Design", "folder_name": "Design"}\n```'
+        ))
+
+        result = await document._generate_new_type_metadata(lexora, "design", "")
+
+        assert result["type_id"] == "design"
+        lexora.generate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_generate_when_stream_is_empty(self, mock_stream):
+        """Test the fallback for servers that ignore streaming."""
+        lexora = AsyncMock()
+        lexora.stream = mock_stream()
+        lexora.generate = AsyncMock(return_value=(
+            '{"type_id": "design", "name": "Design", "folder_name": "Design"}'
+        ))
+
+        result = await document._generate_new_type_metadata(lexora, "design", "")
+
+        assert result["type_id"] == "design"
+        lexora.generate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_generate_on_malformed_stream(self):
+        """Test the fallback when a streamed event is not valid JSON."""
+        lexora = AsyncMock()
+        lexora.stream = MagicMock(side_effect=json.JSONDecodeError("bad", "x", 0))
+        lexora.generate = AsyncMock(return_value=(
+            '{"type_id": "design", "name": "Design", "folder_name": "Design"}'
+        ))
+
+        result = await document._generate_new_type_metadata(lexora, "design", "")
+
+        assert result["type_id"] == "design"
+        lexora.generate.assert_called_once()
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test LRU eviction when the cache is full."""
+        with patch.object(document, "METADATA_CACHE_SIZE", 2):
+            document._store_cached_metadata("a", {"type_id": "a"})
+            document._store_cached_metadata("b", {"type_id": "b"})
+            document._get_cached_metadata("a")
+            document._store_cached_metadata("c", {"type_id": "c"})
+
+        assert document._get_cached_metadata("b") is None
+        assert document._get_cached_metadata("a") == {"type_id": "a"}
+
+    def test_cache_persistence_roundtrip(self, tmp_path):
+        """Test saving and loading the metadata cache."""
+        cache_path = tmp_path / "type_metadata.json"
+        document._store_cached_metadata("design", {"type_id": "design"})
+        document._save_metadata_cache(cache_path)
+        document._metadata_cache.clear()
+
+        document._load_metadata_cache(cache_path)
+
+        assert document._get_cached_metadata("Design") == {"type_id": "design"}
+
+
+class TestSmartCreateDocument:
+    """Tests for smart_create_document implementation."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        document._type_ids_cache.clear()
+        self.mock_settings = MagicMock()
+        self.mock_settings.prismind_url = "http://localhost:8112"
+        self.mock_settings.prismind_timeout = 30.0
+        self.mock_settings.lexora_url = "http://localhost:8111"
+        self.mock_settings.lexora_timeout = 60.0
+
+    @pytest.mark.asyncio
+    async def test_normalized_match_skips_semantic_search(self):
+        """Test that a normalized exact match skips RAG semantic search."""
+        with patch.object(document, "PrismindAdapter") as mock_adapter_class:
+            mock_adapter = AsyncMock()
+            mock_adapter.list_document_types = AsyncMock(return_value={
+                "document_types": [{"type_id": "api_spec"}],
+            })
+            mock_adapter.find_similar_document_type = AsyncMock()
+            mock_adapter.create_document = AsyncMock(return_value={
+                "success": True,
+                "doc_id": "doc-1",
+            })
+            mock_adapter_class.return_value = mock_adapter
+
+            result = await document.smart_create_document_impl(
+                settings=self.mock_settings,
+                name="Spec",
+                doc_type="API Spec",
+                content="content",
+                phase_task="phase1-task1",
+            )
+
+            assert result["success"] is True
+            assert result["doc_type"] == "api_spec"
+            assert result["matched_existing"] is True
+            mock_adapter.find_similar_document_type.assert_not_called()
+            assert mock_adapter.create_document.call_args.kwargs["doc_type"] == "api_spec"
+
+    @pytest.mark.asyncio
+    async def test_semantic_match_never_touches_lexora(self):
+        """Test that the LLM adapter stays cold when RAG finds a match."""
+        with (
+            patch.object(document, "PrismindAdapter") as mock_adapter_class,
+            patch.object(document, "LexoraAdapter") as mock_lexora_class,
+        ):
+            mock_adapter = AsyncMock()
+            mock_adapter.list_document_types = AsyncMock(return_value={
+                "document_types": [{"type_id": "api_spec"}],
+            })
+            mock_adapter.find_similar_document_type = AsyncMock(return_value={
+                "found": True,
+                "type_id": "api_spec",
+                "similarity": 0.7,
+            })
+            mock_adapter.create_document = AsyncMock(return_value={"success": True})
+            mock_adapter_class.return_value = mock_adapter
+
+            result = await document.smart_create_document_impl(
+                settings=self.mock_settings,
+                name="Spec",
+                doc_type="api仕様",
+                content="content",
+                phase_task="phase1-task1",
+            )
+
+            assert result["doc_type"] == "api_spec"
+            mock_lexora_class.assert_not_called()
+
+
+class TestSingleFlightResolution:
+    """Tests for coalescing concurrent unknown-type resolutions."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        document._inflight_resolutions.clear()
+        self.mock_settings = MagicMock()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_resolution(self):
+        """Test that concurrent calls for one doc_type register it once."""
+        release = asyncio.Event()
+
+        async def slow_register(**kwargs):
+            await release.wait()
+            return {"success": True}
+
+        prismind = AsyncMock()
+        prismind.find_similar_document_type = AsyncMock(return_value={"found": False})
+        prismind.register_document_type = AsyncMock(side_effect=slow_register)
+        metadata = {"type_id": "design", "name": "Design", "folder_name": "Design"}
+
+        with patch.object(
+            document, "_generate_new_type_metadata", AsyncMock(return_value=metadata)
+        ):
+            calls = [
+                asyncio.create_task(document._resolve_document_type(
+                    settings=self.mock_settings,
+                    prismind=prismind,
+                    doc_type="設計書",
+                    content="",
+                    existing_type_ids=set(),
+                ))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*calls)
+
+        prismind.register_document_type.assert_called_once()
+        assert [r["doc_type"] for r in results] == ["design"] * 3
+        assert [r["type_registered"] for r in results] == [True, False, False]
+        assert not document._inflight_resolutions
+
+
+class TestConcurrentRegistration:
+    """Tests for registration races between workers."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        document._type_ids_cache.clear()
+        document._inflight_resolutions.clear()
+
+    @pytest.mark.asyncio
+    async def test_uses_type_registered_by_another_worker(self):
+        """Test that a failed registration of an existing type is treated as a match."""
+        prismind = AsyncMock()
+        prismind.sse_url = "http://localhost:8112/sse"
+        prismind.find_similar_document_type = AsyncMock(return_value={"found": False})
+        prismind.register_document_type = AsyncMock(return_value={
+            "success": False,
+            "message": "Document type 'design' already exists",
+        })
+        prismind.list_document_types = AsyncMock(return_value={
+            "document_types": [{"type_id": "design"}],
+        })
+        metadata = {"type_id": "design", "name": "Design", "folder_name": "Design"}
+
+        with patch.object(
+            document, "_generate_new_type_metadata", AsyncMock(return_value=metadata)
+        ):
+            result = await document._resolve_document_type(
+                settings=MagicMock(),
+                prismind=prismind,
+                doc_type="設計書",
+                content="",
+                existing_type_ids=set(),
+            )
+
+        assert result["doc_type"] == "design"
+        assert result["matched_existing"] is True
+        assert result["type_registered"] is False
+
+
+class TestSmartCreateDocuments:
+    """Tests for smart_create_documents implementation."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        document._type_ids_cache.clear()
+        self.mock_settings = MagicMock()
+        self.mock_settings.prismind_url = "http://localhost:8112"
+        self.mock_settings.prismind_timeout = 30.0
+
+    @pytest.mark.asyncio
+    async def test_resolves_each_type_once(self):
+        """Test that types are listed once and each doc_type resolved once."""
+        with patch.object(document, "PrismindAdapter") as mock_adapter_class:
+            mock_adapter = AsyncMock()
+            mock_adapter.list_document_types = AsyncMock(return_value={
+                "document_types": [{"type_id": "design"}],
+            })
+            mock_adapter.find_similar_document_type = AsyncMock(return_value={
+                "found": True,
+                "type_id": "design",
+            })
+            mock_adapter.create_document = AsyncMock(return_value={"success": True})
+            mock_adapter_class.return_value = mock_adapter
+
+            results = await document.smart_create_documents_impl(
+                settings=self.mock_settings,
+                items=[
+                    {"name": "A", "doc_type": "設計書", "content": "a", "phase_task": "p1-t1"},
+                    {"name": "B", "doc_type": "設計書", "content": "b", "phase_task": "p1-t1"},
+                    {"name": "C", "doc_type": "design", "content": "c", "phase_task": "p1-t1"},
+                ],
+            )
+
+            assert [r["doc_type"] for r in results] == ["design", "design", "design"]
+            assert all(r["success"] for r in results)
+            mock_adapter.list_document_types.assert_called_once()
+            mock_adapter.find_similar_document_type.assert_called_once()
+            assert mock_adapter.create_document.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_reports_missing_fields_per_item(self):
+        """Test that an invalid item fails without affecting the others."""
+        with patch.object(document, "PrismindAdapter") as mock_adapter_class:
+            mock_adapter = AsyncMock()
+            mock_adapter.list_document_types = AsyncMock(return_value={
+                "document_types": [{"type_id": "design"}],
+            })
+            mock_adapter.create_document = AsyncMock(return_value={"success": True})
+            mock_adapter_class.return_value = mock_adapter
+
+            results = await document.smart_create_documents_impl(
+                settings=self.mock_settings,
+                items=[
+                    {"name": "A", "doc_type": "design"},
+                    {"name": "B", "doc_type": "design", "content": "b", "phase_task": "p1-t1"},
+                ],
+            )
+
+            assert results[0]["success"] is False
+            assert "content" in results[0]["message"]
+            assert results[1]["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_invalid_items_do_not_resolve_types(self):
+        """Test that an item missing required fields never registers its type."""
+        with patch.object(document, "PrismindAdapter") as mock_adapter_class:
+            mock_adapter = AsyncMock()
+            mock_adapter.list_document_types = AsyncMock(return_value={
+                "document_types": [{"type_id": "design"}],
+            })
+            mock_adapter.find_similar_document_type = AsyncMock()
+            mock_adapter_class.return_value = mock_adapter
+
+            results = await document.smart_create_documents_impl(
+                settings=self.mock_settings,
+                items=[{"name": "A", "doc_type": "meeting_notes", "content": "a"}],
+            )
+
+            assert results[0]["success"] is False
+            mock_adapter.find_similar_document_type.assert_not_called()
+            mock_adapter.register_document_type.assert_not_called()
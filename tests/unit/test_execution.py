@@ -1,8 +1,10 @@
 """Tests for execution tools."""
 
+import inspect
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
 from magickit.mcp.tools import execution
@@ -398,6 +400,29 @@ class TestHelperFunctions:
         result = execution._parse_tasks_response(response)
         assert len(result) == 1
 
+    def test_parse_tasks_response_ignores_braces_in_prose(self):
+        """Test that braces around the JSON object do not break parsing."""
+        response = (
+            "Use a {placeholder} per file:\n"
+            '{"tasks": [{"id": "task-1", "name": "Test"}]}\n'
+            "Replace {name} when done."
+        )
+        result = execution._parse_tasks_response(response)
+        assert [t["id"] for t in result] == ["task-1"]
+
+    def test_extract_tasks_requires_a_list(self):
+        """Test that a non-list "tasks" value is not treated as a task list."""
+        assert execution._extract_tasks('{"tasks": "write the tests"}') is None
+        response = '{"tasks": "none"} then {"tasks": [{"id": "task-1"}]}'
+        assert execution._extract_tasks(response) == [{"id": "task-1"}]
+
+    def test_percent(self):
+        """Test percentage rounding with integer arithmetic."""
+        assert execution._percent(2, 3) == 66.7
+        assert execution._percent(1, 16) == 6.3
+        assert execution._percent(5, 5) == 100.0
+        assert execution._percent(0, 0) == 0
+
     def test_parse_tasks_response_invalid_json(self):
         """Test parsing invalid JSON returns empty list."""
         response = "This is not JSON"
@@ -682,3 +707,548 @@ class TestRunFullWorkflow:
                 target="src/api.py",
                 request="Add caching",
             )
+
+
+def _user_sessions():
+    """Get the execution sessions of the default user."""
+    return execution._get_user_sessions(execution.get_current_user())
+
+
+class TestDecomposePrompt:
+    """Tests for the spec_executor_decompose prompt layout."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        execution._execution_sessions.clear()
+        execution._decompose_cache.clear()
+
+        self.mock_settings = MagicMock()
+        self.mock_settings.lexora_url = "http://localhost:8111"
+        self.mock_settings.lexora_timeout = 60.0
+        execution._settings = self.mock_settings
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_starts_with_static_prefix(self, mock_stream):
+        """Test that granularity only changes the tail of the system prompt."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            for granularity in ("fine", "coarse"):
+                await execution.spec_executor_decompose(
+                    specification={"specification": {"title": "Test"}},
+                    granularity=granularity,
+                )
+
+            prompts = [
+                call.kwargs["messages"][0]["content"]
+                for call in mock_lexora.chat_stream.call_args_list
+            ]
+            assert prompts[0] != prompts[1]
+            for prompt in prompts:
+                assert prompt.startswith(execution._DECOMPOSE_SYSTEM_PROMPT)
+
+
+class TestDecomposeCache:
+    """Tests for the spec_executor_decompose response cache."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        execution._execution_sessions.clear()
+        execution._decompose_cache.clear()
+
+        self.mock_settings = MagicMock()
+        self.mock_settings.lexora_url = "http://localhost:8111"
+        self.mock_settings.lexora_timeout = 60.0
+        execution._settings = self.mock_settings
+
+        self.spec = {"specification": {"title": "Test", "requirements": ["Do it"]}}
+
+    @pytest.mark.asyncio
+    async def test_repeat_specification_skips_llm(self, mock_stream):
+        """Test that an identical specification reuses the cached tasks."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            first = await execution.spec_executor_decompose(specification=self.spec)
+            second = await execution.spec_executor_decompose(specification=self.spec)
+
+            assert mock_lexora.chat_stream.call_count == 1
+            assert second["tasks"][0]["id"] == "task-1"
+            # Sessions must not share task dicts
+            assert second["tasks"][0] is not first["tasks"][0]
+
+    @pytest.mark.asyncio
+    async def test_granularity_is_part_of_key(self, mock_stream):
+        """Test that a different granularity calls the LLM again."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            await execution.spec_executor_decompose(specification=self.spec)
+            await execution.spec_executor_decompose(
+                specification=self.spec, granularity="fine"
+            )
+
+            assert mock_lexora.chat_stream.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_fallback_tasks_are_not_cached(self):
+        """Test that LLM failures are retried on the next call."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = MagicMock(side_effect=Exception("LLM down"))
+            mock_lexora_class.return_value = mock_lexora
+
+            await execution.spec_executor_decompose(specification=self.spec)
+            await execution.spec_executor_decompose(specification=self.spec)
+
+            assert mock_lexora.chat_stream.call_count == 2
+            assert not execution._decompose_cache
+
+    @pytest.mark.asyncio
+    async def test_reuses_lexora_adapter(self, mock_stream):
+        """Test that decompositions share one pooled Lexora adapter."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            await execution.spec_executor_decompose(specification=self.spec)
+            await execution.spec_executor_decompose(
+                specification={"specification": {"title": "Other"}}
+            )
+
+            assert mock_lexora.chat_stream.call_count == 2
+            mock_lexora_class.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_stops_streaming_after_task_object(self, mock_stream):
+        """Test that trailing output after the task object is not consumed."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                'Plan {draft}:\n{"tasks": [{"id": "task-1", ',
+                '"name": "Use \\"}\\" safely"}]}',
+                "\nExplanation that should never be read",
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(specification=self.spec)
+
+            assert result["tasks"][0]["name"] == 'Use "}" safely'
+            assert len(mock_lexora.chat_stream.consumed) == 2
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_chat_when_streaming_fails(self):
+        """Test that an HTTP error while streaming retries without streaming."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = MagicMock(
+                side_effect=httpx.ConnectError("stream unsupported")
+            )
+            mock_lexora.chat = AsyncMock(
+                return_value=json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(specification=self.spec)
+
+            assert result["tasks"][0]["id"] == "task-1"
+            mock_lexora.chat.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_chat_when_stream_is_empty(self, mock_stream):
+        """Test that a server ignoring streaming is retried without streaming."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream()
+            mock_lexora.chat = AsyncMock(
+                return_value=json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(specification=self.spec)
+
+            assert result["tasks"][0]["id"] == "task-1"
+            mock_lexora.chat.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_chat_on_malformed_stream(self):
+        """Test that an invalid streamed event retries without streaming."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = MagicMock(
+                side_effect=json.JSONDecodeError("bad", "x", 0)
+            )
+            mock_lexora.chat = AsyncMock(
+                return_value=json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(specification=self.spec)
+
+            assert result["tasks"][0]["id"] == "task-1"
+            mock_lexora.chat.assert_awaited_once()
+
+    def test_cache_evicts_oldest_entry(self):
+        """Test that the cache is bounded."""
+        with patch.object(execution, "DECOMPOSE_CACHE_SIZE", 2):
+            for key in ("a", "b", "c"):
+                execution._store_cached_tasks(key, [{"id": key}])
+
+        assert list(execution._decompose_cache) == ["b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_reordered_specification_hits_cache(self, mock_stream):
+        """Test that list order and whitespace do not affect the cache key."""
+        reordered = {
+            "specification": {"title": " Test ", "requirements": ["Do it ", "Do it"]}
+        }
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            await execution.spec_executor_decompose(specification=self.spec)
+            await execution.spec_executor_decompose(specification=reordered)
+
+            assert mock_lexora.chat_stream.call_count == 1
+
+    def test_canonical_items(self):
+        """Test that specification lists are sorted, stripped and de-duplicated."""
+        assert execution._canonical_items(["b.py", " a.py", "b.py", "  "]) == ["a.py", "b.py"]
+        assert execution._canonical_items(None) == []
+
+
+class TestTaskProgression:
+    """Tests for spec_executor_next_task and spec_executor_complete_task."""
+
+    @pytest.fixture(autouse=True)
+    async def setup(self, mock_stream):
+        """Create an execution session with a dependency chain."""
+        execution._execution_sessions.clear()
+        execution._decompose_cache.clear()
+
+        self.mock_settings = MagicMock()
+        self.mock_settings.lexora_url = "http://localhost:8111"
+        self.mock_settings.lexora_timeout = 60.0
+        execution._settings = self.mock_settings
+
+        tasks = [
+            {"id": "task-1", "name": "First", "dependencies": []},
+            {"id": "task-2", "name": "Second", "dependencies": ["task-1"]},
+            {"id": "task-3", "name": "Third", "dependencies": ["task-1", "task-2"]},
+        ]
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(json.dumps({"tasks": tasks}))
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(
+                specification={"specification": {"title": "Chain"}},
+            )
+        self.execution_id = result["execution_id"]
+
+    @pytest.mark.asyncio
+    async def test_dependencies_gate_next_task(self):
+        """Test that a task is only returned once its dependencies completed."""
+        first = await execution.spec_executor_next_task(self.execution_id)
+        assert first["task"]["id"] == "task-1"
+
+        blocked = await execution.spec_executor_next_task(self.execution_id)
+        assert blocked["has_task"] is False
+        assert blocked["status"] == "waiting_for_dependencies"
+
+        result = await execution.spec_executor_complete_task(self.execution_id, "task-1")
+        assert result["next_task"]["id"] == "task-2"
+
+        result = await execution.spec_executor_complete_task(self.execution_id, "task-2")
+        assert result["next_task"]["id"] == "task-3"
+
+    @pytest.mark.asyncio
+    async def test_failed_dependency_does_not_unblock(self):
+        """Test that a failed task does not satisfy dependencies."""
+        await execution.spec_executor_next_task(self.execution_id)
+
+        result = await execution.spec_executor_complete_task(
+            self.execution_id, "task-1", success=False, error="boom"
+        )
+
+        session = _user_sessions()[self.execution_id]
+        assert result["has_next_task"] is False
+        assert session["failed_ids"] == {"task-1"}
+        assert session["completed_ids"] == set()
+
+    @pytest.mark.asyncio
+    async def test_ready_tasks_keep_plan_order(self, mock_stream):
+        """Test that tasks unblocked later are still handed out in plan order."""
+        tasks = [
+            {"id": "a", "name": "A", "dependencies": []},
+            {"id": "b", "name": "B", "dependencies": ["a"]},
+            {"id": "c", "name": "C", "dependencies": ["a"]},
+            {"id": "d", "name": "D", "dependencies": []},
+        ]
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(json.dumps({"tasks": tasks}))
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(
+                specification={"specification": {"title": "Fan-out"}},
+            )
+        execution_id = result["execution_id"]
+
+        picked = [(await execution.spec_executor_next_task(execution_id))["task"]["id"]]
+        picked.append((await execution.spec_executor_next_task(execution_id))["task"]["id"])
+        for _ in range(2):
+            result = await execution.spec_executor_complete_task(execution_id, "a")
+            picked.append(result["next_task"]["id"])
+
+        assert picked == ["a", "d", "b", "c"]
+        # Completing "a" twice must not release its dependents twice
+        assert _user_sessions()[execution_id]["unmet_deps"] == [0, 0, 0, 0]
+
+    @pytest.mark.asyncio
+    async def test_complete_unknown_task(self):
+        """Test error for a task id that is not in the session."""
+        result = await execution.spec_executor_complete_task(self.execution_id, "task-9")
+
+        assert result["success"] is False
+        assert "not found" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_status_counts_follow_transitions(self):
+        """Test that status counts are updated as tasks progress."""
+        await execution.spec_executor_next_task(self.execution_id)
+        status = await execution.spec_executor_status(self.execution_id)
+        assert status["progress"]["pending"] == 2
+        assert status["progress"]["in_progress"] == 1
+
+        await execution.spec_executor_complete_task(self.execution_id, "task-1")
+        status = await execution.spec_executor_status(self.execution_id)
+        assert status["progress"]["pending"] == 1
+        assert status["progress"]["in_progress"] == 1
+        assert status["progress"]["completed"] == 1
+
+    def test_tasks_share_creation_timestamp(self):
+        """Test that all tasks of a decomposition get the session timestamp."""
+        session = _user_sessions()[self.execution_id]
+
+        assert {t["created_at"] for t in session["tasks"]} == {session["created_at"]}
+
+
+class TestFinalizeKnowledge:
+    """Tests for spec_executor_finalize knowledge writes."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        execution._execution_sessions.clear()
+
+        self.mock_settings = MagicMock()
+        self.mock_settings.prismind_url = "http://localhost:8112"
+        self.mock_settings.prismind_timeout = 30.0
+        execution._settings = self.mock_settings
+
+        self.execution_id = "exec-final123"
+        long_result = "Implemented the change and updated all call sites accordingly."
+        completed = [
+            {"id": "task-1", "name": "Create cache", "result": long_result},
+            {"id": "task-2", "name": "Integrate", "result": long_result},
+            {"id": "task-3", "name": "Tidy", "result": "Short"},
+        ]
+        _user_sessions()[self.execution_id] = {
+            "spec_data": {"title": "Add Caching"},
+            "tasks": completed,
+            "completed_tasks": completed,
+            "failed_tasks": [],
+            "status": "completed",
+            "created_at": "2024-01-01T00:00:00",
+        }
+
+    @pytest.mark.asyncio
+    async def test_counts_successful_writes(self):
+        """Test that a failed entry does not drop the other results."""
+        with patch.object(execution, "PrismindAdapter") as mock_prismind_class:
+            mock_prismind = MagicMock()
+            mock_prismind.add_knowledge_bulk = AsyncMock(
+                return_value=[{}, Exception("Prismind error"), {}]
+            )
+            mock_prismind_class.return_value = mock_prismind
+
+            result = await execution.spec_executor_finalize(
+                execution_id=self.execution_id,
+                project="test-project",
+            )
+
+            # Summary + two significant task results; the short one is skipped
+            entries = mock_prismind.add_knowledge_bulk.call_args.args[0]
+            assert [e["source"] for e in entries] == [
+                f"execution:{self.execution_id}",
+                "task:task-1",
+                "task:task-2",
+            ]
+            assert result["knowledge_saved"] == 2
+
+
+class TestSessionStore:
+    """Tests for execution session storage."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        execution._execution_sessions.clear()
+        execution._decompose_cache.clear()
+
+        self.mock_settings = MagicMock()
+        self.mock_settings.lexora_url = "http://localhost:8111"
+        self.mock_settings.lexora_timeout = 60.0
+        execution._settings = self.mock_settings
+
+    @pytest.mark.asyncio
+    async def test_specification_is_copied(self, mock_stream):
+        """Test that later caller mutations do not leak into the session."""
+        specification = {"specification": {"title": "Test", "requirements": ["A"]}}
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(specification=specification)
+
+        specification["specification"]["requirements"].append("B")
+        session = _user_sessions()[result["execution_id"]]
+        assert session["spec_data"]["requirements"] == ["A"]
+
+    def test_evicts_only_finalized_sessions(self):
+        """Test that the oldest finalized sessions are evicted first."""
+        with patch.object(execution, "MAX_EXECUTION_SESSIONS", 2):
+            execution._store_session("tester", "exec-1", {"status": "in_progress"})
+            execution._store_session("tester", "exec-2", {"status": "finalized"})
+            execution._store_session("tester", "exec-3", {"status": "finalized"})
+            execution._store_session("tester", "exec-4", {"status": "ready"})
+
+        assert list(execution._execution_sessions["tester"]) == ["exec-1", "exec-4"]
+
+    def test_idle_sessions_expire(self):
+        """Test that sessions idle past the TTL are evicted on access and on store."""
+        with patch.object(execution.time, "monotonic", return_value=1000.0):
+            execution._store_session("alice", "exec-1", {"status": "in_progress"})
+            execution._store_session("bob", "exec-2", {"status": "in_progress"})
+
+        later = 1000.0 + execution.EXECUTION_SESSION_TTL_SECONDS + 1
+        with patch.object(execution.time, "monotonic", return_value=later):
+            assert execution._get_session("alice", "exec-1") is None
+            execution._store_session("carol", "exec-3", {"status": "in_progress"})
+
+        assert list(execution._execution_sessions) == ["carol"]
+
+    def test_access_refreshes_idle_timer(self):
+        """Test that reading a session keeps it alive."""
+        ttl = execution.EXECUTION_SESSION_TTL_SECONDS
+        with patch.object(execution.time, "monotonic", return_value=1000.0):
+            execution._store_session("alice", "exec-1", {"status": "in_progress"})
+        with patch.object(execution.time, "monotonic", return_value=1000.0 + ttl - 1):
+            assert execution._get_session("alice", "exec-1") is not None
+        with patch.object(execution.time, "monotonic", return_value=1000.0 + ttl + 1):
+            assert execution._get_session("alice", "exec-1") is not None
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_per_user(self, mock_stream):
+        """Test that a user cannot see another user's execution session."""
+        with patch.object(execution, "LexoraAdapter") as mock_lexora_class:
+            mock_lexora = AsyncMock()
+            mock_lexora.chat_stream = mock_stream(
+                json.dumps({"tasks": [{"id": "task-1", "name": "Task"}]})
+            )
+            mock_lexora_class.return_value = mock_lexora
+
+            result = await execution.spec_executor_decompose(
+                specification={"specification": {"title": "Test"}},
+                user="alice",
+            )
+
+        own = await execution.spec_executor_status(result["execution_id"], user="alice")
+        other = await execution.spec_executor_status(result["execution_id"], user="bob")
+
+        assert own["found"] is True
+        assert other["found"] is False
+
+
+class TestReport:
+    """Tests for spec_executor_report."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Create a finished execution session."""
+        execution._execution_sessions.clear()
+
+        self.execution_id = "exec-report123"
+        completed = [
+            {"id": "task-1", "name": "Create cache", "action_type": "create", "result": "Done"},
+            {"id": "task-2", "name": "Wire cache", "action_type": "modify"},
+            {"id": "task-3", "name": "Run tests", "action_type": "test"},
+        ]
+        failed = [{"id": "task-4", "name": "Drop legacy", "error": "Still in use"}]
+        _user_sessions()[self.execution_id] = {
+            "spec_data": {"title": "Add Caching"},
+            "tasks": completed + failed,
+            "completed_tasks": completed,
+            "failed_tasks": failed,
+            "status": "completed",
+            "created_at": "2024-01-01T00:00:00",
+        }
+
+    @pytest.mark.asyncio
+    async def test_changelog_groups_by_action_type(self):
+        """Test that only create/modify/delete tasks appear, under their headings."""
+        result = await execution.spec_executor_report(self.execution_id, format="changelog")
+
+        report = result["report"]
+        assert "### Added\n- Create cache\n" in report
+        assert "### Changed\n- Wire cache\n" in report
+        assert "### Removed" not in report
+        assert "Run tests" not in report
+
+    @pytest.mark.asyncio
+    async def test_markdown_details(self):
+        """Test that task details are rendered per task."""
+        result = await execution.spec_executor_report(self.execution_id)
+
+        report = result["report"]
+        assert "### Create cache\n**Result:** Done\n" in report
+        assert "### ❌ Drop legacy\n**Error:** Still in use\n" in report
+        assert "| Success Rate | 75.0% |" in report
+
+
+class TestRegisterTools:
+    """Tests for tool registration."""
+
+    def test_tools_are_coroutine_functions(self):
+        """Test that every registered tool is async, so none blocks the event loop."""
+        mcp = MagicMock()
+        with patch.object(execution, "_settings", None):
+            execution.register_tools(mcp, MagicMock())
+
+        tools = [c.args[0] for c in mcp.tool.return_value.call_args_list]
+        assert len(tools) == 7
+        assert all(inspect.iscoroutinefunction(tool) for tool in tools)
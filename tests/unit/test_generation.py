@@ -0,0 +1,281 @@
+"""Tests for generation tools."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from magickit.mcp.tools import generation
+
+
+def _entry(content, score, entry_id=""):
+    """Build a knowledge search result."""
+    return {"id": entry_id or content[:8], "content": content, "score": score}
+
+
+@pytest.fixture(autouse=True)
+def word_tokens():
+    """Count one token per word so budgets are easy to reason about."""
+    def count(text):
+        return len(text.split())
+
+    with (
+        patch.object(generation, "count_tokens", count),
+        patch.object(generation, "count_chunk_tokens", count),
+    ):
+        yield
+
+
+class TestAssembleContext:
+    """Tests for _assemble_context."""
+
+    def test_packs_most_relevant_entries_within_budget(self):
+        """Test that entries are packed by score until the budget is reached."""
+        results = [
+            _entry("low relevance entry here", 0.2, "low"),
+            _entry("high relevance entry", 0.9, "high"),
+            _entry("medium relevance one", 0.5, "mid"),
+        ]
+
+        context, sources, total = generation._assemble_context(results, budget=6)
+
+        assert [s["id"] for s in sources] == ["high", "mid"]
+        assert context == "high relevance entry\n\n---\n\nmedium relevance one"
+        assert total == 10
+
+    def test_exact_duplicates_are_dropped(self):
+        """Test that identical contents are packed once."""
+        results = [_entry("same text", 0.9, "a"), _entry("same text", 0.8, "b")]
+
+        context, sources, total = generation._assemble_context(results, budget=100)
+
+        assert context == "same text"
+        assert [s["id"] for s in sources] == ["a"]
+        assert total == 2
+
+    def test_near_duplicates_of_more_relevant_entries_are_dropped(self):
+        """Test that a near-identical, less relevant entry is dropped."""
+        text = "The deployment pipeline runs unit tests before every release build."
+        results = [
+            _entry(text + " Extra.", 0.7, "copy"),
+            _entry(text, 0.9, "original"),
+            _entry("Completely different notes about the database schema.", 0.5, "other"),
+        ]
+
+        _, sources, _ = generation._assemble_context(results, budget=100)
+
+        assert [s["id"] for s in sources] == ["original", "other"]
+
+    def test_oversized_top_entry_is_returned_alone(self):
+        """Test that an entry larger than the budget is returned for compression."""
+        big = " ".join(["word"] * 20)
+        results = [_entry(big, 0.9, "big"), _entry("small entry", 0.1, "small")]
+
+        context, sources, total = generation._assemble_context(results, budget=5)
+
+        assert context == big
+        assert [s["id"] for s in sources] == ["big"]
+        assert total == 22
+
+    def test_empty_results(self):
+        """Test that no results give an empty context."""
+        assert generation._assemble_context([], budget=10) == ("", [], 0)
+
+
+class TestGenerateWithContext:
+    """Tests for the generate_with_context tool."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Register the tool with stubbed services."""
+        generation._rag_cache.clear()
+        generation._compression_cache.clear()
+
+        self.prismind = MagicMock()
+        self.prismind.search_knowledge = AsyncMock(return_value=[])
+        self.cognilens = MagicMock()
+        self.cognilens.optimize_context = AsyncMock(return_value="compressed context")
+        self.lexora = MagicMock()
+        self.lexora.health_check = AsyncMock(return_value=True)
+        self.lexora.generate = AsyncMock(return_value="generated text")
+
+        settings = MagicMock()
+        settings.rag_cache_enabled = True
+        mcp = MagicMock()
+        generation.register_tools(mcp, settings)
+        self.tool = mcp.tool.return_value.call_args_list[0].args[0]
+
+        with (
+            patch.object(generation, "_get_prismind", return_value=self.prismind),
+            patch.object(generation, "_get_cognilens", return_value=self.cognilens),
+            patch.object(generation, "_get_lexora", return_value=self.lexora),
+        ):
+            yield
+        generation._settings = None
+
+    @pytest.mark.asyncio
+    async def test_packed_context_is_not_compressed(self):
+        """Test that context fitting the budget skips Cognilens."""
+        self.prismind.search_knowledge.return_value = [
+            _entry("first entry", 0.9),
+            _entry("second entry", 0.8),
+        ]
+
+        result = await self.tool(task="Write", max_context_tokens=10, user="u")
+
+        assert result["strategy"] == "packed"
+        assert result["context_compressed"] is False
+        assert len(result["sources"]) == 2
+        self.cognilens.optimize_context.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_only_oversized_top_entry_is_compressed(self):
+        """Test that a top entry exceeding the budget is compressed alone."""
+        big = " ".join(["word"] * 20)
+        self.prismind.search_knowledge.return_value = [
+            _entry(big, 0.9, "big"),
+            _entry("small entry", 0.1, "small"),
+        ]
+
+        result = await self.tool(task="Write", max_context_tokens=5, user="u")
+
+        assert result["strategy"] == "compressed"
+        assert [s["id"] for s in result["sources"]] == ["big"]
+        assert self.cognilens.optimize_context.call_args.kwargs["context"] == big
+        assert "compressed context" in self.lexora.generate.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_repeat_search_is_served_from_cache(self):
+        """Test that the same query reuses the cached knowledge search."""
+        self.prismind.search_knowledge.return_value = [_entry("entry", 0.9)]
+
+        await self.tool(task="Write", context_query="Docs ", user="u")
+        await self.tool(task="Write", context_query="docs", user="u")
+
+        self.prismind.search_knowledge.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_bypass_cache_searches_again(self):
+        """Test that bypass_cache skips the search cache."""
+        self.prismind.search_knowledge.return_value = [_entry("entry", 0.9)]
+
+        await self.tool(task="Write", user="u")
+        await self.tool(task="Write", user="u", bypass_cache=True)
+
+        assert self.prismind.search_knowledge.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_repeat_compression_is_served_from_cache(self):
+        """Test that compressing the same context for the same task runs once."""
+        big = " ".join(["word"] * 20)
+        self.prismind.search_knowledge.return_value = [_entry(big, 0.9)]
+
+        await self.tool(task="Write", max_context_tokens=5, user="u")
+        await self.tool(task="Write", max_context_tokens=5, user="other")
+
+        assert self.prismind.search_knowledge.call_count == 2
+        self.cognilens.optimize_context.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_only_when_not_connected(self):
+        """Test that Lexora is warmed up only before its first connection."""
+        self.lexora.connected = False
+        await self.tool(task="Write", user="u")
+        self.lexora.connected = True
+        await self.tool(task="Write", user="u", bypass_cache=True)
+
+        self.lexora.health_check.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_is_cancelled_on_failure(self):
+        """Test that a failure before generation cancels the warm-up."""
+        cancelled = asyncio.Event()
+
+        async def slow_health_check():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return True
+
+        self.lexora.connected = False
+        self.lexora.health_check = MagicMock(side_effect=slow_health_check)
+        self.prismind.search_knowledge.return_value = [_entry(" ".join(["word"] * 20), 0.9)]
+        self.cognilens.optimize_context.side_effect = RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await self.tool(task="Write", max_context_tokens=5, user="u")
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_cache_entries_expire(self):
+        """Test that searches older than the TTL are fetched again."""
+        self.prismind.search_knowledge.return_value = [_entry("entry", 0.9)]
+        args = (self.prismind, "docs", "", "", 5, "u")
+
+        with patch.object(generation.time, "monotonic", return_value=1000.0):
+            await generation._cached_search(*args)
+        expired = 1000.0 + generation.RAG_CACHE_TTL_SECONDS + 1
+        with patch.object(generation.time, "monotonic", return_value=expired):
+            await generation._cached_search(*args)
+
+        assert self.prismind.search_knowledge.call_count == 2
+
+
+class TestGenerationBatcher:
+    """Tests for _GenerationBatcher."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_prompts_share_one_request(self):
+        """Test that concurrent generations are sent as one batch."""
+        lexora = MagicMock()
+        lexora.generate_batch = AsyncMock(side_effect=lambda p, m, t: [x.upper() for x in p])
+        batcher = generation._GenerationBatcher()
+
+        texts = await asyncio.gather(
+            batcher.generate(lexora, "a", 10, 0.5),
+            batcher.generate(lexora, "b", 10, 0.5),
+        )
+
+        assert texts == ["A", "B"]
+        lexora.generate_batch.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_incomplete_batch_falls_back_to_single_generations(self):
+        """Test that a batch response missing choices is retried per prompt."""
+        lexora = MagicMock()
+        lexora.generate_batch = AsyncMock(side_effect=ValueError("Expected 2 choices"))
+        lexora.generate = AsyncMock(side_effect=lambda prompt, m, t: prompt * 2)
+        batcher = generation._GenerationBatcher()
+
+        texts = await asyncio.gather(
+            batcher.generate(lexora, "a", 10, 0.5),
+            batcher.generate(lexora, "b", 10, 0.5),
+        )
+
+        assert texts == ["aa", "bb"]
+        assert lexora.generate.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_prompt_only_fails_its_caller(self):
+        """Test that one failing prompt in the fallback does not fail the others."""
+
+        async def generate(prompt, max_tokens, temperature):
+            if prompt == "bad":
+                raise RuntimeError("boom")
+            return prompt * 2
+
+        lexora = MagicMock()
+        lexora.generate_batch = AsyncMock(side_effect=ValueError("Expected 2 choices"))
+        lexora.generate = AsyncMock(side_effect=generate)
+        batcher = generation._GenerationBatcher()
+
+        good, bad = await asyncio.gather(
+            batcher.generate(lexora, "a", 10, 0.5),
+            batcher.generate(lexora, "bad", 10, 0.5),
+            return_exceptions=True,
+        )
+
+        assert good == "aa"
+        assert isinstance(bad, RuntimeError)
@@ -5,7 +5,9 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from magickit.adapters.lexora import LexoraAdapter
 from magickit.adapters.mcp_base import MCPBaseAdapter
+from magickit.adapters.pool import close_adapters, get_adapter
 from magickit.adapters.prismind import Document, PrismindAdapter
 
 
@@ -311,3 +313,122 @@ class TestPrismindAdapter:
         result = await adapter.call("list_projects")
 
         adapter.call_tool.assert_called_once_with("list_projects", {})
+
+
+    @pytest.mark.asyncio
+    async def test_add_knowledge_bulk_uses_one_session(self):
+        """Test that add_knowledge_bulk sends every entry over one MCP session."""
+        adapter = PrismindAdapter(sse_url="http://localhost:8112")
+
+        text_result = MagicMock()
+        text_result.content = [MagicMock(text='{"knowledge_id": "k1"}')]
+        mock_session = AsyncMock()
+        mock_session.call_tool = AsyncMock(
+            side_effect=[text_result, Exception("write failed")]
+        )
+
+        with patch.object(adapter, "_get_session") as mock_get_session:
+            mock_context = AsyncMock()
+            mock_context.__aenter__ = AsyncMock(return_value=mock_session)
+            mock_context.__aexit__ = AsyncMock()
+            mock_get_session.return_value = mock_context
+
+            results = await adapter.add_knowledge_bulk(
+                [
+                    {"content": "Summary", "category": "notes", "tags": ["a"]},
+                    {"content": "Detail"},
+                ],
+                project="proj",
+                user="alice",
+            )
+
+        mock_get_session.assert_called_once()
+        mock_session.call_tool.assert_any_call(
+            "add_knowledge",
+            {
+                "content": "Summary",
+                "user": "alice",
+                "category": "notes",
+                "project": "proj",
+                "tags": ["a"],
+            },
+        )
+        assert results[0] == {"knowledge_id": "k1"}
+        assert isinstance(results[1], Exception)
+
+class TestLexoraAdapter:
+    """Tests for LexoraAdapter."""
+
+    @pytest.mark.asyncio
+    async def test_generate_batch_orders_by_choice_index(self):
+        """Test that batch results are matched to prompts by choice index."""
+        adapter = LexoraAdapter("http://localhost:8111")
+        response = MagicMock()
+        response.json.return_value = {
+            "choices": [{"index": 1, "text": "second"}, {"index": 0, "text": "first"}]
+        }
+
+        with patch.object(adapter, "_post", AsyncMock(return_value=response)) as mock_post:
+            texts = await adapter.generate_batch(["a", "b"], max_tokens=10)
+
+        assert texts == ["first", "second"]
+        assert mock_post.call_args.kwargs["json"]["prompt"] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_generate_batch_rejects_short_choices(self):
+        """Test that a response with fewer choices than prompts raises."""
+        adapter = LexoraAdapter("http://localhost:8111")
+        response = MagicMock()
+        response.json.return_value = {"choices": [{"index": 0, "text": "first"}]}
+
+        with patch.object(adapter, "_post", AsyncMock(return_value=response)):
+            with pytest.raises(ValueError):
+                await adapter.generate_batch(["a", "b"], max_tokens=10)
+
+    @pytest.mark.asyncio
+    async def test_generate_batch_rejects_missing_indices(self):
+        """Test that choices without indices are not all mapped to the first prompt."""
+        adapter = LexoraAdapter("http://localhost:8111")
+        response = MagicMock()
+        response.json.return_value = {"choices": [{"text": "first"}, {"text": "second"}]}
+
+        with patch.object(adapter, "_post", AsyncMock(return_value=response)):
+            with pytest.raises(ValueError):
+                await adapter.generate_batch(["a", "b"], max_tokens=10)
+
+
+class TestAdapterPool:
+    """Tests for the shared adapter pool."""
+
+    @pytest.fixture(autouse=True)
+    async def setup(self):
+        """Clear the pool around each test."""
+        await close_adapters()
+        yield
+        await close_adapters()
+
+    def test_reuses_instance_for_same_service(self):
+        """Test that the same (class, url, timeout) returns one instance."""
+        first = get_adapter(PrismindAdapter, "http://localhost:8112", 30.0)
+        second = get_adapter(PrismindAdapter, "http://localhost:8112", 30.0)
+
+        assert first is second
+        assert first.sse_url == "http://localhost:8112/sse"
+
+    def test_separate_instances_per_url(self):
+        """Test that different URLs get different instances."""
+        first = get_adapter(PrismindAdapter, "http://localhost:8112", 30.0)
+        second = get_adapter(PrismindAdapter, "http://localhost:9112", 30.0)
+
+        assert first is not second
+
+    @pytest.mark.asyncio
+    async def test_close_adapters_closes_http_clients(self):
+        """Test that HTTP adapters are closed and the pool is cleared."""
+        lexora = get_adapter(LexoraAdapter, "http://localhost:8111", 60.0)
+        lexora.close = AsyncMock()
+
+        await close_adapters()
+
+        lexora.close.assert_called_once()
+        assert get_adapter(LexoraAdapter, "http://localhost:8111", 60.0) is not lexora
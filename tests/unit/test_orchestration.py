@@ -0,0 +1,308 @@
+"""Tests for orchestration tools."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from magickit.config import Settings
+from magickit.mcp.tools import orchestration
+from magickit.utils.cache import PersistentAsyncCache
+
+
+def _register(tmp_path):
+    """Register the orchestration tools and return them by name."""
+    mcp = MagicMock()
+    orchestration.register_tools(mcp, Settings(cache_dir=str(tmp_path)))
+    return {c.args[0].__name__: c.args[0] for c in mcp.tool.return_value.call_args_list}
+
+
+def _step(i, **kwargs):
+    """Build a prismind.search workflow step tagged with its index."""
+    return {"service": "prismind", "action": "search", "params": {"i": i}, **kwargs}
+
+
+class _FakeAutomaton:
+    """Stand-in for a pyahocorasick automaton over the routing keywords."""
+
+    def iter(self, text):
+        for keyword in orchestration._ALL_KEYWORDS:
+            start = text.find(keyword)
+            while start >= 0:
+                yield start + len(keyword) - 1, keyword
+                start = text.find(keyword, start + 1)
+
+
+class TestBuildExecutionOrder:
+    """Tests for _build_execution_order."""
+
+    def test_independent_steps_run_in_one_batch(self):
+        """Test that steps without dependencies form a single batch."""
+        steps = [{}, {}, {"depends_on": []}]
+        assert orchestration._build_execution_order(steps, None) == [[0, 1, 2]]
+
+    def test_dependencies_are_levelled(self):
+        """Test that each step runs in the batch after its dependencies."""
+        steps = [{}, {"depends_on": [0]}, {}, {"depends_on": [1, 2]}]
+        assert orchestration._build_execution_order(steps, None) == [[0, 2], [1], [3]]
+
+    def test_sequential_chain(self):
+        """Test that a strict chain runs one step per batch."""
+        steps = [{}, {"depends_on": [0]}, {"depends_on": [1]}]
+        assert orchestration._build_execution_order(steps, None) == [[0], [1], [2]]
+
+    def test_parallel_groups_are_used_as_given(self):
+        """Test that explicit parallel groups override dependencies."""
+        steps = [{}, {"depends_on": [0]}, {}]
+        groups = [[0, 2], [1]]
+        assert orchestration._build_execution_order(steps, groups) == groups
+
+    def test_cycle_is_appended_as_final_batch(self):
+        """Test that steps in a dependency cycle still get scheduled."""
+        steps = [{}, {"depends_on": [2]}, {"depends_on": [1]}]
+        assert orchestration._build_execution_order(steps, None) == [[0], [1, 2]]
+
+    def test_empty_workflow(self):
+        """Test that an empty workflow has no batches."""
+        assert orchestration._build_execution_order([], None) == []
+
+
+class TestOrchestrateWorkflow:
+    """Tests for orchestrate_workflow."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Register the tools with a fake service call."""
+        orchestration._step_cache.clear()
+        self.tools = _register(tmp_path)
+        self.calls = []
+        yield
+        orchestration._settings = None
+
+    async def _run(self, steps, fake, **kwargs):
+        with patch.object(orchestration, "_call_service", fake):
+            return await self.tools["orchestrate_workflow"](steps=steps, user="u", **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_dependencies_receive_outputs(self):
+        """Test that a step runs after its dependency and sees its output."""
+
+        async def fake(service, action, params, settings, user=""):
+            self.calls.append(params["i"])
+            return f"out{params['i']}"
+
+        steps = [
+            _step(0, output_key="first"),
+            {**_step(1, depends_on=[0]), "params": {"i": 1, "text": "${first}!"}},
+        ]
+        result = await self._run(steps, fake)
+
+        assert result["status"] == "completed"
+        assert self.calls == [0, 1]
+        assert result["outputs"] == {"first": "out0"}
+
+    @pytest.mark.asyncio
+    async def test_parallel_groups_wait_for_previous_group(self):
+        """Test that a group starts only after the previous group finished."""
+        finished = set()
+
+        async def fake(service, action, params, settings, user=""):
+            if params["i"] == 2:
+                assert finished == {0, 1}
+            await asyncio.sleep(0.01 * (2 - params["i"]))
+            finished.add(params["i"])
+            return params["i"]
+
+        result = await self._run(
+            [_step(0), _step(1), _step(2)], fake, parallel_groups=[[0, 1], [2]]
+        )
+
+        assert result["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_cycle_still_runs(self):
+        """Test that steps in a dependency cycle are executed."""
+
+        async def fake(service, action, params, settings, user=""):
+            return params["i"]
+
+        steps = [_step(0), _step(1, depends_on=[2]), _step(2, depends_on=[1])]
+        result = await self._run(steps, fake)
+
+        assert [r["status"] for r in result["results"]] == ["completed"] * 3
+
+    @pytest.mark.asyncio
+    async def test_stop_on_error_cancels_remaining_steps(self):
+        """Test that a failure cancels running and waiting steps."""
+
+        async def fake(service, action, params, settings, user=""):
+            if params["i"] == 1:
+                raise RuntimeError("boom")
+            await asyncio.sleep(1)
+            return params["i"]
+
+        steps = [_step(0), _step(1), _step(2, depends_on=[0])]
+        result = await self._run(steps, fake)
+
+        assert [r["status"] for r in result["results"]] == ["cancelled", "error", "cancelled"]
+        assert result["errors"] == [{"step": 1, "error": "boom"}]
+        assert result["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_without_stop_on_error_other_steps_complete(self):
+        """Test that other steps finish when stop_on_error is off."""
+
+        async def fake(service, action, params, settings, user=""):
+            if params["i"] == 1:
+                raise RuntimeError("boom")
+            return params["i"]
+
+        result = await self._run([_step(0), _step(1)], fake, stop_on_error=False)
+
+        assert [r["status"] for r in result["results"]] == ["completed", "error"]
+        assert result["status"] == "partial"
+
+
+class TestKeywordRouting:
+    """Tests for the heuristic keyword routing."""
+
+    @pytest.fixture(params=["frozenset", "automaton"])
+    def matcher(self, request):
+        """Run each test with and without the Aho-Corasick automaton."""
+        automaton = _FakeAutomaton() if request.param == "automaton" else None
+        with patch.object(orchestration, "_KEYWORD_AUTOMATON", automaton):
+            yield
+
+    def test_keywords_match_as_substrings(self, matcher):
+        """Test that keywords inside longer words still match."""
+        assert orchestration._match_keywords("findings about tokens") == {"find", "token"}
+
+    def test_action_priority(self, matcher):
+        """Test that compression wins over generation."""
+        result = orchestration._analyze_request(
+            "write and compress this", "", ["cognilens", "lexora"]
+        )
+        assert result["recommended_action"] == "compress"
+
+    def test_search_and_generate_recommend_rag_workflow(self, matcher):
+        """Test that search plus generation routes to a RAG workflow."""
+        result = orchestration._analyze_request(
+            "search docs and write a report", "", ["prismind", "cognilens", "lexora"]
+        )
+        assert result["recommended_service"] == "magickit"
+        assert [s["service"] for s in result["workflow"]] == ["prismind", "lexora"]
+
+    def test_no_match_defaults_to_search(self, matcher):
+        """Test the default route for unrecognized requests."""
+        result = orchestration._analyze_request("hello", "", [])
+        assert result["recommended_service"] == "prismind"
+        assert result["recommended_action"] == "search"
+        assert result["confidence"] == 0.5
+
+
+class TestClassificationCache:
+    """Tests for the Lexora classification caches."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Clear the caches and stub Lexora."""
+        orchestration._classification_cache.clear()
+        orchestration._similar_classifications.clear()
+        for key in orchestration._classification_cache_stats:
+            orchestration._classification_cache_stats[key] = 0
+
+        self.lexora = MagicMock()
+        self.lexora.classify_task = AsyncMock(
+            return_value={"task_type": "search", "confidence": 0.9}
+        )
+        with (
+            patch.object(orchestration, "_classification_memo", None),
+            patch.object(orchestration, "_get_lexora", return_value=self.lexora),
+        ):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_hits_cache(self):
+        """Test that an identical request is classified once."""
+        await orchestration._classify_request("find the API docs", MagicMock())
+        result = await orchestration._classify_request("find the API docs", MagicMock())
+
+        assert result["task_type"] == "search"
+        assert self.lexora.classify_task.await_count == 1
+        assert orchestration._classification_cache_stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_near_identical_request_hits_similar_cache(self):
+        """Test that case and spacing variants reuse the classification."""
+        await orchestration._classify_request("Find the API documentation", MagicMock())
+        await orchestration._classify_request("find  the API documentation.", MagicMock())
+
+        assert self.lexora.classify_task.await_count == 1
+        assert orchestration._classification_cache_stats["similar_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_different_request_misses(self):
+        """Test that unrelated requests are classified separately."""
+        await orchestration._classify_request("find the API docs", MagicMock())
+        await orchestration._classify_request("write a release note", MagicMock())
+
+        assert self.lexora.classify_task.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_changed_verb_misses_similar_cache(self):
+        """Test that long requests differing only in the verb are classified apart."""
+        body = (
+            " the onboarding notes from the last three sprint reviews, including the open"
+            " questions about deployment windows, the rollback checklist that the platform"
+            " team drafted in March, and the staging incidents we discussed on Friday"
+        )
+        await orchestration._classify_request("Please compress" + body, MagicMock())
+        await orchestration._classify_request("Please store" + body, MagicMock())
+
+        assert self.lexora.classify_task.await_count == 2
+        assert orchestration._classification_cache_stats["similar_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_persisted_exact_match_beats_similar_match(self, tmp_path):
+        """Test that the persistent memo is checked before near matches."""
+        memo = PersistentAsyncCache(tmp_path / "classification.db", namespace="test")
+        try:
+            with patch.object(orchestration, "_classification_memo", memo):
+                await orchestration._classify_request("Find the API documentation", MagicMock())
+                orchestration._classification_cache.clear()
+                orchestration._similar_classifications.clear()
+                self.lexora.classify_task.return_value = {
+                    "task_type": "retrieval",
+                    "confidence": 0.9,
+                }
+                await orchestration._classify_request("find  the API documentation.", MagicMock())
+                result = await orchestration._classify_request(
+                    "Find the API documentation", MagicMock()
+                )
+        finally:
+            await memo.close()
+
+        assert result["task_type"] == "search"
+        assert orchestration._classification_cache_stats["persisted_hits"] == 1
+        assert orchestration._classification_cache_stats["similar_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self):
+        """Test that entries older than the TTL are classified again."""
+        with patch.object(orchestration.time, "monotonic", return_value=1000.0):
+            await orchestration._classify_request("find the API docs", MagicMock())
+        expired = 1000.0 + orchestration.CLASSIFICATION_CACHE_TTL_SECONDS + 1
+        with patch.object(orchestration.time, "monotonic", return_value=expired):
+            await orchestration._classify_request("find the API docs", MagicMock())
+
+        assert self.lexora.classify_task.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_is_not_cached(self):
+        """Test that uncertain classifications are retried."""
+        self.lexora.classify_task.return_value = {"task_type": "general", "confidence": 0.1}
+
+        await orchestration._classify_request("hmm", MagicMock())
+        await orchestration._classify_request("hmm", MagicMock())
+
+        assert self.lexora.classify_task.await_count == 2